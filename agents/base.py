@@ -1,30 +1,56 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from langchain.tools import BaseTool
 from pydantic import BaseModel
+from app.config import settings
+from tools.schemas import RetrievedDocument
+import asyncio
 
 class AgentResponse(BaseModel):
     content: str
     tool_calls: List[Dict[str, Any]] = []
     confidence: float = 1.0
+    documents: List[RetrievedDocument] = []  # trechos usados como contexto
+
+def tool_timeout(tool_name: str) -> float:
+    """Timeout da ferramenta no caminho assíncrono (``tool_timeout_<nome>`` ou ``tool_timeout``)"""
+    return getattr(settings, f"tool_timeout_{tool_name}", settings.tool_timeout)
 
 class BaseAgent(ABC):
     def __init__(self, tools: List[BaseTool] = None):
         self.tools = tools or []
         self.tool_map = {tool.name: tool for tool in self.tools}
-    
+
     @abstractmethod
     def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
         pass
-    
+
+    async def aprocess(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
+        """Versão assíncrona de process; agents sem implementação nativa rodam numa thread"""
+        return await asyncio.to_thread(self.process, query, context)
+
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Executa uma ferramenta com os parâmetros fornecidos"""
         if tool_name not in self.tool_map:
             return f"Ferramenta '{tool_name}' não encontrada."
-        
+
         try:
             tool = self.tool_map[tool_name]
             # Chama o método _run diretamente com os kwargs
             return tool._run(**kwargs)
         except Exception as e:
-            return f"Erro ao executar {tool_name}: {str(e)}"
\ No newline at end of file
+            return f"Erro ao executar {tool_name}: {str(e)}"
+
+    async def aexecute_tool(self, tool_name: str, timeout: Optional[float] = None, **kwargs) -> str:
+        """Versão assíncrona de execute_tool, limitada ao timeout da ferramenta"""
+        if tool_name not in self.tool_map:
+            return f"Ferramenta '{tool_name}' não encontrada."
+
+        timeout = timeout or tool_timeout(tool_name)
+        try:
+            return await asyncio.wait_for(self.tool_map[tool_name]._arun(**kwargs), timeout)
+        except asyncio.TimeoutError:
+            print(f"   ⏱️ {tool_name} excedeu {timeout:.1f}s")
+            return f"Tempo esgotado ao executar {tool_name} ({timeout:.0f}s)."
+        except Exception as e:
+            return f"Erro ao executar {tool_name}: {str(e)}"
@@ -1,7 +1,19 @@
-from .base import BaseAgent, AgentResponse
+from .base import BaseAgent, AgentResponse, tool_timeout
 from tools.vector_search import VectorSearchTool
-from typing import Dict, Any
+from tools.schemas import format_documents
+from typing import Dict, Any, Optional, Hashable
+from app.config import settings
 from app.core.llm import llm_manager
+from app.core.embeddings import embedding_registry
+from app.core.answer_cache import answer_cache, CachedAnswer
+import numpy as np
+import asyncio
+import time
+import re
+
+def _mentions(text: str, words) -> bool:
+    """Alguma das palavras aparece inteira no texto ("hi" não casa com "machine")"""
+    return re.search(r"\b(?:" + "|".join(map(re.escape, words)) + r")\b", text) is not None
 
 class RAGAgent(BaseAgent):
     def __init__(self):
@@ -10,62 +22,91 @@ class RAGAgent(BaseAgent):
         # Inicializa LLM na primeira execução
         llm_manager.initialize()
     
-    def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
+    def _options(self, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Parâmetros da busca (com valores padrão)"""
+        context = context or {}
+        use_answer_cache = context.get('use_answer_cache')
+        return {
+            "k": context.get('max_results', 3),
+            "threshold": context.get('confidence_threshold', 0.3),
+            "model_name": context.get('embedding_model'),
+            "use_reranker": context.get('use_reranker'),
+            "use_mmr": context.get('use_mmr'),
+            "mmr_lambda": context.get('mmr_lambda'),
+            "use_answer_cache": settings.answer_cache_enabled if use_answer_cache is None else use_answer_cache,
+            # Embedding da consulta já calculado pelo roteador (mesmo modelo da busca)
+            "query_embedding": context.get('query_embedding')
+        }
+    
+    def _small_talk(self, query: str) -> Optional[AgentResponse]:
+        """Saudações, agradecimentos e despedidas não passam pela busca"""
         query_lower = query.lower()
         
-        # Extrair parâmetros (com valores padrão)
-        k = context.get('max_results', 3) if context else 3
-        threshold = context.get('confidence_threshold', 0.3) if context else 0.3
-
         # Saudações simples
-        if any(word in query_lower for word in ["oi", "olá", "ola", "hey", "hi", "hello"]):
+        if _mentions(query_lower, ["oi", "olá", "ola", "hey", "hi", "hello"]):
             return AgentResponse(
                 content="Olá! 👋 Como posso te ajudar hoje?\n\nPosso buscar informações na base de conhecimento, consultar o tempo ou buscar notícias na web.",
                 confidence=1.0
             )
         
         # Agradecimentos
-        if any(word in query_lower for word in ["obrigado", "obrigada", "valeu", "thanks"]):
+        if _mentions(query_lower, ["obrigado", "obrigada", "valeu", "thanks"]):
             return AgentResponse(
                 content="De nada! 😊 Posso ajudar com mais alguma coisa?",
                 confidence=1.0
             )
         
         # Despedidas
-        if any(word in query_lower for word in ["tchau", "adeus", "até logo", "bye"]):
+        if _mentions(query_lower, ["tchau", "adeus", "até logo", "bye"]):
             return AgentResponse(
                 content="Até logo! 👋 Volte sempre!",
                 confidence=1.0
             )
+        return None
+    
+    def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
+        options = self._options(context)
+        k, threshold, model_name = options["k"], options["threshold"], options["model_name"]
+        use_reranker, use_mmr, mmr_lambda = options["use_reranker"], options["use_mmr"], options["mmr_lambda"]
+        use_answer_cache = options["use_answer_cache"]
+        
+        small_talk = self._small_talk(query)
+        if small_talk is not None:
+            return small_talk
         
         # Busca na base de conhecimento
         try:
-            search_results = self.execute_tool("vector_search", 
-                                               query=query, 
-                                               k=k, 
-                                               threshold=threshold)
+            # Respostas em cache valem só para a mesma collection e parâmetros de busca
+            cache_namespace = (model_name or settings.embedding_model_name, k, threshold, use_mmr, mmr_lambda, use_reranker)
+            query_embedding = options["query_embedding"]
+            if use_answer_cache:
+                if query_embedding is None:
+                    query_embedding = embedding_registry.get(model_name).embed_query_array(query)
+                cached = self._cached_answer(cache_namespace, query_embedding, model_name)
+                if cached is not None:
+                    return cached
+            
+            # Resultados estruturados: os vetores seguem junto para a avaliação
+            documents = self.tool_map["vector_search"].search(query=query, 
+                                                              k=k, 
+                                                              threshold=threshold,
+                                                              model_name=model_name,
+                                                              mmr=use_mmr,
+                                                              mmr_lambda=mmr_lambda,
+                                                              rerank=use_reranker,
+                                                              with_vectors=True,
+                                                              query_vector=query_embedding)
             
             # Se não encontrou nada relevante
-            if "Nenhum documento relevante encontrado" in search_results:
-                return AgentResponse(
-                    content=f"""Desculpe, não encontrei informações sobre "{query}" na base de conhecimento.
-
-                            💡 **Sugestões:**
-                            - Tente reformular sua pergunta
-                            - Use "buscar notícias sobre..." para buscar na web
-                            - Pergunte sobre RAG, embeddings, ou os componentes do sistema
-
-                            O que você gostaria de saber?""",
-                                                confidence=0.3
-                                            )
+            if not documents:
+                return self._not_found(query)
             
-            llm_response = llm_manager.generate_response(query, search_results)
+            start = time.perf_counter()
+            llm_response, generated = llm_manager.generate_response(query, format_documents(documents))
+            generation_seconds = time.perf_counter() - start
             
-            return AgentResponse(
-                content=llm_response,
-                tool_calls=[{"tool": "vector_search", "query": query}, {"tool": "llm_generation", "used": True}],
-                confidence=0.8
-            )
+            return self._respond(query, documents, llm_response, generated,
+                                 generation_seconds, use_answer_cache, cache_namespace, query_embedding)
             
             # # Formata resposta com os resultados encontrados
             # return AgentResponse(
@@ -78,4 +119,122 @@ class RAGAgent(BaseAgent):
             return AgentResponse(
                 content=f"Erro ao buscar informações: {str(e)}",
                 confidence=0.0
-            )
\ No newline at end of file
+            )
+    
+    async def aprocess(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
+        """Versão assíncrona de process: busca e geração sem prender uma thread"""
+        options = self._options(context)
+        k, threshold, model_name = options["k"], options["threshold"], options["model_name"]
+        use_reranker, use_mmr, mmr_lambda = options["use_reranker"], options["use_mmr"], options["mmr_lambda"]
+        use_answer_cache = options["use_answer_cache"]
+        
+        small_talk = self._small_talk(query)
+        if small_talk is not None:
+            return small_talk
+        
+        try:
+            cache_namespace = (model_name or settings.embedding_model_name, k, threshold, use_mmr, mmr_lambda, use_reranker)
+            query_embedding = options["query_embedding"]
+            if use_answer_cache:
+                if query_embedding is None:
+                    query_embedding = await embedding_registry.get(model_name).aembed_query_array(query)
+                # A validação do hit consulta a collection (cliente síncrono): roda numa thread
+                cached = await asyncio.to_thread(self._cached_answer, cache_namespace, query_embedding, model_name)
+                if cached is not None:
+                    return cached
+            
+            documents = await asyncio.wait_for(
+                self.tool_map["vector_search"].asearch(query=query,
+                                                       k=k,
+                                                       threshold=threshold,
+                                                       model_name=model_name,
+                                                       mmr=use_mmr,
+                                                       mmr_lambda=mmr_lambda,
+                                                       rerank=use_reranker,
+                                                       with_vectors=True,
+                                                       query_vector=query_embedding),
+                tool_timeout("vector_search")
+            )
+            
+            if not documents:
+                return self._not_found(query)
+            
+            context_text = format_documents(documents)
+            start = time.perf_counter()
+            try:
+                llm_response, generated = await asyncio.wait_for(
+                    llm_manager.agenerate_response(query, context_text), tool_timeout("llm_generation")
+                )
+            except asyncio.TimeoutError:
+                # LLM lento: responde com os documentos, como no fallback
+                print(f"   ⏱️ llm_generation excedeu {tool_timeout('llm_generation'):.1f}s")
+                llm_response, generated = f"**Documentos encontrados:**\n\n{context_text}", False
+            generation_seconds = time.perf_counter() - start
+            
+            return self._respond(query, documents, llm_response, generated,
+                                 generation_seconds, use_answer_cache, cache_namespace, query_embedding)
+        
+        except asyncio.TimeoutError:
+            return AgentResponse(
+                content="Tempo esgotado ao buscar informações na base de conhecimento. Tente novamente.",
+                confidence=0.0
+            )
+        except Exception as e:
+            return AgentResponse(
+                content=f"Erro ao buscar informações: {str(e)}",
+                confidence=0.0
+            )
+    
+    def _respond(self, query: str, documents, llm_response: str, generated: bool, generation_seconds: float,
+                 use_answer_cache: bool, cache_namespace: Hashable, query_embedding: Optional[np.ndarray]) -> AgentResponse:
+        """Monta a resposta gerada e a guarda no cache de respostas"""
+        tool_calls = [{"tool": "vector_search", "query": query, "results": len(documents)},
+                      {"tool": "llm_generation", "used": True, "seconds": round(generation_seconds, 3)}]
+        if use_answer_cache:
+            # Respostas de fallback (LLM fora do ar) não entram no cache
+            if generated:
+                answer_cache.add(cache_namespace, query_embedding,
+                                 CachedAnswer(query, llm_response, documents, generation_seconds))
+            tool_calls.append({"tool": "answer_cache", "hit": False})
+        
+        return AgentResponse(
+            content=llm_response,
+            tool_calls=tool_calls,
+            confidence=0.8,
+            documents=documents
+        )
+    
+    def _not_found(self, query: str) -> AgentResponse:
+        return AgentResponse(
+            content=f"""Desculpe, não encontrei informações sobre "{query}" na base de conhecimento.
+
+                            💡 **Sugestões:**
+                            - Tente reformular sua pergunta
+                            - Use "buscar notícias sobre..." para buscar na web
+                            - Pergunte sobre RAG, embeddings, ou os componentes do sistema
+
+                            O que você gostaria de saber?""",
+            confidence=0.3
+        )
+    
+    def _cached_answer(self, namespace: Hashable, query_embedding: np.ndarray,
+                       model_name: Optional[str]) -> Optional[AgentResponse]:
+        """Resposta de uma pergunta parecida já respondida, se os trechos usados não mudaram"""
+        search_tool = self.tool_map["vector_search"]
+        # IDs dos pontos derivam do conteúdo: chunk alterado ou removido = ID ausente
+        hit = answer_cache.lookup(
+            namespace, query_embedding,
+            is_valid=lambda entry: search_tool.existing_ids(entry.document_ids, model_name) == set(entry.document_ids)
+        )
+        if hit is None:
+            return None
+        
+        entry, similarity = hit
+        print(f"   ⚡ Resposta em cache (similaridade {similarity:.3f}): {entry.query}")
+        return AgentResponse(
+            content=entry.answer,
+            tool_calls=[{"tool": "answer_cache", "hit": True, "similarity": round(similarity, 3),
+                         "cached_query": entry.query, "saved_seconds": round(entry.generation_seconds, 3)}],
+            confidence=0.8,
+            documents=entry.documents
+        )
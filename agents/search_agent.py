@@ -10,7 +10,13 @@ class SearchAgent(BaseAgent):
     def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
         # Executa busca na web
         search_results = self.execute_tool("web_search", query=query, num_results=3)
-        
+        return self._respond(query, search_results)
+    
+    async def aprocess(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
+        search_results = await self.aexecute_tool("web_search", query=query, num_results=3)
+        return self._respond(query, search_results)
+    
+    def _respond(self, query: str, search_results: str) -> AgentResponse:
         response_content = f"""Informações atualizadas da web sobre "{query}":
 
                             {search_results}
@@ -1,6 +1,7 @@
-from .base import BaseAgent, AgentResponse
+from .base import BaseAgent, AgentResponse, tool_timeout
 from tools.weather_api import WeatherTool
-from typing import Dict, Any
+from typing import Dict, Any, List
+import asyncio
 import re
 
 class WeatherAgent(BaseAgent):
@@ -9,31 +10,75 @@ class WeatherAgent(BaseAgent):
         self.name = "weather_agent"
     
     def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
-        # Extrai cidade da consulta (implementação simples)
-        city = self._extract_city(query)
+        # Extrai cidade(s) da consulta (implementação simples)
+        cities = self._extract_cities(query)
         
-        if not city:
-            return AgentResponse(
-                content="Por favor, especifique uma cidade para consultar o tempo. Exemplo: 'Como está o tempo em São Paulo?'",
-                confidence=0.2
-            )
+        if not cities:
+            return self._no_city()
         
-        weather_info = self.execute_tool("weather_query", city=city)
+        if len(cities) == 1:
+            weather_info = self.execute_tool("weather_query", city=cities[0])
+        else:
+            # Várias cidades: consultas em paralelo
+            reports = self.tool_map["weather_query"].lookup_many([(city, None) for city in cities])
+            weather_info = "\n\n".join(reports)
         
+        return self._respond(cities, weather_info)
+    
+    async def aprocess(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
+        cities = self._extract_cities(query)
+        
+        if not cities:
+            return self._no_city()
+        
+        if len(cities) == 1:
+            weather_info = await self.aexecute_tool("weather_query", city=cities[0])
+        else:
+            try:
+                reports = await asyncio.wait_for(
+                    self.tool_map["weather_query"].alookup_many([(city, None) for city in cities]),
+                    tool_timeout("weather_query")
+                )
+                weather_info = "\n\n".join(reports)
+            except asyncio.TimeoutError:
+                weather_info = f"Tempo esgotado ao consultar o tempo de {', '.join(cities)}."
+        
+        return self._respond(cities, weather_info)
+    
+    def _no_city(self) -> AgentResponse:
+        return AgentResponse(
+            content="Por favor, especifique uma cidade para consultar o tempo. Exemplo: 'Como está o tempo em São Paulo?'",
+            confidence=0.2
+        )
+    
+    def _respond(self, cities: List[str], weather_info: str) -> AgentResponse:
         return AgentResponse(
             content=weather_info,
-            tool_calls=[{"tool": "weather_query", "city": city}],
+            tool_calls=[{"tool": "weather_query", "city": city} for city in cities],
             confidence=0.9
         )
     
+    def _extract_cities(self, query: str) -> List[str]:
+        """Cidades citadas na consulta ("tempo em São Paulo e Rio de Janeiro")"""
+        location = self._extract_city(query)
+        if not location:
+            return []
+        cities = []
+        for city in re.split(r"\s*,\s*|\s+(?:e|and)\s+", location, flags=re.IGNORECASE):
+            city = city.strip()
+            # Siglas soltas ("São Paulo, SP") não são cidades
+            if len(city) > 2 and city.casefold() not in {c.casefold() for c in cities}:
+                cities.append(city)
+        return cities
+    
     def _extract_city(self, query: str) -> str:
          # Padrões de extração
         patterns = [
-            r"tempo (?:em|de|do|da|no|na) ([\w\s]+)",
-            r"clima (?:em|de|do|da|no|na) ([\w\s]+)",
-            r"temperatura (?:em|de|do|da|no|na) ([\w\s]+)",
-            r"weather in ([\w\s]+)",
-            r"(?:em|de|do|da|no|na) ([\w\s]+)",
+            r"tempo (?:em|de|do|da|no|na) ([\w\s,]+)",
+            r"clima (?:em|de|do|da|no|na) ([\w\s,]+)",
+            r"temperatura (?:em|de|do|da|no|na) ([\w\s,]+)",
+            r"weather in ([\w\s,]+)",
+            r"(?:em|de|do|da|no|na) ([\w\s,]+)",
         ]
         
         query_lower = query.lower()
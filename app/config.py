@@ -9,6 +9,19 @@ class Settings(BaseSettings):
     # LLM Settings
     huggingface_model_name: str = "microsoft/DialoGPT-large"
     embedding_model_name: str = "all-MiniLM-L6-v2"
+    embedding_backend: str = "torch"  # torch | torch-int8
+    embedding_num_threads: int = 0  # 0 = padrão do PyTorch
+    embedding_max_resident_models: int = 2
+    
+    # Embedding cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_dir: str = "data/cache/embeddings"
+    embedding_cache_memory_items: int = 10000
+    
+    # Embedding Service
+    use_embedding_service: bool = False
+    embedding_service_url: str = "http://embedding-service:8001"
+    embedding_service_timeout: float = 30.0
     
     # LLM Service 
     use_local_llm: bool = True
@@ -19,8 +32,103 @@ class Settings(BaseSettings):
     use_llm_service: bool = True
 
     # Vector DB
+    vector_backend: str = "qdrant"  # qdrant | local
     qdrant_url: str = "http://localhost:6333"
     qdrant_api_key: Optional[str] = None
+    qdrant_collection_name: str = "documents"
+    qdrant_upsert_batch_size: int = 256
+    qdrant_upsert_parallelism: int = 4
+    qdrant_upsert_retries: int = 3
+    qdrant_upsert_backoff: float = 0.5
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    qdrant_pool_size: int = 100
+    local_index_dir: str = "data/vector_index"
+    local_index_hnsw_threshold: int = 20000  # 0 desativa o HNSW
+    local_index_hnsw_m: int = 16
+    local_index_hnsw_ef_construction: int = 200
+    local_index_hnsw_ef: int = 64
+
+    # Busca híbrida (BM25 + densa, fundidas por RRF)
+    hybrid_search: bool = False
+    hybrid_candidates: int = 20
+    hybrid_rrf_k: int = 60
+    sparse_index_dir: str = "data/sparse_index"
+
+    # Diversificação MMR dos resultados
+    mmr_enabled: bool = False
+    mmr_fetch_k: int = 20
+    mmr_lambda: float = 0.5
+
+    # Reranking com cross-encoder
+    reranker_enabled: bool = False
+    reranker_model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_fetch_k: int = 20
+    reranker_batch_size: int = 32
+    reranker_cache_items: int = 50000
+
+    # Cache de resultados da busca vetorial (invalidado a cada ingestão)
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_items: int = 1000
+    retrieval_cache_ttl: float = 300.0
+    retrieval_cache_dir: str = "data/cache/retrieval"
+    redis_url: Optional[str] = None  # ex.: redis://redis:6379/0 (cache compartilhado)
+
+    # Cache semântico de respostas do RAG (perguntas parecidas reaproveitam a resposta)
+    answer_cache_enabled: bool = False
+    answer_cache_similarity: float = 0.92
+    answer_cache_items: int = 500
+    answer_cache_ttl: float = 3600.0
+
+    # Reindexação blue/green (scripts/ingest.py --rebuild)
+    reindex_keep_versions: int = 1  # versões anteriores mantidas para rollback
+    reindex_sample_size: int = 20
+    reindex_indexing_threshold: int = 20000
+    reindex_ready_timeout: float = 600.0
+    
+    # HTTP das ferramentas (sessão compartilhada, timeouts e retries)
+    http_connect_timeout: float = 3.05
+    http_read_timeout: float = 10.0
+    http_deadline: float = 15.0  # prazo total de uma chamada, incluindo retries
+    http_retries: int = 2
+    http_backoff: float = 0.3
+    http_pool_size: int = 10
+    http_async_pool_size: int = 100  # conexões simultâneas do cliente assíncrono
+    
+    # Timeouts por ferramenta no caminho assíncrono (aprocess_query); tool_timeout é o padrão
+    tool_timeout: float = 20.0
+    tool_timeout_vector_search: float = 10.0
+    tool_timeout_web_search: float = 10.0
+    tool_timeout_weather_query: float = 8.0
+    tool_timeout_sql_query: float = 10.0
+    tool_timeout_llm_generation: float = 30.0
+    
+    # Roteamento por intenção com embeddings (centróides de exemplos); abaixo da
+    # margem entre a 1ª e a 2ª intenção, valem as regras por palavra-chave
+    semantic_router_enabled: bool = True
+    semantic_router_margin: float = 0.05
+    semantic_router_min_score: float = 0.3
+    
+    # Workflow: respostas abaixo da confiança mínima vão para o fallback (busca web)
+    workflow_min_confidence: float = 0.5
+    # Execução especulativa: consultas ambíguas rodam RAG e busca web em paralelo
+    speculative_enabled: bool = False
+    speculative_hedge_delay: float = 0.0  # segundos esperando o RAG antes de disparar a busca web
+    speculative_budget: float = 1.0  # hedges por consulta ambígua (0.1 = no máximo ~10%)
+    speculative_burst: float = 10.0
+
+    # Busca web (DuckDuckGo)
+    web_search_deadline: float = 8.0
+    web_search_cache_ttl: float = 600.0
+    web_search_stale_ttl: float = 3600.0  # serve o resultado velho enquanto atualiza
+    web_search_cache_items: int = 256
+    
+    # Tempo (OpenWeatherMap)
+    openweather_url: str = "http://api.openweathermap.org/data/2.5/weather"
+    weather_deadline: float = 5.0
+    weather_cache_ttl: float = 120.0
+    weather_cache_items: int = 512
+    weather_max_concurrency: int = 4
     
     # PostgreSQL
     postgres_host: str = "localhost"
@@ -28,6 +136,17 @@ class Settings(BaseSettings):
     postgres_db: str = "rag_assistant"
     postgres_user: str = "postgres"
     postgres_password: str = "postgres"
+    sql_pool_size: int = 5
+    sql_max_overflow: int = 5
+    sql_pool_timeout: float = 10.0
+    sql_pool_recycle: int = 1800  # segundos
+    sql_connect_timeout: float = 5.0
+    sql_schema_check_interval: float = 30.0  # intervalo mínimo entre checagens do esquema
+    sql_sample_rows: int = 3
+    sql_statement_timeout: float = 5.0  # segundos por consulta
+    sql_row_cap: int = 100  # máximo de linhas devolvidas
+    sql_fetch_batch: int = 50  # linhas por leitura do cursor
+    sql_plan_cache_items: int = 256
     
     # APIs
     openweather_api_key: str = "ValeTest"
@@ -2,16 +2,25 @@
 Core modules for RAG Assistant
 """
 
-from .embeddings import embedding_manager, EmbeddingManager
+from .embeddings import embedding_manager, EmbeddingManager, embedding_registry, EmbeddingRegistry
 from .evaluation import rag_evaluator, RAGEvaluator, EvaluationMetrics
 from .llm import llm_manager, LLMManager
+from .reranker import reranker, Reranker
+from .answer_cache import answer_cache, AnswerCache, CachedAnswer
 
 __all__ = [
     "embedding_manager",
     "EmbeddingManager",
+    "embedding_registry",
+    "EmbeddingRegistry",
     "rag_evaluator", 
     "RAGEvaluator",
     "EvaluationMetrics",
     "llm_manager",
-    "LLMManager"
+    "LLMManager",
+    "reranker",
+    "Reranker",
+    "answer_cache",
+    "AnswerCache",
+    "CachedAnswer"
 ]
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""Cache semântico de respostas: perguntas parecidas reaproveitam a resposta do LLM"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from app.config import settings
+import numpy as np
+import threading
+import time
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    documents: List[Any]  # trechos usados como contexto (com IDs dos pontos)
+    generation_seconds: float
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def document_ids(self) -> List[str]:
+        return [document.id for document in self.documents]
+
+class _Index:
+    """Embeddings normalizados das perguntas em cache, numa matriz (n, dim)"""
+
+    def __init__(self, dimension: int):
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.entries: List[CachedAnswer] = []
+
+    def add(self, vector: np.ndarray, entry: CachedAnswer):
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.entries.append(entry)
+
+    def remove(self, rows: List[int]):
+        rows = set(rows)
+        keep = [i for i in range(len(self.entries)) if i not in rows]
+        self.vectors = self.vectors[keep]
+        self.entries = [self.entries[i] for i in keep]
+
+class AnswerCache:
+    """Respostas do RAG indexadas pelo embedding da pergunta.
+
+    Cada namespace (modelo de embedding + parâmetros da busca) tem o seu
+    índice; a busca é um produto matricial contra as perguntas em cache e
+    só conta como acerto acima de ``similarity``. Quem usa o cache confere
+    se os trechos da resposta ainda existem antes de servi-la.
+    """
+
+    def __init__(self, similarity: Optional[float] = None, max_items: Optional[int] = None, ttl: Optional[float] = None):
+        self.similarity = settings.answer_cache_similarity if similarity is None else similarity
+        self.max_items = settings.answer_cache_items if max_items is None else max_items
+        self.ttl = settings.answer_cache_ttl if ttl is None else ttl
+        self._indexes: Dict[Hashable, _Index] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(
+        self,
+        namespace: Hashable,
+        embedding: np.ndarray,
+        is_valid: Optional[Callable[[CachedAnswer], bool]] = None
+    ) -> Optional[Tuple[CachedAnswer, float]]:
+        """Resposta em cache mais parecida com a pergunta, se passar do limiar.
+
+        ``is_valid`` confere a resposta encontrada (ex.: os trechos usados
+        ainda existem); se falhar, ela é descartada e conta como miss.
+        """
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is not None:
+                expired = [i for i, entry in enumerate(index.entries) if now - entry.created_at > self.ttl]
+                if expired:
+                    index.remove(expired)
+            if index is None or not index.entries or index.vectors.shape[1] != len(vector):
+                self.misses += 1
+                return None
+
+            similarities = index.vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity:
+                self.misses += 1
+                return None
+            entry, similarity = index.entries[best], float(similarities[best])
+
+        if is_valid is not None and not is_valid(entry):
+            self.discard(namespace, entry)
+            self.misses += 1
+            return None
+
+        entry.last_used = now
+        self.hits += 1
+        self.saved_seconds += entry.generation_seconds
+        return entry, similarity
+
+    def add(self, namespace: Hashable, embedding: np.ndarray, entry: CachedAnswer):
+        vector = self._normalize(embedding)
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None or index.vectors.shape[1] != len(vector):
+                index = self._indexes[namespace] = _Index(len(vector))
+            index.add(vector, entry)
+            self._evict()
+
+    def discard(self, namespace: Hashable, entry: CachedAnswer):
+        """Remove uma resposta do cache"""
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is not None:
+                index.remove([i for i, cached in enumerate(index.entries) if cached is entry])
+
+    def _evict(self):
+        """Descarta as respostas usadas há mais tempo acima de ``max_items``"""
+        total = sum(len(index.entries) for index in self._indexes.values())
+        if total <= self.max_items:
+            return
+        ranked = sorted(
+            ((entry.last_used, namespace, i)
+             for namespace, index in self._indexes.items()
+             for i, entry in enumerate(index.entries)),
+            key=lambda item: item[0]
+        )
+        stale: Dict[Hashable, List[int]] = {}
+        for _, namespace, i in ranked[:total - self.max_items]:
+            stale.setdefault(namespace, []).append(i)
+        for namespace, rows in stale.items():
+            self._indexes[namespace].remove(rows)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "cached_answers": sum(len(index.entries) for index in self._indexes.values())
+        }
+
+# Instância global
+answer_cache = AnswerCache()
@@ -0,0 +1,258 @@
+"""Cache persistente de embeddings endereçado por conteúdo"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+KEY_SIZE = 16  # bytes do digest blake2b usado como chave
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza texto antes do hash (Unicode NFC + espaços colapsados)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_key(namespace: str, text: str) -> bytes:
+    """Chave do cache: hash de (modelo, texto normalizado)"""
+    digest = hashlib.blake2b(digest_size=KEY_SIZE)
+    digest.update(namespace.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.digest()
+
+
+class _DiskStore:
+    """Tier em disco: vetores float32 em arquivo mapeado + índice compacto de chaves.
+
+    Layout do diretório:
+      - ``meta.json``   → namespace e dimensão do modelo
+      - ``vectors.f32`` → matriz float32 contígua (linha i = vetor i)
+      - ``keys.bin``    → digests de 16 bytes (linha i = chave i)
+
+    O arquivo de chaves é o registro de commit: um vetor só existe se a sua
+    chave foi escrita, então escritas interrompidas nunca corrompem o cache.
+    """
+
+    def __init__(self, directory: Path, namespace: str, dimension: int):
+        self.directory = directory
+        self.namespace = namespace
+        self.dimension = dimension
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._meta_path = directory / "meta.json"
+        self._vectors_path = directory / "vectors.f32"
+        self._keys_path = directory / "keys.bin"
+        self._lock_path = directory / ".lock"
+
+        self._index: Dict[bytes, int] = {}
+        self._keys_bytes_read = 0
+        self._mmap: Optional[np.memmap] = None
+        # Índice, contador de bytes lidos e memmap mudam juntos: leitores e escritores
+        # (threads) não podem ver uma linha nova no índice com o memmap antigo
+        self._lock = threading.RLock()
+
+        self._check_meta()
+        self._refresh_index()
+
+    def _check_meta(self):
+        """Descarta o diretório se foi criado para outro modelo/dimensão"""
+        meta = {"namespace": self.namespace, "dimension": self.dimension}
+        if self._meta_path.exists():
+            try:
+                current = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            except ValueError:
+                current = None
+            if current == meta:
+                return
+            for path in (self._vectors_path, self._keys_path):
+                if path.exists():
+                    path.unlink()
+        self._meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+    def _refresh_index(self):
+        """Lê chaves adicionadas (inclusive por outros processos) desde a última leitura"""
+        with self._lock:
+            if not self._keys_path.exists():
+                return
+            size = self._keys_path.stat().st_size
+            size -= size % KEY_SIZE
+            if size <= self._keys_bytes_read:
+                return
+
+            with open(self._keys_path, "rb") as f:
+                f.seek(self._keys_bytes_read)
+                data = f.read(size - self._keys_bytes_read)
+
+            start_row = self._keys_bytes_read // KEY_SIZE
+            for offset in range(0, len(data), KEY_SIZE):
+                self._index[data[offset:offset + KEY_SIZE]] = start_row + offset // KEY_SIZE
+            self._keys_bytes_read = size
+            self._mmap = None  # remapeia na próxima leitura
+
+    def _vectors(self) -> np.memmap:
+        """Memmap com as linhas já indexadas (chamar com ``self._lock``)"""
+        if self._mmap is None:
+            rows = self._keys_bytes_read // KEY_SIZE
+            self._mmap = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r",
+                shape=(rows, self.dimension)
+            )
+        return self._mmap
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[int, np.ndarray]:
+        """Retorna {posição em keys: vetor} para as chaves presentes em disco"""
+        with self._lock:
+            rows = {i: self._index.get(key) for i, key in enumerate(keys)}
+            if any(row is None for row in rows.values()):
+                self._refresh_index()
+                rows = {i: self._index.get(key) for i, key in enumerate(keys)}
+
+            found = {i: row for i, row in rows.items() if row is not None}
+            if not found:
+                return {}
+
+            vectors = self._vectors()
+            return {i: np.array(vectors[row]) for i, row in found.items()}
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """Acrescenta novos vetores ao final do arquivo"""
+        with self._lock, open(self._lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._refresh_index()
+                new = [
+                    (key, vector) for key, vector in zip(keys, vectors)
+                    if key not in self._index
+                ]
+                if not new:
+                    return
+
+                rows = self._keys_bytes_read // KEY_SIZE
+                block = np.ascontiguousarray(
+                    np.stack([vector for _, vector in new]), dtype=np.float32
+                )
+                with open(self._vectors_path, "ab") as f:
+                    # Descarta vetores órfãos de uma escrita interrompida
+                    f.truncate(rows * self.dimension * 4)
+                    f.write(block.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._keys_path, "ab") as f:
+                    # Descarta uma chave parcial: as novas precisam começar num múltiplo de KEY_SIZE
+                    f.truncate(rows * KEY_SIZE)
+                    f.write(b"".join(key for key, _ in new))
+
+                self._refresh_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+
+class EmbeddingCache:
+    """Cache de embeddings em dois níveis: LRU em memória + armazenamento em disco.
+
+    As chaves são o hash de (namespace do modelo, texto normalizado), então
+    trocar ``settings.embedding_model_name`` invalida o cache automaticamente.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        dimension: int,
+        directory: Optional[str] = None,
+        max_memory_items: int = 10000,
+    ):
+        self.namespace = namespace
+        self.dimension = dimension
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._disk = None
+        if directory:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", namespace)
+            self._disk = _DiskStore(Path(directory) / slug, namespace, dimension)
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> bytes:
+        return text_key(self.namespace, text)
+
+    def get_many(self, texts: Sequence[str]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """Busca textos no cache; retorna (vetores ou None, índices ausentes)"""
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        pending = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.append(i)
+
+        if pending and self._disk is not None:
+            found = self._disk.get_many([keys[i] for i in pending])
+            with self._lock:
+                for j, vector in found.items():
+                    i = pending[j]
+                    results[i] = vector
+                    self._remember(keys[i], vector)
+                    self.disk_hits += 1
+            pending = [i for j, i in enumerate(pending) if j not in found]
+
+        with self._lock:
+            self.misses += len(pending)
+        return results, pending
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        """Armazena vetores recém-calculados nos dois níveis"""
+        keys = [self.key(text) for text in texts]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+        if self._disk is not None:
+            self._disk.put_many(keys, vectors)
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de acerto/erro do cache"""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_items": len(self._memory),
+            "disk_items": len(self._disk) if self._disk is not None else 0,
+        }
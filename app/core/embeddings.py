@@ -1,25 +1,327 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Union
+import torch
+import asyncio
+import base64
+import httpx
+import requests
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
 from app.config import settings
+from app.core.embedding_cache import EmbeddingCache
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8")
 
 class EmbeddingManager:
-    def __init__(self):
-        self.model = SentenceTransformer(settings.embedding_model_name)
-        
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        use_service: Optional[bool] = None,
+        backend: Optional[str] = None
+    ):
+        self.model_name = model_name or settings.embedding_model_name
+        self.use_service = settings.use_embedding_service if use_service is None else use_service
+        self.backend = backend or settings.embedding_backend
+        if self.backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"Backend de embedding inválido: '{self.backend}' "
+                f"(opções: {', '.join(EMBEDDING_BACKENDS)})"
+            )
+
+        # Modelo e cache são carregados sob demanda (na primeira chamada)
+        self._model = None
+        self._cache = None
+        self._dimension = None
+        self._lock = threading.RLock()
+        self._session = requests.Session() if self.use_service else None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+        # Tempo gasto no encoder (para estimar a economia do cache)
+        self.encode_seconds = 0.0
+        self.encoded_texts = 0
+
+    @property
+    def model(self) -> SentenceTransformer:
+        """Modelo local, carregado uma única vez"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    print(f"🧮 Carregando modelo de embedding: {self.model_name} ({self.backend})")
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self) -> SentenceTransformer:
+        """Carrega o modelo no backend configurado"""
+        if settings.embedding_num_threads > 0:
+            torch.set_num_threads(settings.embedding_num_threads)
+
+        if self.backend == "torch-int8":
+            # Quantização dinâmica: pesos das camadas Linear em int8, ativações em fp32
+            model = SentenceTransformer(self.model_name, device="cpu")
+            return torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+
+        return SentenceTransformer(self.model_name)
+
+    def unload(self):
+        """Libera o modelo da memória (o cache em disco é mantido)"""
+        with self._lock:
+            self._model = None
+
+    @property
+    def cache_namespace(self) -> str:
+        """Namespace do cache: vetores de backends diferentes não se misturam"""
+        if self.use_service:
+            self._resolve_service_info()
+        if self.backend == "torch":
+            return self.model_name
+        return f"{self.model_name}@{self.backend}"
+
+    @property
+    def cache(self) -> Optional[EmbeddingCache]:
+        """Cache de embeddings (memória + disco), se habilitado"""
+        if self._cache is None and settings.embedding_cache_enabled:
+            with self._lock:
+                if self._cache is None:
+                    if self.use_service:
+                        self._resolve_service_info()
+                    self._cache = EmbeddingCache(
+                        namespace=self.cache_namespace,
+                        dimension=self.dimension,
+                        directory=settings.embedding_cache_dir or None,
+                        max_memory_items=settings.embedding_cache_memory_items
+                    )
+        return self._cache
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Executa o encoder apenas para os textos fornecidos"""
+        start = time.perf_counter()
+        if self.use_service:
+            embeddings = self._encode_remote(texts)
+        else:
+            embeddings = np.asarray(
+                self.model.encode(texts, convert_to_numpy=True), dtype=np.float32
+            )
+        self.encode_seconds += time.perf_counter() - start
+        self.encoded_texts += len(texts)
+        return embeddings
+
+    def _encode_remote(self, texts: List[str]) -> np.ndarray:
+        """Gera embeddings no serviço de embeddings"""
+        response = self._session.post(
+            f"{settings.embedding_service_url}/embed",
+            json={"texts": texts, "model": self.model_name},
+            timeout=settings.embedding_service_timeout
+        )
+        response.raise_for_status()
+        return self._decode_remote(response.json())
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Um cliente HTTP por event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=settings.embedding_service_timeout)
+            self._async_clients[loop] = client
+        return client
+
+    async def _aencode_remote(self, texts: List[str]) -> np.ndarray:
+        """Versão assíncrona de _encode_remote"""
+        start = time.perf_counter()
+        response = await self._async_client().post(
+            f"{settings.embedding_service_url}/embed",
+            json={"texts": texts, "model": self.model_name}
+        )
+        response.raise_for_status()
+        embeddings = self._decode_remote(response.json())
+        self.encode_seconds += time.perf_counter() - start
+        self.encoded_texts += len(texts)
+        return embeddings
+
+    @staticmethod
+    def _decode_remote(data: Dict[str, Any]) -> np.ndarray:
+        raw = base64.b64decode(data["embeddings_b64"])
+        return np.frombuffer(raw, dtype="<f4").reshape(data["count"], data["dimension"])
+
+    def _lookup(self, texts: List[str]):
+        """Consulta o cache; retorna (vetores ou None, índices ausentes, textos únicos a codificar)"""
+        cached, missing = self.cache.get_many(texts)
+        # Textos repetidos no mesmo lote são codificados uma única vez
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        return cached, missing, unique
+
+    def _merge(self, texts, cached, missing, unique, encoded) -> np.ndarray:
+        """Grava os vetores novos no cache e monta a matriz na ordem de ``texts``"""
+        if missing:
+            self.cache.put_many(unique, encoded)
+            by_text = dict(zip(unique, encoded))
+            for i in missing:
+                cached[i] = by_text[texts[i]]
+        return np.stack(cached).astype(np.float32, copy=False)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Gera embeddings consultando o cache antes do encoder"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts)
+
+        cached, missing, unique = self._lookup(texts)
+        encoded = self._encode(unique) if unique else None
+        return self._merge(texts, cached, missing, unique, encoded)
+
+    async def aembed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Versão assíncrona de embed_texts_array.
+
+        Com o serviço de embeddings a chamada é HTTP assíncrona; com o modelo
+        local (CPU) o encoder roda no executor padrão do event loop.
+        """
+        if not self.use_service:
+            return await asyncio.get_running_loop().run_in_executor(None, self._embed, texts)
+        dimension = await self.adimension()
+        if not texts:
+            return np.zeros((0, dimension), dtype=np.float32)
+        # Cache em disco (abertura, mmap, flock/fsync) fora do event loop
+        cache = self._cache if self._cache is not None else await asyncio.to_thread(lambda: self.cache)
+        if cache is None:
+            return await self._aencode_remote(texts)
+
+        cached, missing, unique = await asyncio.to_thread(self._lookup, texts)
+        encoded = await self._aencode_remote(unique) if unique else None
+        return await asyncio.to_thread(self._merge, texts, cached, missing, unique, encoded)
+
+    async def aembed_query_array(self, query: str) -> np.ndarray:
+        """Versão assíncrona de embed_query_array"""
+        return (await self.aembed_texts_array([query]))[0]
+
+    def embed_texts_array(self, texts: List[str]) -> np.ndarray:
+        """Gera embeddings para lista de textos como matriz float32 (n, dim)"""
+        return self._embed(texts)
+
+    def embed_query_array(self, query: str) -> np.ndarray:
+        """Gera embedding para consulta única como vetor float32 (dim,)"""
+        return self._embed([query])[0]
+
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """Gera embeddings para lista de textos"""
-        embeddings = self.model.encode(texts, convert_to_tensor=False)
-        return embeddings.tolist()
-    
+        return self.embed_texts_array(texts).tolist()
+
     def embed_query(self, query: str) -> List[float]:
         """Gera embedding para consulta única"""
-        embedding = self.model.encode([query], convert_to_tensor=False)
-        return embedding[0].tolist()
-    
+        return self.embed_query_array(query).tolist()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Estatísticas do cache, com estimativa do tempo de encoder economizado"""
+        if self.cache is None:
+            return {"enabled": False}
+
+        stats = self.cache.stats()
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        per_text = self.encode_seconds / self.encoded_texts if self.encoded_texts else 0.0
+        return {
+            "enabled": True,
+            **stats,
+            "encode_seconds": self.encode_seconds,
+            "estimated_seconds_saved": hits * per_text
+        }
+
     @property
     def dimension(self) -> int:
         """Retorna dimensão dos embeddings"""
-        return self.model.get_sentence_embedding_dimension()
+        if self._dimension is None:
+            if self.use_service:
+                self._resolve_service_info()
+            else:
+                self._dimension = self.model.get_sentence_embedding_dimension()
+        return self._dimension
+
+    def _resolve_service_info(self):
+        """Lê o /health do serviço uma vez: define ``backend`` e ``_dimension``.
+
+        O backend informado pelo serviço (ex.: torch-int8) é o que de fato gera
+        os vetores, então é ele que entra no namespace do cache.
+        """
+        if self._dimension is not None:
+            return
+        response = self._session.get(
+            f"{settings.embedding_service_url}/health",
+            timeout=settings.embedding_service_timeout
+        )
+        response.raise_for_status()
+        self._apply_service_info(response.json())
+
+    async def adimension(self) -> int:
+        """Versão assíncrona de dimension: /health via httpx; o modelo local carrega numa thread"""
+        if self._dimension is None:
+            if self.use_service:
+                response = await self._async_client().get(f"{settings.embedding_service_url}/health")
+                response.raise_for_status()
+                self._apply_service_info(response.json())
+            else:
+                await asyncio.to_thread(lambda: self.dimension)
+        return self._dimension
+
+    def _apply_service_info(self, data: Dict[str, Any]):
+        if not data.get("model_loaded"):
+            raise RuntimeError("Serviço de embeddings ainda carregando o modelo")
+        if data.get("model") != self.model_name:
+            raise ValueError(
+                f"Serviço de embeddings serve '{data.get('model')}', "
+                f"esperado '{self.model_name}'"
+            )
+        self.backend = data.get("backend", self.backend)
+        self._dimension = data["dimension"]
+
+class EmbeddingRegistry:
+    """Registro de modelos de embedding: cada modelo é carregado uma vez, sob demanda.
+
+    Mantém no máximo ``max_resident`` modelos em memória; o menos usado é
+    descarregado ao abrir espaço para outro. O modelo padrão nunca é descartado.
+    """
+
+    def __init__(self, default: EmbeddingManager, max_resident: int = 2):
+        self.default = default
+        self.max_resident = max(1, max_resident)
+        self._managers: "OrderedDict[str, EmbeddingManager]" = OrderedDict(
+            [(default.model_name, default)]
+        )
+        self._lock = threading.Lock()
+
+    def get(self, model_name: Optional[str] = None) -> EmbeddingManager:
+        """Retorna o gerenciador do modelo, criando-o se necessário"""
+        name = model_name or self.default.model_name
+        with self._lock:
+            manager = self._managers.get(name)
+            if manager is None:
+                # O serviço de embeddings atende apenas o modelo padrão
+                manager = EmbeddingManager(
+                    model_name=name,
+                    use_service=self.default.use_service and name == settings.embedding_model_name
+                )
+                self._managers[name] = manager
+            self._managers.move_to_end(name)
+            self._evict(keep=name)
+        return manager
+
+    def _evict(self, keep: str):
+        """Descarrega os modelos menos usados além do limite"""
+        for name in list(self._managers):
+            if len(self._managers) <= self.max_resident:
+                break
+            if name in (self.default.model_name, keep):
+                continue
+            print(f"♻️ Descarregando modelo de embedding: {name}")
+            self._managers.pop(name).unload()
+
+    @property
+    def resident_models(self) -> List[str]:
+        return list(self._managers)
 
-embedding_manager = EmbeddingManager()
\ No newline at end of file
+embedding_manager = EmbeddingManager()
+embedding_registry = EmbeddingRegistry(
+    embedding_manager, max_resident=settings.embedding_max_resident_models
+)
@@ -1,7 +1,7 @@
 from typing import List, Dict, Any, Optional
 import re
 from dataclasses import dataclass
-from sentence_transformers import util
+import numpy as np
 from app.core.embeddings import embedding_manager
 
 @dataclass
@@ -35,13 +35,29 @@ class RAGEvaluator:
         self, 
         query: str,
         response: str,
-        context_docs: List[str] = None
+        context_docs: List[str] = None,
+        context_embeddings: Optional[np.ndarray] = None
     ) -> EvaluationMetrics:
-        """Avalia uma resposta RAG com múltiplas métricas"""
+        """Avalia uma resposta RAG com múltiplas métricas.
+
+        ``context_embeddings`` são os vetores (n, dim) dos trechos já trazidos
+        pela busca, no mesmo modelo do ``embedding_manager``; com eles só a
+        pergunta e a resposta passam pelo encoder.
+        """
+        context_docs = context_docs or []
+        
+        if context_embeddings is not None and len(context_embeddings) == len(context_docs):
+            embeddings = embedding_manager.embed_texts_array([query, response])
+            context_embeddings = np.asarray(context_embeddings, dtype=np.float32).reshape(len(context_docs), -1)
+        else:
+            # Um único lote no encoder para pergunta, resposta e contexto
+            embeddings = embedding_manager.embed_texts_array([query, response, *context_docs])
+            context_embeddings = embeddings[2:]
+        query_embedding, response_embedding = embeddings[0], embeddings[1]
         
-        context_relevance = self._calculate_context_relevance(query, context_docs or [])
-        answer_relevance = self._calculate_answer_relevance(query, response)
-        groundedness = self._calculate_groundedness(response, context_docs or [])
+        context_relevance = self._calculate_context_relevance(query_embedding, context_embeddings)
+        answer_relevance = self._calculate_answer_relevance(query_embedding, response_embedding, response)
+        groundedness = self._calculate_groundedness(response_embedding, context_embeddings, response)
         pii_detected = self._detect_pii(response)
         jailbreak_detected = self._detect_jailbreak(query)
         
@@ -63,46 +79,34 @@ class RAGEvaluator:
             overall_score=overall_score
         )
     
-    def _calculate_context_relevance(self, query: str, context_docs: List[str]) -> float:
+    @staticmethod
+    def _cosine_similarities(vector: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Similaridade de cosseno entre um vetor (dim,) e cada linha de uma matriz (n, dim)"""
+        matrix = np.atleast_2d(matrix)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+        return (matrix @ vector) / np.maximum(norms, 1e-12)
+    
+    def _calculate_context_relevance(self, query_embedding: np.ndarray, context_embeddings: np.ndarray) -> float:
         """Calcula relevância do contexto recuperado"""
-        if not context_docs:
+        if len(context_embeddings) == 0:
             return 0.0
         
-        query_embedding = embedding_manager.embed_query(query)
-        context_embeddings = embedding_manager.embed_texts(context_docs)
-        
-        similarities = [
-            util.cos_sim([query_embedding], [doc_emb]).item()
-            for doc_emb in context_embeddings
-        ]
-        
-        return max(similarities) if similarities else 0.0
+        return float(self._cosine_similarities(query_embedding, context_embeddings).max())
     
-    def _calculate_answer_relevance(self, query: str, response: str) -> float:
+    def _calculate_answer_relevance(self, query_embedding: np.ndarray, response_embedding: np.ndarray, response: str) -> float:
         """Calcula relevância da resposta à pergunta"""
         if not response.strip():
             return 0.0
         
-        query_embedding = embedding_manager.embed_query(query)
-        response_embedding = embedding_manager.embed_query(response)
-        
-        similarity = util.cos_sim([query_embedding], [response_embedding]).item()
+        similarity = float(self._cosine_similarities(query_embedding, response_embedding)[0])
         return max(0.0, similarity)
     
-    def _calculate_groundedness(self, response: str, context_docs: List[str]) -> float:
+    def _calculate_groundedness(self, response_embedding: np.ndarray, context_embeddings: np.ndarray, response: str) -> float:
         """Calcula quão fundamentada a resposta está no contexto"""
-        if not context_docs or not response.strip():
+        if len(context_embeddings) == 0 or not response.strip():
             return 0.0
         
-        response_embedding = embedding_manager.embed_query(response)
-        context_embeddings = embedding_manager.embed_texts(context_docs)
-        
-        similarities = [
-            util.cos_sim([response_embedding], [doc_emb]).item()
-            for doc_emb in context_embeddings
-        ]
-        
-        return max(similarities) if similarities else 0.0
+        return float(self._cosine_similarities(response_embedding, context_embeddings).max())
     
     def _detect_pii(self, text: str) -> bool:
         """Detecta informações pessoais identificáveis"""
@@ -1,7 +1,10 @@
 """Cliente para o serviço LLM via API"""
 
 import requests
-from typing import Optional
+import asyncio
+import httpx
+import weakref
+from typing import Optional, Tuple
 from app.config import settings
 
 class LLMManager:
@@ -9,6 +12,7 @@ class LLMManager:
         self.llm_url = "http://llm-service:8000"  # URL do serviço no Docker
         # Para desenvolvimento local: self.llm_url = "http://localhost:8000"
         self._initialized = False
+        self._async_clients = weakref.WeakKeyDictionary()
     
     def initialize(self):
         """Verifica se o serviço LLM está disponível"""
@@ -30,14 +34,18 @@ class LLMManager:
             print(f"⚠️ Serviço LLM não disponível: {e}")
             self._initialized = False
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Gera resposta usando o serviço LLM"""
+    def generate_response(self, query: str, context: str) -> Tuple[str, bool]:
+        """Gera resposta usando o serviço LLM; retorna (resposta, gerada pelo LLM?).
+        
+        O indicador volta junto com a resposta (False nos fallbacks): o
+        manager é compartilhado por várias sessões e threads.
+        """
         if not self._initialized:
             self.initialize()
         
         if not self._initialized:
             # Fallback sem LLM
-            return f"**Informações encontradas:**\n\n{context}\n\n_Nota: Serviço LLM não disponível. Mostrando documentos recuperados._"
+            return f"**Informações encontradas:**\n\n{context}\n\n_Nota: Serviço LLM não disponível. Mostrando documentos recuperados._", False
         
         try:
             response = requests.post(
@@ -53,14 +61,64 @@ class LLMManager:
             
             if response.status_code == 200:
                 data = response.json()
-                return data["response"]
+                return data["response"], True
             else:
                 print(f"❌ Erro na API LLM: {response.status_code}")
-                return f"Contexto recuperado:\n\n{context}"
+                return f"Contexto recuperado:\n\n{context}", False
+        
+        except Exception as e:
+            print(f"❌ Erro ao chamar serviço LLM: {e}")
+            return f"**Documentos encontrados:**\n\n{context}", False
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Um cliente HTTP por event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(timeout=30)
+        return client
+    
+    async def ainitialize(self):
+        """Versão assíncrona de initialize"""
+        if self._initialized:
+            return
+        
+        try:
+            response = await self._async_client().get(f"{self.llm_url}/health", timeout=5)
+            self._initialized = bool(response.json().get("model_loaded"))
+            if not self._initialized:
+                print("⏳ Serviço LLM ainda carregando o modelo...")
+        except Exception as e:
+            print(f"⚠️ Serviço LLM não disponível: {e}")
+            self._initialized = False
+    
+    async def agenerate_response(self, query: str, context: str) -> Tuple[str, bool]:
+        """Versão assíncrona de generate_response; retorna (resposta, gerada pelo LLM?)"""
+        if not self._initialized:
+            await self.ainitialize()
+        
+        if not self._initialized:
+            return f"**Informações encontradas:**\n\n{context}\n\n_Nota: Serviço LLM não disponível. Mostrando documentos recuperados._", False
+        
+        try:
+            response = await self._async_client().post(
+                f"{self.llm_url}/generate",
+                json={
+                    "query": query,
+                    "context": context,
+                    "max_tokens": 256,
+                    "temperature": 0.7
+                }
+            )
+            
+            if response.status_code == 200:
+                return response.json()["response"], True
+            print(f"❌ Erro na API LLM: {response.status_code}")
+            return f"Contexto recuperado:\n\n{context}", False
         
         except Exception as e:
             print(f"❌ Erro ao chamar serviço LLM: {e}")
-            return f"**Documentos encontrados:**\n\n{context}"
+            return f"**Documentos encontrados:**\n\n{context}", False
 
 # Instância global
 llm_manager = LLMManager()
\ No newline at end of file
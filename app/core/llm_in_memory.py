@@ -1,7 +1,7 @@
 """Gerenciador de LLM local usando CTransformers"""
 
 from langchain_community.llms.ctransformers import CTransformers
-from typing import Optional
+from typing import Optional, Tuple
 
 class LLMManager:
     def __init__(self):
@@ -31,13 +31,13 @@ class LLMManager:
             print("   Respostas serão baseadas apenas nos documentos recuperados")
             self.llm = None
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Gera resposta usando LLM com contexto"""
+    def generate_response(self, query: str, context: str) -> Tuple[str, bool]:
+        """Gera resposta usando LLM com contexto; retorna (resposta, gerada pelo LLM?)"""
         if not self._initialized:
             self.initialize()
         
         if self.llm is None:
-            return f"Com base nos documentos:\n\n{context}\n\nEssa informação responde sua pergunta sobre: {query}"
+            return f"Com base nos documentos:\n\n{context}\n\nEssa informação responde sua pergunta sobre: {query}", False
         
         try:
             # DEBUG: Mostrar o que está sendo enviado ao LLM
@@ -58,11 +58,11 @@ class LLMManager:
             print(response.strip())
             print("="*60)
             
-            return response.strip()
+            return response.strip(), True
         
         except Exception as e:
             print(f"❌ Erro ao gerar resposta com LLM: {e}")
-            return f"Contexto recuperado:\n\n{context}"
+            return f"Contexto recuperado:\n\n{context}", False
 
 # Instância global (singleton)
 llm_manager = LLMManager()
\ No newline at end of file
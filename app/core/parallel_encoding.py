@@ -0,0 +1,111 @@
+"""Codificação paralela de embeddings para ingestão em massa"""
+
+import multiprocessing as mp
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.embeddings import EmbeddingManager
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Modelo carregado uma vez por processo do pool
+_worker_manager: Optional[EmbeddingManager] = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata do número de tokens (palavras + pontuação)"""
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def length_buckets(texts: List[str], batch_size: int) -> List[np.ndarray]:
+    """Agrupa índices em lotes de comprimento parecido, dos mais longos aos mais curtos.
+
+    Textos de tamanho semelhante no mesmo lote reduzem o padding; começar
+    pelos lotes mais longos equilibra melhor a carga entre os workers.
+    """
+    lengths = np.fromiter((estimate_tokens(text) for text in texts), dtype=np.int64, count=len(texts))
+    order = np.argsort(-lengths, kind="stable")
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def _init_worker(model_name: str, backend: str, num_threads: int):
+    global _worker_manager
+    import torch
+    torch.set_num_threads(num_threads)
+    _worker_manager = EmbeddingManager(model_name=model_name, use_service=False, backend=backend)
+    _worker_manager.model  # carrega antes do primeiro lote
+
+
+def _encode_batch(texts: List[str]) -> Tuple[np.ndarray, int, float]:
+    start = time.perf_counter()
+    vectors = _worker_manager._encode(texts)
+    return vectors, os.getpid(), time.perf_counter() - start
+
+
+def encode_parallel(
+    manager: EmbeddingManager,
+    texts: List[str],
+    workers: int = 0,
+    batch_size: int = 64
+) -> Tuple[np.ndarray, Dict[int, Dict[str, Any]]]:
+    """Gera embeddings distribuindo lotes por um pool de processos.
+
+    Consulta o cache do ``manager`` antes e grava nele depois, então apenas
+    os textos inéditos vão para o pool. ``workers=0`` usa todos os núcleos.
+
+    Retorna a matriz (n, dim) na ordem de ``texts`` e estatísticas por worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats: Dict[int, Dict[str, Any]] = {}
+
+    cached, missing = (
+        manager.cache.get_many(texts) if manager.cache is not None
+        else ([None] * len(texts), list(range(len(texts))))
+    )
+    pending = [texts[i] for i in missing]
+
+    if pending and (workers == 1 or manager.use_service):
+        start = time.perf_counter()
+        encoded = manager._encode(pending)
+        stats[os.getpid()] = {"chunks": len(pending), "seconds": time.perf_counter() - start}
+    elif pending:
+        encoded = None
+        # Divide os núcleos entre os workers para não haver disputa de threads
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(manager.model_name, manager.backend, threads)
+        ) as pool:
+            futures = {
+                pool.submit(_encode_batch, [pending[i] for i in bucket]): bucket
+                for bucket in length_buckets(pending, batch_size)
+            }
+            for future in as_completed(futures):
+                vectors, pid, seconds = future.result()
+                if encoded is None:
+                    encoded = np.empty((len(pending), vectors.shape[1]), dtype=np.float32)
+                encoded[futures[future]] = vectors
+
+                worker = stats.setdefault(pid, {"chunks": 0, "seconds": 0.0})
+                worker["chunks"] += len(vectors)
+                worker["seconds"] += seconds
+
+    if pending:
+        if manager.cache is not None:
+            manager.cache.put_many(pending, encoded)
+        for position, i in enumerate(missing):
+            cached[i] = encoded[position]
+
+    for worker in stats.values():
+        worker["chunks_per_sec"] = worker["chunks"] / worker["seconds"] if worker["seconds"] else 0.0
+
+    if not texts:
+        return np.zeros((0, manager.dimension), dtype=np.float32), stats
+    return np.stack(cached).astype(np.float32, copy=False), stats
@@ -0,0 +1,106 @@
+"""Reranking com cross-encoder e cache de scores por (query, ponto)"""
+
+from sentence_transformers import CrossEncoder
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.core.embedding_cache import normalize_text
+import numpy as np
+import hashlib
+import threading
+import time
+
+class Reranker:
+    """Reordena candidatos da busca vetorial com um cross-encoder.
+
+    Todos os pares (query, candidato) ainda não vistos são avaliados numa
+    única chamada em lote ao modelo; os scores ficam num LRU em memória,
+    indexados pela query normalizada e pelo ID do ponto (que muda junto com
+    o conteúdo do chunk).
+    """
+
+    def __init__(self, model_name: Optional[str] = None, cache_items: Optional[int] = None):
+        self.model_name = model_name or settings.reranker_model_name
+        self.cache_items = settings.reranker_cache_items if cache_items is None else cache_items
+        self._model = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self) -> CrossEncoder:
+        """Cross-encoder carregado na primeira utilização"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    print(f"🧮 Carregando reranker: {self.model_name}")
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    @staticmethod
+    def _key(query: str, candidate: Dict[str, Any]) -> Tuple[str, str]:
+        # Sem ID (ex.: resultados externos), o próprio conteúdo identifica o candidato
+        point = candidate.get("id") or hashlib.sha256(candidate["text"].encode("utf-8")).hexdigest()
+        return normalize_text(query), point
+
+    def score(self, query: str, candidates: List[Dict[str, Any]]) -> np.ndarray:
+        """Score do cross-encoder para cada candidato (na ordem recebida)"""
+        keys = [self._key(query, candidate) for candidate in candidates]
+        scores = np.empty(len(candidates), dtype=np.float32)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+                else:
+                    missing.append(i)
+            self.hits += len(candidates) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            start = time.perf_counter()
+            predicted = self.model.predict(
+                [(query, candidates[i]["text"]) for i in missing],
+                batch_size=settings.reranker_batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            print(f"   🏅 Reranker: {len(missing)} pares em {time.perf_counter() - start:.2f}s")
+            with self._lock:
+                for i, value in zip(missing, np.asarray(predicted, dtype=np.float32).reshape(-1)):
+                    scores[i] = value
+                    self._cache[keys[i]] = float(value)
+                while len(self._cache) > self.cache_items:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """Os ``k`` melhores candidatos segundo o cross-encoder.
+
+        ``score`` passa a ser o do reranker; o da busca fica em ``retrieval_score``.
+        """
+        if not candidates:
+            return []
+        scores = self.score(query, candidates)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [
+            {**candidates[i], "score": float(scores[i]), "retrieval_score": candidates[i]["score"]}
+            for i in order
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, cached_pairs = self.hits, self.misses, len(self._cache)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "cached_pairs": cached_pairs
+        }
+
+# Instância global (o modelo só é carregado quando o reranking é usado)
+reranker = Reranker()
@@ -0,0 +1,205 @@
+"""API FastAPI para servir embeddings com micro-batching dinâmico"""
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import numpy as np
+import torch
+import asyncio
+import base64
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | torch-int8
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+
+app = FastAPI(title="Embedding Service")
+
+# Variáveis globais para o modelo e o agrupador
+model = None
+batcher = None
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+    model: Optional[str] = None
+
+class EmbedResponse(BaseModel):
+    model: str
+    dimension: int
+    count: int
+    embeddings_b64: str  # float32 little-endian, linha a linha
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes em um único lote do encoder.
+
+    Cada requisição entra numa fila; o worker espera no máximo ``max_wait_ms``
+    (ou até ``max_batch_size`` textos) antes de rodar o modelo uma vez para
+    todas. Enquanto um lote roda, as novas requisições se acumulam e formam o
+    próximo lote. Nenhuma chamada ao modelo passa de ``max_batch_size``
+    textos: uma requisição que não cabe no lote abre o próximo, e uma maior
+    que o limite é codificada em partes.
+    """
+
+    def __init__(self, encode_fn, max_batch_size: int, max_wait_ms: float):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue: Optional[asyncio.Queue] = None
+        self._carry = None  # requisição que não coube no lote anterior
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.texts = 0
+        self.requests = 0
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._worker())
+
+    async def submit(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _collect(self):
+        """Monta um lote respeitando a janela de tempo e o tamanho máximo"""
+        loop = asyncio.get_running_loop()
+        if self._carry is not None:
+            batch, self._carry = [self._carry], None
+        else:
+            batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+
+        while size < self.max_batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if size + len(item[0]) > self.max_batch_size:
+                # Não cabe: fica para o próximo lote
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+
+            chunks = [texts[start:start + self.max_batch_size] for start in range(0, len(texts), self.max_batch_size)]
+            try:
+                vectors = np.concatenate([
+                    await loop.run_in_executor(self.executor, self.encode_fn, chunk) for chunk in chunks
+                ])
+            except Exception as e:
+                logger.error(f"Erro ao gerar embeddings: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += len(chunks)
+            self.texts += len(texts)
+            self.requests += len(batch)
+
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "avg_batch_texts": self.texts / self.batches if self.batches else 0.0,
+            "avg_batch_requests": self.requests / self.batches if self.batches else 0.0,
+            "queued": self.queue.qsize() if self.queue else 0
+        }
+
+def load(name: str, backend: str) -> SentenceTransformer:
+    """Carrega o modelo no backend configurado"""
+    if backend == "torch-int8":
+        # Quantização dinâmica: pesos das camadas Linear em int8
+        return torch.quantization.quantize_dynamic(
+            SentenceTransformer(name, device="cpu"), {torch.nn.Linear},
+            dtype=torch.qint8, inplace=True
+        )
+    if backend != "torch":
+        raise ValueError(f"Backend de embedding inválido: {backend}")
+    return SentenceTransformer(name)
+
+def encode(texts: List[str]) -> np.ndarray:
+    return np.asarray(model.encode(texts, convert_to_tensor=False), dtype=np.float32)
+
+@app.on_event("startup")
+async def load_model():
+    """Carrega o modelo uma única vez na inicialização do serviço"""
+    global model, batcher
+    logger.info(f"🧮 Carregando modelo de embedding: {MODEL_NAME} ({BACKEND})")
+    model = load(MODEL_NAME, BACKEND)
+    batcher = MicroBatcher(encode, MAX_BATCH_SIZE, MAX_WAIT_MS)
+    batcher.start()
+    logger.info("✅ Modelo de embedding carregado!")
+
+@app.get("/health")
+async def health_check():
+    """Verifica se o serviço está pronto"""
+    return {
+        "status": "healthy",
+        "model_loaded": model is not None,
+        "model": MODEL_NAME,
+        "backend": BACKEND,
+        "dimension": model.get_sentence_embedding_dimension() if model else None
+    }
+
+@app.get("/stats")
+async def stats():
+    """Estatísticas do micro-batching"""
+    return batcher.stats() if batcher else {}
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed(request: EmbedRequest):
+    """Gera embeddings para uma lista de textos"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model not loaded yet")
+
+    if request.model and request.model != MODEL_NAME:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Service serves '{MODEL_NAME}', not '{request.model}'"
+        )
+
+    start = time.perf_counter()
+    vectors = await batcher.submit(request.texts) if request.texts else np.zeros(
+        (0, model.get_sentence_embedding_dimension()), dtype=np.float32
+    )
+    logger.debug(f"{len(request.texts)} textos em {time.perf_counter() - start:.3f}s")
+
+    return EmbedResponse(
+        model=MODEL_NAME,
+        dimension=vectors.shape[1],
+        count=vectors.shape[0],
+        embeddings_b64=base64.b64encode(
+            np.ascontiguousarray(vectors, dtype="<f4").tobytes()
+        ).decode("ascii")
+    )
@@ -4,6 +4,10 @@ from agents.rag_agent import RAGAgent
 from agents.search_agent import SearchAgent
 from agents.weather_agent import WeatherAgent
 from agents.base import AgentResponse
+from tools.schemas import RetrievedDocument
+from app.config import settings
+from graph.speculative import HedgeBudget, background_loop, race
+from graph.semantic_router import semantic_router
 import re
 
 @dataclass
@@ -14,10 +18,13 @@ class WorkflowState:
     confidence: float = 0.0
     tool_calls: List[Dict[str, Any]] = None
     context: Dict[str, Any] = None
+    documents: List[RetrievedDocument] = None
     
     def __post_init__(self):
         if self.tool_calls is None:
             self.tool_calls = []
+        if self.documents is None:
+            self.documents = []
         if self.context is None:
             self.context = {}
 
@@ -26,12 +33,21 @@ class WorkflowNodes:
         self.rag_agent = RAGAgent()
         self.search_agent = SearchAgent()
         self.weather_agent = WeatherAgent()
+        self.hedge_budget = HedgeBudget(settings.speculative_budget, settings.speculative_burst)
     
     def classifier_node(self, state: WorkflowState) -> WorkflowState:
         """Classifica a consulta e determina qual agent usar"""
         query_lower = state.query.lower()
         
-        # Padrões para classificação
+        # Intenção por embeddings; o embedding da consulta segue para a busca do RAG
+        decision = semantic_router.try_classify(state.query, state.context.get("embedding_model"))
+        if decision is not None:
+            state.context["query_embedding"] = decision.embedding
+            if decision.intent:
+                state.context["selected_agent"] = decision.intent
+                return state
+        
+        # Sem intenção clara: padrões para classificação
         weather_patterns = ["tempo", "clima", "weather", "temperatura", "chuva", "sol"]
         web_search_patterns = ["notícias", "atual", "hoje", "recente", "último", "buscar"]
         
@@ -39,6 +55,9 @@ class WorkflowNodes:
             state.context["selected_agent"] = "weather"
         elif any(pattern in query_lower for pattern in web_search_patterns):
             state.context["selected_agent"] = "search"
+        elif state.context.get("speculative", settings.speculative_enabled):
+            # Sem sinal claro: RAG e busca web correm em paralelo
+            state.context["selected_agent"] = "speculative"
         else:
             state.context["selected_agent"] = "rag"
         
@@ -59,9 +78,29 @@ class WorkflowNodes:
         response = self.weather_agent.process(state.query, state.context)
         return self._update_state_with_response(state, response, "weather")
     
+    def speculative_node(self, state: WorkflowState) -> WorkflowState:
+        """RAG e busca web em paralelo: a primeira resposta confiável vence e a outra é cancelada"""
+        # Loop compartilhado entre consultas: os pools de conexão dos agents são reaproveitados
+        result = background_loop.run(race(
+            "rag", lambda: self.rag_agent.aprocess(state.query, state.context),
+            "search", lambda: self.search_agent.aprocess(state.query, state.context),
+            confidence=settings.workflow_min_confidence,
+            delay=settings.speculative_hedge_delay,
+            budget=self.hedge_budget
+        ))
+        print(f"   🏁 Especulativo: {result.winner} venceu em {result.seconds:.2f}s"
+              + (f" (cancelado: {', '.join(result.cancelled)})" if result.cancelled else ""))
+        
+        # Com o hedge já executado, o fallback não repete a busca web
+        state.context["hedged"] = result.hedged
+        state = self._update_state_with_response(state, result.response, result.winner)
+        state.tool_calls.append({"tool": "speculative", "winner": result.winner, "hedged": result.hedged,
+                                 "cancelled": result.cancelled, "seconds": round(result.seconds, 3)})
+        return state
+    
     def fallback_node(self, state: WorkflowState) -> WorkflowState:
         """Node de fallback quando outros falham"""
-        if state.confidence < 0.5:
+        if state.confidence < settings.workflow_min_confidence and not state.context.get("hedged"):
             # Tenta busca na web como fallback
             response = self.search_agent.process(state.query, state.context)
             return self._update_state_with_response(state, response, "search_fallback")
@@ -79,4 +118,5 @@ class WorkflowNodes:
         state.agent_used = agent_name
         state.confidence = response.confidence
         state.tool_calls.extend(response.tool_calls)
+        state.documents = response.documents
         return state
\ No newline at end of file
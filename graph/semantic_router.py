@@ -0,0 +1,143 @@
+"""Roteamento por intenção com embeddings.
+
+Cada intenção tem um centróide: a média (normalizada) dos embeddings de
+consultas de exemplo, calculada uma vez por modelo. Classificar uma
+consulta custa um embedding e um produto matriz-vetor; o mesmo embedding
+segue no contexto (``query_embedding``) para a busca vetorial.
+
+Quando a melhor intenção não se destaca da segunda por ``margin`` (ou a
+similaridade é baixa), ``intent`` fica ``None`` e quem chamou usa as regras
+por palavra-chave.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from app.config import settings
+from app.core.embeddings import embedding_registry
+import numpy as np
+import threading
+import time
+
+RETRY_AFTER = 60.0  # segundos sem tentar o roteador depois de uma falha do modelo
+
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "weather": [
+        "Como está o tempo em São Paulo?",
+        "Qual a temperatura agora no Rio de Janeiro?",
+        "Vai chover hoje em Curitiba?",
+        "Previsão do tempo para Recife",
+        "Está fazendo calor em Salvador?",
+        "Quantos graus está fazendo em Porto Alegre?",
+        "Clima em Belo Horizonte",
+        "What's the weather like in London?",
+    ],
+    "search": [
+        "Quais as últimas notícias sobre inteligência artificial?",
+        "Pesquise na internet sobre o lançamento do novo iPhone",
+        "Notícias de hoje sobre economia",
+        "Quem ganhou o jogo de ontem?",
+        "Busque na web o preço atual do dólar",
+        "O que aconteceu recentemente com a bolsa de valores?",
+        "Latest news about electric cars",
+        "Procure no Google informações sobre a eleição",
+    ],
+    "rag": [
+        "O que é RAG?",
+        "Como funcionam os embeddings?",
+        "Explique o que é um banco de dados vetorial",
+        "Qual a diferença entre busca densa e BM25?",
+        "Como o sistema divide os documentos em chunks?",
+        "Para que serve o reranker?",
+        "Como configurar o Qdrant no projeto?",
+        "What is retrieval augmented generation?",
+    ],
+}
+
+@dataclass
+class RouteDecision:
+    intent: Optional[str]  # None: abaixo da margem, usar as regras por palavra-chave
+    score: float
+    margin: float
+    scores: Dict[str, float]
+    embedding: np.ndarray  # embedding da consulta (modelo da busca), reaproveitável
+
+class SemanticRouter:
+    def __init__(
+        self,
+        examples: Optional[Dict[str, List[str]]] = None,
+        margin: Optional[float] = None,
+        min_score: Optional[float] = None,
+        registry=None
+    ):
+        self.examples = examples or INTENT_EXAMPLES
+        self.intents = list(self.examples)
+        self.margin = settings.semantic_router_margin if margin is None else margin
+        self.min_score = settings.semantic_router_min_score if min_score is None else min_score
+        self.registry = registry or embedding_registry
+        self._centroids: Dict[str, np.ndarray] = {}  # namespace do modelo -> (intenções, dim)
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def centroids(self, model_name: Optional[str] = None) -> np.ndarray:
+        """Matriz de centróides do modelo (calculada na primeira chamada)"""
+        manager = self.registry.get(model_name)
+        key = manager.cache_namespace
+        with self._lock:
+            if key not in self._centroids:
+                texts = [text for intent in self.intents for text in self.examples[intent]]
+                vectors = _normalize(manager.embed_texts_array(texts))
+                rows, start = [], 0
+                for intent in self.intents:
+                    end = start + len(self.examples[intent])
+                    rows.append(vectors[start:end].mean(axis=0))
+                    start = end
+                self._centroids[key] = _normalize(np.stack(rows))
+                print(f"🧭 Centróides de intenção prontos ({', '.join(self.intents)})")
+            return self._centroids[key]
+
+    def warmup(self, model_name: Optional[str] = None):
+        """Calcula os centróides na inicialização (evita o custo na primeira consulta)"""
+        if not settings.semantic_router_enabled:
+            return
+        try:
+            self.centroids(model_name)
+        except Exception as e:
+            print(f"⚠️ Roteador semântico indisponível ({e}); usando palavras-chave")
+            self._retry_at = time.monotonic() + RETRY_AFTER
+
+    def classify(self, query: str, model_name: Optional[str] = None,
+                 embedding: Optional[np.ndarray] = None) -> RouteDecision:
+        centroids = self.centroids(model_name)
+        if embedding is None:
+            embedding = self.registry.get(model_name).embed_query_array(query)
+        scores = centroids @ _normalize(np.asarray(embedding, dtype=np.float32))
+
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        margin = best - float(scores[order[1]]) if len(order) > 1 else best
+        intent = self.intents[order[0]] if best >= self.min_score and margin >= self.margin else None
+        return RouteDecision(
+            intent=intent,
+            score=best,
+            margin=margin,
+            scores={name: float(score) for name, score in zip(self.intents, scores)},
+            embedding=embedding
+        )
+
+    def try_classify(self, query: str, model_name: Optional[str] = None) -> Optional[RouteDecision]:
+        """``classify``, ou None com o roteador desligado ou o modelo indisponível"""
+        if not settings.semantic_router_enabled or time.monotonic() < self._retry_at:
+            return None
+        try:
+            return self.classify(query, model_name)
+        except Exception as e:
+            print(f"⚠️ Roteador semântico indisponível ({e}); usando palavras-chave")
+            self._retry_at = time.monotonic() + RETRY_AFTER
+            return None
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+# Instância global
+semantic_router = SemanticRouter()
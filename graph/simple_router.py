@@ -1,19 +1,52 @@
 """Router simples sem LangGraph - mais confiável"""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from agents.base import AgentResponse, BaseAgent
 from agents.rag_agent import RAGAgent
 from agents.search_agent import SearchAgent
 from agents.weather_agent import WeatherAgent
+from graph.semantic_router import semantic_router
+import numpy as np
+import asyncio
 
 class SimpleRouter:
     def __init__(self):
         self.rag_agent = RAGAgent()
         self.search_agent = SearchAgent()
         self.weather_agent = WeatherAgent()
+        self.agents = {"rag": self.rag_agent, "search": self.search_agent, "weather": self.weather_agent}
+        # Centróides de intenção calculados na inicialização
+        semantic_router.warmup()
     
     def process_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Processa query escolhendo o agent correto"""
-        
+        agent, agent_name, query_embedding = self._route(query, context)
+        response = agent.process(query, self._agent_context(context, query_embedding))
+        return self._result(query, agent_name, response)
+    
+    async def aprocess_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Versão assíncrona de process_query: várias conversas no mesmo event loop"""
+        # O embedding da consulta (roteamento) é CPU ou HTTP síncrono: roda numa thread
+        agent, agent_name, query_embedding = await asyncio.to_thread(self._route, query, context)
+        response = await agent.aprocess(query, self._agent_context(context, query_embedding))
+        return self._result(query, agent_name, response)
+    
+    def _agent_context(self, context: Dict[str, Any] = None,
+                       query_embedding: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Parâmetros do sidebar (e o embedding do roteamento) repassados aos agents"""
+        return {
+            'max_results': context.get('max_results', 5) if context else 5,
+            'confidence_threshold': context.get('confidence_threshold', 0.3) if context else 0.3,
+            'embedding_model': context.get('embedding_model') if context else None,
+            'use_reranker': context.get('use_reranker') if context else None,
+            'use_mmr': context.get('use_mmr') if context else None,
+            'mmr_lambda': context.get('mmr_lambda') if context else None,
+            'use_answer_cache': context.get('use_answer_cache') if context else None,
+            'query_embedding': query_embedding
+        }
+    
+    def _route(self, query: str, context: Dict[str, Any] = None) -> Tuple[BaseAgent, str, Optional[np.ndarray]]:
+        """Escolhe o agent pela intenção da consulta; sem intenção clara, pelas palavras-chave"""
         query_lower = query.lower()
         
         # Extrair parâmetros do contexto (vindo do sidebar)
@@ -22,12 +55,13 @@ class SimpleRouter:
 
         print(f"\n🔍 ROUTER: Processando query: {query} ")
         print(f"\n k={max_results}, threshold={confidence_threshold}")
-
-        # Passa os parâmetros para o contexto dos agents
-        agent_context = {
-            'max_results': max_results,
-            'confidence_threshold': confidence_threshold
-        }
+        
+        # 0. Intenção por embeddings (mesmo modelo da busca: o embedding segue para o RAG)
+        decision = semantic_router.try_classify(query, context.get('embedding_model') if context else None)
+        query_embedding = decision.embedding if decision else None
+        if decision and decision.intent:
+            print(f"   → Intenção: {decision.intent.upper()} (score={decision.score:.2f}, margem={decision.margin:.2f})")
+            return self.agents[decision.intent], decision.intent, query_embedding
             
         # 1. Weather Agent
         weather_keywords = [ "tempo", "clima", "weather", "temperatura", "chuva", 
@@ -35,22 +69,19 @@ class SimpleRouter:
         
         if any(kw in query_lower for kw in weather_keywords):
             print(f"   → Escolhido: WEATHER AGENT")
-            response = self.weather_agent.process(query, agent_context)
-            agent_name = "weather"
+            return self.weather_agent, "weather", query_embedding
         
         # 2. Search Agent
-        elif any(kw in query_lower for kw in ["notícia", "noticia", "news", "buscar na web", "pesquisar", "google", "atual",
-                                              "bbusca na web", "pesquisa na web", "pesquisa na internet"]):
+        if any(kw in query_lower for kw in ["notícia", "noticia", "news", "buscar na web", "pesquisar", "google", "atual",
+                                            "bbusca na web", "pesquisa na web", "pesquisa na internet"]):
             print(f"   → Escolhido: SEARCH AGENT")
-            response = self.search_agent.process(query, agent_context)
-            agent_name = "search"
+            return self.search_agent, "search", query_embedding
         
         # 3. RAG Agent (padrão)
-        else:
-            print(f"   → Escolhido: RAG AGENT")
-            response = self.rag_agent.process(query, agent_context)
-            agent_name = "rag"
-        
+        print(f"   → Escolhido: RAG AGENT")
+        return self.rag_agent, "rag", query_embedding
+    
+    def _result(self, query: str, agent_name: str, response: AgentResponse) -> Dict[str, Any]:
         print(f"   ✅ Response: {response.content[:100]}...")
         
         return {
@@ -58,6 +89,7 @@ class SimpleRouter:
             "agent_used": agent_name,
             "confidence": response.confidence,
             "tool_calls": response.tool_calls,
+            "documents": response.documents,
             "query": query
         }
 
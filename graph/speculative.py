@@ -0,0 +1,132 @@
+"""Execução especulativa (hedging) de dois agents para consultas ambíguas.
+
+O agent principal começa na hora; o alternativo (hedge) começa depois de
+``delay`` segundos se o principal ainda não tiver uma resposta boa. A
+primeira resposta com confiança acima do limite vence e a outra tarefa é
+cancelada. ``HedgeBudget`` limita quantas consultas disparam o hedge.
+
+As corridas rodam num event loop de longa duração (``background_loop``):
+os clientes criados por loop (httpx, Qdrant, LLM) e seus pools de conexão
+são reaproveitados entre consultas, em vez de recriados a cada uma.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+from agents.base import AgentResponse
+import asyncio
+import threading
+import time
+
+class HedgeBudget:
+    """Balde de fichas: cada consulta elegível credita ``ratio`` fichas e cada hedge gasta uma.
+
+    ``ratio=1.0`` permite hedge em todas as consultas; ``0.1`` em no máximo
+    ~10% delas (com rajadas de até ``burst``).
+    """
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def credit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+class BackgroundLoop:
+    """Event loop numa thread daemon, iniciado no primeiro uso e mantido pelo processo todo"""
+
+    def __init__(self, name: str = "speculative-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coroutine: Coroutine[Any, Any, Any]) -> Any:
+        """Executa a corrotina no loop e espera o resultado (chamado de código síncrono)"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+@dataclass
+class RaceResult:
+    winner: str
+    response: AgentResponse
+    hedged: bool  # o agent alternativo chegou a rodar
+    cancelled: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+def _settle(task: asyncio.Task) -> AgentResponse:
+    """Resultado da tarefa; erros viram resposta de confiança zero"""
+    try:
+        return task.result()
+    except Exception as e:
+        return AgentResponse(content=f"Erro: {e}", confidence=0.0)
+
+async def race(
+    primary: str,
+    primary_fn: Callable[[], Awaitable[AgentResponse]],
+    hedge: str,
+    hedge_fn: Callable[[], Awaitable[AgentResponse]],
+    confidence: float,
+    delay: float,
+    budget: Optional[HedgeBudget] = None
+) -> RaceResult:
+    """Roda ``primary`` e, se preciso, ``hedge``; devolve a primeira resposta com confiança >= ``confidence``.
+
+    Sem resposta boa, vence a de maior confiança (o principal em caso de
+    empate). Sem fichas no orçamento, só o principal roda.
+    """
+    start = time.perf_counter()
+    names: Dict[asyncio.Task, str] = {asyncio.ensure_future(primary_fn()): primary}
+    responses: Dict[str, AgentResponse] = {}
+    if budget is not None:
+        budget.credit()
+
+    pending = set(names)
+    hedged = False   # o hedge foi disparado
+    decided = False  # já se decidiu sobre o hedge (disparado ou negado pelo orçamento)
+    while pending:
+        # Antes da decisão, espera o principal só até o atraso configurado
+        timeout = None if decided else max(0.0, delay - (time.perf_counter() - start))
+        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+        for task in done:
+            response = _settle(task)
+            responses[names[task]] = response
+            if response.confidence >= confidence:
+                for other in pending:
+                    other.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                return RaceResult(names[task], response, hedged, [names[other] for other in pending],
+                                  time.perf_counter() - start)
+
+        if not decided:
+            # Principal lento ou fraco: dispara o hedge se o orçamento deixar
+            decided = True
+            if budget is None or budget.try_spend():
+                hedged = True
+                task = asyncio.ensure_future(hedge_fn())
+                names[task] = hedge
+                pending.add(task)
+
+    ranked = [name for name in (primary, hedge) if name in responses]
+    winner = max(ranked, key=lambda name: responses[name].confidence)
+    return RaceResult(winner, responses[winner], hedged, [], time.perf_counter() - start)
+
+# Instância global
+background_loop = BackgroundLoop()
@@ -1,6 +1,7 @@
 from langgraph.graph import Graph, END
 from graph.nodes import WorkflowNodes, WorkflowState
 from typing import Dict, Any
+from app.config import settings
 
 class RAGWorkflow:
     def __init__(self):
@@ -16,6 +17,7 @@ class RAGWorkflow:
         workflow.add_node("rag", self.nodes.rag_node)
         workflow.add_node("search", self.nodes.search_node)
         workflow.add_node("weather", self.nodes.weather_node)
+        workflow.add_node("speculative", self.nodes.speculative_node)
         workflow.add_node("fallback", self.nodes.fallback_node)
         
         # Define entrada
@@ -32,18 +34,20 @@ class RAGWorkflow:
             {
                 "rag": "rag",
                 "search": "search",
-                "weather": "weather"
+                "weather": "weather",
+                "speculative": "speculative"
             }
         )
         
         # Define edges condicionais para fallback
         def should_fallback(state: WorkflowState) -> str:
-            if state.confidence < 0.5:
+            # No modo especulativo a busca web já rodou (a menos que o orçamento tenha negado)
+            if state.confidence < settings.workflow_min_confidence and not state.context.get("hedged"):
                 return "fallback"
             return END
         
         # Conecta todos os agents ao sistema de fallback
-        for node_name in ["rag", "search", "weather"]:
+        for node_name in ["rag", "search", "weather", "speculative"]:
             workflow.add_conditional_edges(
                 node_name,
                 should_fallback,
@@ -60,9 +64,10 @@ class RAGWorkflow:
     
     def process_query(self, query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Processa uma consulta através do workflow"""
+        # Cópia: os nós anotam o contexto (agent escolhido, hedge) a cada consulta
         initial_state = WorkflowState(
             query=query,
-            context=context or {}
+            context=dict(context or {})
         )
         
         # Executa o workflow
@@ -73,6 +78,7 @@ class RAGWorkflow:
             "agent_used": result.agent_used,
             "confidence": result.confidence,
             "tool_calls": result.tool_calls,
+            "documents": result.documents,
             "query": result.query
         }
 
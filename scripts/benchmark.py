@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Benchmarks de desempenho do RAG Assistant"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import statistics
+import tracemalloc
+import uuid
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Benchmarks medem o encoder, não o cache
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+
+# Adiciona path do projeto
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from app.config import settings
+from app.core.embeddings import EmbeddingManager
+
+def rss_mb() -> float:
+    """Pico de memória residente do processo (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def bench_service(args):
+    """Throughput de embed_query concorrente: modelo local vs serviço com micro-batching"""
+    manager = EmbeddingManager(use_service=args.mode == "service")
+    manager.embed_query("aquecimento")  # carrega o modelo / abre a conexão
+
+    latencies = []
+
+    def worker(worker_id: int):
+        for i in range(args.requests):
+            start = time.perf_counter()
+            manager.embed_query(f"consulta {worker_id}-{i}: o que é RAG e como funciona?")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(worker, range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    total = args.concurrency * args.requests
+    latencies.sort()
+    print(f"📊 Modo: {args.mode} | concorrência: {args.concurrency}")
+    print(f"   Consultas: {total} em {elapsed:.2f}s → {total / elapsed:.1f} consultas/s")
+    print(f"   Latência p50: {statistics.median(latencies) * 1000:.1f} ms | "
+          f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"   RSS (pico): {rss_mb():.0f} MB")
+
+def measure(label: str, fn):
+    """Executa fn medindo tempo e pico de alocação (tracemalloc, em execução separada)"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"   {label:<32} {elapsed * 1000:>9.1f} ms   pico {peak / 1024 / 1024:>8.1f} MB")
+    return elapsed, peak
+
+def bench_numpy_path(args):
+    """Caminho de embeddings com listas Python vs NumPy (ingestão e avaliação)"""
+    from qdrant_client.http import models
+    from qdrant_client.http.models import PointStruct
+    from app.core.evaluation import RAGEvaluator
+
+    rng = np.random.default_rng(0)
+    # Saída simulada do encoder: isola o custo de conversão do custo do modelo
+    embeddings = rng.standard_normal((args.chunks, args.dim), dtype=np.float32)
+    texts = [f"chunk {i}" for i in range(args.chunks)]
+    payloads = [{"text": text, "chunk_id": i} for i, text in enumerate(texts)]
+    batch_size = settings.qdrant_upsert_batch_size
+
+    def legacy_ingest():
+        vectors = embeddings.tolist()
+        points = [
+            PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload)
+            for vector, payload in zip(vectors, payloads)
+        ]
+        return len(points)
+
+    def numpy_ingest():
+        for start in range(0, args.chunks, batch_size):
+            end = start + batch_size
+            models.Batch(
+                ids=[str(uuid.uuid4()) for _ in range(start, min(end, args.chunks))],
+                vectors=embeddings[start:end].tolist(),
+                payloads=payloads[start:end]
+            )
+
+    query = embeddings[0]
+    contexts = embeddings[:args.eval_docs]
+
+    def legacy_eval():
+        from sentence_transformers import util
+        query_list, context_lists = query.tolist(), contexts.tolist()
+        return max(util.cos_sim([query_list], [doc]).item() for doc in context_lists)
+
+    def numpy_eval():
+        return float(RAGEvaluator._cosine_similarities(query, contexts).max())
+
+    print(f"📊 Ingestão: {args.chunks} chunks x {args.dim} dims (lotes de {batch_size})")
+    before = measure("listas + PointStruct", legacy_ingest)
+    after = measure("ndarray + models.Batch", numpy_ingest)
+    print(f"   → {before[0] / after[0]:.1f}x mais rápido, {before[1] / max(after[1], 1):.1f}x menos memória")
+
+    print(f"\n📊 Avaliação: similaridade com {len(contexts)} documentos")
+    before = measure("cos_sim par a par", legacy_eval)
+    after = measure("produto matricial NumPy", numpy_eval)
+    print(f"   → {before[0] / after[0]:.1f}x mais rápido, {before[1] / max(after[1], 1):.1f}x menos memória")
+
+SAMPLE_CORPUS = [
+    "RAG (Retrieval-Augmented Generation) combina busca de informações com geração de texto.",
+    "O Qdrant armazena embeddings e executa busca por similaridade vetorial.",
+    "Embeddings são representações numéricas de textos em um espaço vetorial.",
+    "O agente de clima consulta a API do OpenWeatherMap para uma cidade.",
+    "A busca na web usa o DuckDuckGo para obter informações atualizadas.",
+    "O PostgreSQL guarda dados estruturados como produtos, preços e estoque.",
+    "Groundedness mede o quanto a resposta está fundamentada no contexto.",
+    "Detecção de PII identifica e-mails, telefones e documentos pessoais.",
+]
+
+def load_corpus(directory: str, chunk_words: int = 120):
+    """Lê arquivos .txt/.md de um diretório e divide em chunks de palavras"""
+    chunks = []
+    for path in sorted(Path(directory).rglob("*")):
+        if path.suffix.lower() in {".txt", ".md"}:
+            words = path.read_text(encoding="utf-8", errors="ignore").split()
+            chunks.extend(
+                " ".join(words[i:i + chunk_words]) for i in range(0, len(words), chunk_words)
+            )
+    return [chunk for chunk in chunks if chunk.strip()]
+
+def bench_backend(args):
+    """Velocidade e concordância de um backend de embedding contra o fp32"""
+    corpus = load_corpus(args.corpus) if args.corpus else SAMPLE_CORPUS
+    corpus = corpus[:args.max_chunks]
+    if not corpus:
+        print("❌ Corpus vazio")
+        sys.exit(1)
+
+    reference = EmbeddingManager(use_service=False, backend="torch")
+    candidate = EmbeddingManager(use_service=False, backend=args.backend)
+
+    timings = {}
+    vectors = {}
+    for name, manager in (("torch", reference), (args.backend, candidate)):
+        manager.embed_texts_array(corpus[:8])  # aquecimento
+        start = time.perf_counter()
+        vectors[name] = manager.embed_texts_array(corpus)
+        timings[name] = time.perf_counter() - start
+
+    ref = vectors["torch"] / np.linalg.norm(vectors["torch"], axis=1, keepdims=True)
+    cand = vectors[args.backend] / np.linalg.norm(vectors[args.backend], axis=1, keepdims=True)
+    agreement = np.sum(ref * cand, axis=1)
+
+    # Recuperação: cada chunk como consulta, compara o top-k dos dois backends
+    k = min(args.k, len(corpus) - 1) or 1
+    ref_topk = np.argsort(-(ref @ ref.T), axis=1)[:, 1:k + 1]
+    cand_topk = np.argsort(-(cand @ cand.T), axis=1)[:, 1:k + 1]
+    overlap = np.mean([
+        len(set(a) & set(b)) / k for a, b in zip(ref_topk, cand_topk)
+    ])
+
+    print(f"📊 Backend {args.backend} vs torch (fp32) em {len(corpus)} chunks")
+    print(f"   Tempo fp32: {timings['torch']:.2f}s | {args.backend}: {timings[args.backend]:.2f}s "
+          f"→ {timings['torch'] / timings[args.backend]:.2f}x")
+    print(f"   Cosseno fp32 x {args.backend}: média {agreement.mean():.4f} | "
+          f"mín {agreement.min():.4f} | p5 {np.percentile(agreement, 5):.4f}")
+    print(f"   Sobreposição top-{k}: {overlap:.1%}")
+
+    if agreement.mean() < args.min_cosine:
+        print(f"❌ Concordância abaixo do mínimo ({args.min_cosine})")
+        sys.exit(1)
+    print("✅ Concordância dentro do limite")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do RAG Assistant")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    service = subparsers.add_parser("service", help="Embeddings concorrentes: local vs serviço")
+    service.add_argument("--mode", choices=["local", "service"], default="service")
+    service.add_argument("--concurrency", type=int, default=16, help="Threads simultâneas")
+    service.add_argument("--requests", type=int, default=50, help="Consultas por thread")
+    service.set_defaults(func=bench_service)
+
+    numpy_path = subparsers.add_parser("numpy-path", help="Listas Python vs NumPy no caminho de embeddings")
+    numpy_path.add_argument("--chunks", type=int, default=50000, help="Chunks no corpus sintético")
+    numpy_path.add_argument("--dim", type=int, default=384, help="Dimensão dos embeddings")
+    numpy_path.add_argument("--eval-docs", type=int, default=5000, help="Documentos na avaliação")
+    numpy_path.set_defaults(func=bench_numpy_path)
+
+    backend = subparsers.add_parser("backend", help="Velocidade e concordância de um backend vs fp32")
+    backend.add_argument("--backend", default="torch-int8", help="Backend a comparar com o fp32")
+    backend.add_argument("--corpus", default=None, help="Diretório com .txt/.md (padrão: amostra embutida)")
+    backend.add_argument("--max-chunks", type=int, default=2000, help="Máximo de chunks avaliados")
+    backend.add_argument("-k", type=int, default=5, help="Top-k para a sobreposição de recuperação")
+    backend.add_argument("--min-cosine", type=float, default=0.99, help="Cosseno médio mínimo aceito")
+    backend.set_defaults(func=bench_backend)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
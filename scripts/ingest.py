@@ -4,6 +4,7 @@
 import os
 import sys
 import argparse
+import time
 from pathlib import Path
 from typing import List
 import PyPDF2
@@ -13,15 +14,26 @@ from bs4 import BeautifulSoup
 # Adiciona path do projeto
 sys.path.append(str(Path(__file__).parent.parent))
 
-from vector_db.qdrant_client import qdrant_manager
-from app.core.embeddings import embedding_manager
+from app.core.embeddings import embedding_registry
+from app.core.parallel_encoding import encode_parallel
 
 class DocumentIngester:
-    def __init__(self):
+    def __init__(self, workers: int = 0, batch_size: int = 64, model_name: str = None,
+                 chunk_size: int = 500, overlap: int = 50):
+        """``workers``: processos de encoding (0 = todos os núcleos, 1 = sem pool)"""
         self.supported_formats = {'.txt', '.pdf', '.docx', '.html', '.md'}
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.workers = workers
+        self.batch_size = batch_size
+        self.model_name = model_name
     
-    def ingest_directory(self, directory_path: str):
-        """Ingere todos os documentos de um diretório"""
+    def ingest_directory(self, directory_path: str, rebuild: bool = False, verify_queries: List[str] = None):
+        """Ingere todos os documentos de um diretório.
+
+        Com ``rebuild``, monta uma nova versão da collection e só troca o
+        alias servido depois de verificá-la (ver vector_db.reindex).
+        """
         directory = Path(directory_path)
         
         if not directory.exists():
@@ -37,7 +49,7 @@ class DocumentIngester:
                     content = self._extract_text(file_path)
                     if content.strip():
                         # Divide em chunks
-                        chunks = self._chunk_text(content, chunk_size=500, overlap=50)
+                        chunks = self._chunk_text(content, chunk_size=self.chunk_size, overlap=self.overlap)
                         
                         for i, chunk in enumerate(chunks):
                             documents.append(chunk)
@@ -53,13 +65,59 @@ class DocumentIngester:
                 except Exception as e:
                     print(f"Erro ao processar {file_path}: {e}")
         
-        if documents:
-            print(f"\nIngerindo {len(documents)} chunks...")
-            qdrant_manager.add_documents(documents, metadatas)
+        if documents and rebuild:
+            from vector_db.qdrant_client import get_qdrant_manager
+            from vector_db.reindex import rebuild as rebuild_index
+            
+            store = get_qdrant_manager(self.model_name)
+            if not hasattr(store, "client"):
+                print("A reindexação blue/green requer VECTOR_BACKEND=qdrant.")
+                return
+            rebuild_index(store.client, documents, metadatas, model_name=self.model_name,
+                          alias=store.collection_name, embed_fn=self._encode, queries=verify_queries)
+            print("Reindexação concluída!")
+        elif documents:
+            # Importado aqui: os workers do pool reimportam este script e não devem conectar ao Qdrant
+            from vector_db.qdrant_client import get_qdrant_manager
+            from vector_db.points import point_id
+            from vector_db.sparse_index import get_sparse_index
+            
+            store = get_qdrant_manager(self.model_name)
+            print(f"\nIngerindo {len(documents)} chunks em '{store.collection_name}'...")
+            # Só os chunks ainda não indexados passam pelo encoder
+            store.add_documents(documents, metadatas, embed_fn=self._encode)
+            
+            # Descarta chunks de versões anteriores dos arquivos reingeridos
+            keep = {}
+            for document, metadata in zip(documents, metadatas):
+                keep.setdefault(metadata['source'], []).append(point_id(document, metadata))
+            store.remove_stale(keep)
+            
+            # Índice BM25 da mesma collection, usado pela busca híbrida
+            sparse = get_sparse_index(store.collection_name)
+            sparse.add([point_id(d, m) for d, m in zip(documents, metadatas)], documents, metadatas)
+            sparse.remove_stale(keep)
+            sparse.save()
+            print(f"Índice BM25 atualizado ({len(sparse)} chunks)")
             print("Ingestão concluída!")
         else:
             print("Nenhum documento válido encontrado.")
     
+    def _encode(self, documents: List[str]):
+        """Gera embeddings em paralelo, com lotes agrupados por comprimento"""
+        start = time.perf_counter()
+        embeddings, stats = encode_parallel(
+            embedding_registry.get(self.model_name), documents, workers=self.workers, batch_size=self.batch_size
+        )
+        elapsed = time.perf_counter() - start
+        
+        for pid, worker in sorted(stats.items()):
+            print(f"   Worker {pid}: {worker['chunks']} chunks, {worker['chunks_per_sec']:.1f} chunks/s")
+        print(f"   Encoding: {len(documents)} chunks em {elapsed:.1f}s "
+              f"({len(documents) / elapsed if elapsed else 0:.1f} chunks/s)")
+        
+        return embeddings
+    
     def _extract_text(self, file_path: Path) -> str:
         """Extrai texto de diferentes formatos de arquivo"""
         suffix = file_path.suffix.lower()
@@ -124,11 +182,19 @@ def main():
     parser.add_argument("directory", help="Diretório contendo documentos para ingestão")
     parser.add_argument("--chunk-size", type=int, default=500, help="Tamanho dos chunks")
     parser.add_argument("--overlap", type=int, default=50, help="Overlap entre chunks")
+    parser.add_argument("--workers", type=int, default=0, help="Processos de encoding (0 = todos os núcleos)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks por lote de encoding")
+    parser.add_argument("--model", default=None, help="Modelo de embedding (padrão: EMBEDDING_MODEL_NAME)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Reconstrói o índice numa nova versão e troca o alias sem downtime")
+    parser.add_argument("--verify-query", action="append", default=[],
+                        help="Query que deve retornar resultados antes da troca do alias (repetível)")
     
     args = parser.parse_args()
     
-    ingester = DocumentIngester()
-    ingester.ingest_directory(args.directory)
+    ingester = DocumentIngester(workers=args.workers, batch_size=args.batch_size, model_name=args.model,
+                                chunk_size=args.chunk_size, overlap=args.overlap)
+    ingester.ingest_directory(args.directory, rebuild=args.rebuild, verify_queries=args.verify_query)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Testes usam o índice vetorial embutido: não precisam de um Qdrant rodando
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ.setdefault("LOCAL_INDEX_DIR", tempfile.mkdtemp(prefix="vector_index_"))
+os.environ.setdefault("SPARSE_INDEX_DIR", tempfile.mkdtemp(prefix="sparse_index_"))
+os.environ.setdefault("RETRIEVAL_CACHE_DIR", tempfile.mkdtemp(prefix="retrieval_cache_"))
+# Roteamento por palavra-chave (sem carregar modelo); test_semantic_router usa embeddings falsos
+os.environ.setdefault("SEMANTIC_ROUTER_ENABLED", "false")
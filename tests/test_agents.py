@@ -1,27 +1,41 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+from app.config import settings
 from agents.rag_agent import RAGAgent
+from tools.vector_search import VectorSearchTool
 from agents.search_agent import SearchAgent
 from agents.weather_agent import WeatherAgent
+from tools.schemas import RetrievedDocument
 
 class TestRAGAgent:
     def setup_method(self):
         self.agent = RAGAgent()
     
     def test_process_with_valid_query(self):
-        with patch.object(self.agent, 'execute_tool', return_value="Mocked search results"):
+        documents = [RetrievedDocument(id="1", text="Mocked search results", score=0.8)]
+        with patch.object(VectorSearchTool, "search", return_value=documents), \
+             patch('agents.rag_agent.llm_manager') as mock_llm:
+            mock_llm.generate_response.return_value = ("Mocked answer", True)
             response = self.agent.process("What is machine learning?")
             
             assert response.content is not None
             assert response.confidence > 0
             assert len(response.tool_calls) > 0
+            assert response.documents == documents
+            assert "Mocked search results" in mock_llm.generate_response.call_args.args[1]
     
     def test_process_with_no_results(self):
-        with patch.object(self.agent, 'execute_tool', return_value="Nenhum documento relevante encontrado"):
+        with patch.object(VectorSearchTool, "search", return_value=[]):
             response = self.agent.process("Unknown topic")
             
-            assert "Não encontrei informações relevantes" in response.content
+            assert 'não encontrei informações sobre "Unknown topic"' in response.content
             assert response.confidence == 0.3
+    
+    def test_small_talk_matches_whole_words(self):
+        assert self.agent.process("Oi, tudo bem?").confidence == 1.0
+        # "hi" dentro de "machine" não é saudação
+        assert self.agent._small_talk("What is machine learning?") is None
 
 class TestSearchAgent:
     def setup_method(self):
@@ -50,4 +64,34 @@ class TestWeatherAgent:
         response = self.agent.process("What's the weather?")
         
         assert "especifique uma cidade" in response.content
-        assert response.confidence == 0.2
\ No newline at end of file
+        assert response.confidence == 0.2
+
+class TestAsyncRAGAgent:
+    def setup_method(self):
+        self.agent = RAGAgent()
+    
+    def test_aprocess_uses_async_search_and_llm(self):
+        documents = [RetrievedDocument(id="1", text="Trecho assíncrono", score=0.8)]
+        with patch.object(VectorSearchTool, "asearch", AsyncMock(return_value=documents)), \
+             patch("agents.rag_agent.llm_manager") as mock_llm:
+            mock_llm.agenerate_response = AsyncMock(return_value=("Resposta assíncrona", True))
+            response = asyncio.run(self.agent.aprocess("O que é RAG?", {"use_answer_cache": False}))
+            
+            assert response.content == "Resposta assíncrona"
+            assert response.documents == documents
+            assert "Trecho assíncrono" in mock_llm.agenerate_response.call_args.args[1]
+    
+    def test_slow_llm_falls_back_to_documents(self, monkeypatch):
+        documents = [RetrievedDocument(id="1", text="Trecho recuperado", score=0.8)]
+        
+        async def slow_generation(query, context):
+            await asyncio.sleep(5)
+        
+        monkeypatch.setattr(settings, "tool_timeout_llm_generation", 0.1)
+        with patch.object(VectorSearchTool, "asearch", AsyncMock(return_value=documents)), \
+             patch("agents.rag_agent.llm_manager") as mock_llm:
+            mock_llm.agenerate_response = slow_generation
+            response = asyncio.run(self.agent.aprocess("O que é RAG?", {"use_answer_cache": False}))
+            
+            assert "Trecho recuperado" in response.content
+            assert response.confidence == 0.8
@@ -0,0 +1,96 @@
+import numpy as np
+from unittest.mock import Mock, patch
+from app.core.answer_cache import AnswerCache, CachedAnswer
+from agents.rag_agent import RAGAgent
+from tools.schemas import RetrievedDocument
+from tools.vector_search import VectorSearchTool
+
+DOCUMENTS = [RetrievedDocument(id="p1", text="RAG combina busca e geração", score=0.8)]
+
+def _entry(query="o que é RAG?", answer="RAG é ..."):
+    return CachedAnswer(query, answer, DOCUMENTS, generation_seconds=2.0)
+
+class TestAnswerCache:
+    def test_similarity_threshold(self):
+        cache = AnswerCache(similarity=0.9, max_items=10, ttl=60)
+        cache.add("ns", np.array([1.0, 0.0]), _entry())
+
+        entry, similarity = cache.lookup("ns", np.array([0.99, 0.05]))
+        assert entry.answer == "RAG é ..."
+        assert similarity > 0.9
+        assert cache.lookup("ns", np.array([0.5, 0.5])) is None
+        assert cache.lookup("outro", np.array([1.0, 0.0])) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["saved_seconds"] == 2.0
+
+    def test_invalid_entry_is_discarded(self):
+        cache = AnswerCache(similarity=0.9, max_items=10, ttl=60)
+        cache.add("ns", np.array([1.0, 0.0]), _entry())
+
+        assert cache.lookup("ns", np.array([1.0, 0.0]), is_valid=lambda entry: False) is None
+        assert cache.stats()["cached_answers"] == 0
+        assert cache.stats()["hits"] == 0
+
+    def test_ttl_and_eviction(self):
+        cache = AnswerCache(similarity=0.9, max_items=10, ttl=0)
+        cache.add("ns", np.array([1.0, 0.0]), _entry())
+        assert cache.lookup("ns", np.array([1.0, 0.0])) is None
+
+        cache = AnswerCache(similarity=0.9, max_items=2, ttl=60)
+        cache.add("ns", np.array([1.0, 0.0]), _entry(answer="a"))
+        cache.add("ns", np.array([0.0, 1.0]), _entry(answer="b"))
+        cache.lookup("ns", np.array([1.0, 0.0]))  # "a" passa a ser a mais recente
+        cache.add("ns", np.array([-1.0, 0.0]), _entry(answer="c"))
+
+        assert cache.lookup("ns", np.array([0.0, 1.0])) is None
+        assert cache.lookup("ns", np.array([1.0, 0.0]))[0].answer == "a"
+
+class TestRAGAgentAnswerCache:
+    def setup_method(self):
+        with patch('agents.rag_agent.llm_manager'):
+            self.agent = RAGAgent()
+
+    def test_paraphrase_served_from_cache_until_documents_change(self):
+        embedder = Mock()
+        embedder.embed_query_array.side_effect = lambda query: np.array([1.0, 0.0]) if "RAG" in query else np.array([0.0, 1.0])
+        context = {"use_answer_cache": True}
+
+        with patch('agents.rag_agent.answer_cache', AnswerCache(similarity=0.9, max_items=10, ttl=60)), \
+             patch('agents.rag_agent.embedding_registry') as mock_registry, \
+             patch('agents.rag_agent.llm_manager') as mock_llm, \
+             patch.object(VectorSearchTool, "search", return_value=DOCUMENTS) as mock_search, \
+             patch.object(VectorSearchTool, "existing_ids", return_value={"p1"}) as mock_existing:
+            mock_registry.get.return_value = embedder
+            mock_llm.generate_response.return_value = ("RAG é ...", True)
+
+            first = self.agent.process("Explique RAG", context)
+            second = self.agent.process("Explique RAG, por favor", context)
+
+            assert first.tool_calls[-1] == {"tool": "answer_cache", "hit": False}
+            assert second.tool_calls[0]["hit"] is True
+            assert second.content == "RAG é ..."
+            assert second.documents == DOCUMENTS
+            assert mock_llm.generate_response.call_count == 1
+
+            # Trecho reingerido com outro conteúdo: o ID antigo não existe mais
+            mock_existing.return_value = set()
+            third = self.agent.process("Explique RAG", context)
+            assert third.tool_calls[-1]["hit"] is False
+            assert mock_llm.generate_response.call_count == 2
+            assert mock_search.call_count == 2
+
+    def test_fallback_generation_is_not_cached(self):
+        embedder = Mock()
+        embedder.embed_query_array.return_value = np.array([1.0, 0.0])
+        cache = AnswerCache(similarity=0.9, max_items=10, ttl=60)
+
+        with patch('agents.rag_agent.answer_cache', cache), \
+             patch('agents.rag_agent.embedding_registry') as mock_registry, \
+             patch('agents.rag_agent.llm_manager') as mock_llm, \
+             patch.object(VectorSearchTool, "search", return_value=DOCUMENTS):
+            mock_registry.get.return_value = embedder
+            mock_llm.generate_response.return_value = ("**Documentos encontrados:** ...", False)
+
+            self.agent.process("Explique RAG", {"use_answer_cache": True})
+
+        assert cache.stats()["cached_answers"] == 0
@@ -0,0 +1,95 @@
+import threading
+import numpy as np
+from app.core.embedding_cache import EmbeddingCache, normalize_text
+
+class TestEmbeddingCache:
+    def test_normalize_text(self):
+        assert normalize_text("  O que   é\nRAG? ") == "O que é RAG?"
+
+    def test_memory_hit_and_miss(self):
+        cache = EmbeddingCache("model-a", dimension=3, directory=None)
+        vectors = np.array([[1, 0, 0], [0, 1, 0]], dtype=np.float32)
+        cache.put_many(["a", "b"], vectors)
+
+        results, missing = cache.get_many(["a", "c", "b"])
+
+        assert missing == [1]
+        np.testing.assert_array_equal(results[0], vectors[0])
+        np.testing.assert_array_equal(results[2], vectors[1])
+        assert cache.stats()["memory_hits"] == 2
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        vectors = np.random.rand(4, 8).astype(np.float32)
+        texts = ["um", "dois", "três", "quatro"]
+        EmbeddingCache("model-a", 8, directory=str(tmp_path)).put_many(texts, vectors)
+
+        reopened = EmbeddingCache("model-a", 8, directory=str(tmp_path))
+        results, missing = reopened.get_many(["três", "um"])
+
+        assert missing == []
+        np.testing.assert_allclose(results[0], vectors[2])
+        np.testing.assert_allclose(results[1], vectors[0])
+        assert reopened.stats()["disk_hits"] == 2
+
+    def test_model_change_invalidates(self, tmp_path):
+        EmbeddingCache("model-a", 3, directory=str(tmp_path)).put_many(
+            ["texto"], np.ones((1, 3), dtype=np.float32)
+        )
+
+        other = EmbeddingCache("model-b", 3, directory=str(tmp_path))
+        _, missing = other.get_many(["texto"])
+
+        assert missing == [0]
+
+    def test_memory_lru_bound(self):
+        cache = EmbeddingCache("model-a", 2, directory=None, max_memory_items=2)
+        cache.put_many(["a", "b", "c"], np.eye(3, 2, dtype=np.float32))
+
+        assert cache.stats()["memory_items"] == 2
+        _, missing = cache.get_many(["a"])
+        assert missing == [0]
+
+    def test_partial_trailing_key_is_discarded(self, tmp_path):
+        vectors = np.random.rand(4, 3).astype(np.float32)
+        EmbeddingCache("model-a", 3, directory=str(tmp_path)).put_many(["um", "dois"], vectors[:2])
+        # Escrita interrompida: parte de um vetor e de uma chave ficaram no fim dos arquivos
+        with open(tmp_path / "model-a" / "vectors.f32", "ab") as f:
+            f.write(b"\x00" * 7)
+        with open(tmp_path / "model-a" / "keys.bin", "ab") as f:
+            f.write(b"\x01" * 5)
+
+        EmbeddingCache("model-a", 3, directory=str(tmp_path)).put_many(["três", "quatro"], vectors[2:])
+        reopened = EmbeddingCache("model-a", 3, directory=str(tmp_path))
+        results, missing = reopened.get_many(["um", "dois", "três", "quatro"])
+
+        assert missing == []
+        for result, vector in zip(results, vectors):
+            np.testing.assert_allclose(result, vector)
+
+    def test_concurrent_reads_during_writes(self, tmp_path):
+        cache = EmbeddingCache("model-a", 4, directory=str(tmp_path), max_memory_items=1)
+        errors = []
+
+        def write():
+            for start in range(0, 400, 8):
+                texts = [f"texto {i}" for i in range(start, start + 8)]
+                cache.put_many(texts, np.repeat(np.arange(start, start + 8, dtype=np.float32)[:, None], 4, axis=1))
+
+        def read():
+            try:
+                for n in range(400):
+                    results, _ = cache.get_many([f"texto {i}" for i in range(n % 50, 400, 50)])
+                    for i, result in zip(range(n % 50, 400, 50), results):
+                        if result is not None:
+                            assert (result == i).all()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
@@ -0,0 +1,66 @@
+import asyncio
+import numpy as np
+from embedding_service.main import MicroBatcher
+
+class TestMicroBatcher:
+    def test_concurrent_requests_are_coalesced(self):
+        calls = []
+
+        def fake_encode(texts):
+            calls.append(list(texts))
+            return np.array([[len(t), 0.0] for t in texts], dtype=np.float32)
+
+        async def run():
+            batcher = MicroBatcher(fake_encode, max_batch_size=64, max_wait_ms=20)
+            batcher.start()
+            return await asyncio.gather(*[
+                batcher.submit([f"texto {i}" * (i + 1)]) for i in range(10)
+            ]), batcher
+
+        results, batcher = asyncio.run(run())
+
+        assert len(calls) < 10
+        assert batcher.stats()["requests"] == 10
+        for i, vectors in enumerate(results):
+            assert vectors.shape == (1, 2)
+            assert vectors[0, 0] == len(f"texto {i}" * (i + 1))
+
+    def test_batch_size_limit(self):
+        calls = []
+
+        def fake_encode(texts):
+            calls.append(len(texts))
+            return np.zeros((len(texts), 2), dtype=np.float32)
+
+        async def run():
+            batcher = MicroBatcher(fake_encode, max_batch_size=4, max_wait_ms=50)
+            batcher.start()
+            await asyncio.gather(*[batcher.submit(["a", "b"]) for _ in range(6)])
+
+        asyncio.run(run())
+
+        assert max(calls) <= 4
+        assert sum(calls) == 12
+
+    def test_large_requests_never_exceed_limit(self):
+        calls = []
+
+        def fake_encode(texts):
+            calls.append(len(texts))
+            return np.array([[float(t)] for t in texts], dtype=np.float32)
+
+        async def run():
+            batcher = MicroBatcher(fake_encode, max_batch_size=4, max_wait_ms=50)
+            batcher.start()
+            sizes = [3, 3, 10, 1]
+            return sizes, await asyncio.gather(*[
+                batcher.submit([str(n)] * n) for n in sizes
+            ])
+
+        sizes, results = asyncio.run(run())
+
+        assert max(calls) <= 4
+        assert sum(calls) == sum(sizes)
+        for n, vectors in zip(sizes, results):
+            assert vectors.shape == (n, 1)
+            assert (vectors == n).all()
@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import json
+import threading
+import httpx
+import numpy as np
+from unittest.mock import Mock
+from app.config import settings
+from app.core.embeddings import EmbeddingManager, EmbeddingRegistry
+
+class TestEmbeddingRegistry:
+    def setup_method(self):
+        self.default = EmbeddingManager(model_name="default-model", use_service=False)
+        self.registry = EmbeddingRegistry(self.default, max_resident=2)
+
+    def test_same_model_is_reused(self):
+        assert self.registry.get("model-a") is self.registry.get("model-a")
+        assert self.registry.get() is self.default
+
+    def test_lru_evicts_least_recently_used(self):
+        model_a = self.registry.get("model-a")
+        model_a._model = object()  # simula modelo carregado
+
+        self.registry.get("model-b")
+
+        assert self.registry.resident_models == ["default-model", "model-b"]
+        assert model_a._model is None
+
+    def test_default_model_is_never_evicted(self):
+        self.registry.get("model-a")
+        self.registry.get("model-b")
+        self.registry.get("model-c")
+
+        assert "default-model" in self.registry.resident_models
+
+class TestServiceBackend:
+    def test_cache_namespace_uses_service_backend(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "embedding_cache_dir", str(tmp_path))
+        manager = EmbeddingManager(model_name="model-a", use_service=True, backend="torch")
+        manager._session = Mock()
+        manager._session.get.return_value.json.return_value = {
+            "model_loaded": True, "model": "model-a", "backend": "torch-int8", "dimension": 3
+        }
+
+        # O serviço roda int8: o cache não pode abrir o namespace fp32
+        assert manager.cache.namespace == "model-a@torch-int8"
+        assert manager.cache_namespace == "model-a@torch-int8"
+        assert manager.dimension == 3
+        assert manager._session.get.call_count == 1
+
+    def test_async_service_path_keeps_blocking_io_off_the_loop(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "embedding_cache_dir", str(tmp_path))
+        manager = EmbeddingManager(model_name="model-a", use_service=True, backend="torch")
+        # O caminho assíncrono não pode usar a sessão síncrona (requests)
+        manager._session = Mock()
+
+        def service(request):
+            if request.url.path == "/health":
+                return httpx.Response(200, json={
+                    "model_loaded": True, "model": "model-a", "backend": "torch-int8", "dimension": 2
+                })
+            texts = json.loads(request.content)["texts"]
+            vectors = np.ones((len(texts), 2), dtype="<f4")
+            return httpx.Response(200, json={
+                "model": "model-a", "dimension": 2, "count": len(texts),
+                "embeddings_b64": base64.b64encode(vectors.tobytes()).decode()
+            })
+
+        threads = []
+        for name in ("_lookup", "_merge"):
+            original = getattr(manager, name)
+            monkeypatch.setattr(manager, name,
+                                lambda *args, _original=original: threads.append(threading.get_ident()) or _original(*args))
+
+        async def scenario():
+            manager._async_clients[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(service))
+            first = await manager.aembed_texts_array(["a", "b"])
+            second = await manager.aembed_texts_array(["a"])
+            return threading.get_ident(), first, second
+
+        loop_thread, first, second = asyncio.run(scenario())
+
+        assert first.shape == (2, 2) and second.shape == (1, 2)
+        manager._session.get.assert_not_called()
+        assert len(threads) == 4 and loop_thread not in threads
+        assert manager.cache.namespace == "model-a@torch-int8"
+        assert manager.cache.stats()["memory_hits"] == 1
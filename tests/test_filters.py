@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from vector_db.filters import build_filter, matches, source_prefixes
+from vector_db.local_index import LocalVectorStore
+from vector_db.qdrant_client import QdrantManager
+
+TEXTS = ["faq sobre garantia", "manual do produto", "notas de versão", "faq sobre entrega"]
+METADATAS = [
+    {"source": "data/docs/faq/garantia.md", "chunk_id": 0, "file_type": ".md", "file_name": "garantia.md"},
+    {"source": "data/docs/manual.pdf", "chunk_id": 0, "file_type": ".pdf", "file_name": "manual.pdf"},
+    {"source": "data/docs2/notas.txt", "chunk_id": 0, "file_type": ".txt", "file_name": "notas.txt"},
+    {"source": "data/docs/faq/entrega.md", "chunk_id": 0, "file_type": ".md", "file_name": "entrega.md"},
+]
+VECTORS = np.random.default_rng(0).normal(size=(4, 8)).astype(np.float32)
+
+class FakeEmbedder:
+    dimension = 8
+
+    def embed_query_array(self, query):
+        return VECTORS[0]
+
+    def embed_texts_array(self, queries):
+        return np.stack([VECTORS[0]] * len(queries))
+
+CASES = [
+    ({"file_type": ".md"}, {"garantia.md", "entrega.md"}),
+    ({"file_name": {"any": ["manual.pdf", "notas.txt"]}}, {"manual.pdf", "notas.txt"}),
+    ({"file_name": ["notas.txt"]}, {"notas.txt"}),
+    ({"source": {"prefix": "data/docs/"}}, {"garantia.md", "manual.pdf", "entrega.md"}),
+    ({"source": {"prefix": "data/docs/faq"}, "file_name": "entrega.md"}, {"entrega.md"}),
+]
+
+class TestFilters:
+    def test_source_prefixes(self):
+        assert source_prefixes("data/docs/a.md") == ["data", "data/docs", "data/docs/a.md"]
+        assert source_prefixes("/srv/a.md") == ["/srv", "/srv/a.md"]
+
+    def test_build_filter(self):
+        query_filter = build_filter({"file_type": ".md", "source": {"prefix": "data/docs/"}})
+        assert query_filter.must[0] == models.FieldCondition(key="file_type", match=models.MatchValue(value=".md"))
+        assert query_filter.must[1] == models.FieldCondition(key="source_prefixes", match=models.MatchValue(value="data/docs"))
+        assert build_filter(None) is None
+
+    def test_invalid_conditions(self):
+        with pytest.raises(ValueError):
+            build_filter({"file_name": {"prefix": "a"}})
+        with pytest.raises(ValueError):
+            matches({}, {"source": {"regex": ".*"}})
+
+    @pytest.mark.parametrize("filters,expected", CASES)
+    def test_local_store(self, tmp_path, monkeypatch, filters, expected):
+        store = LocalVectorStore(collection_name="filters", directory=str(tmp_path))
+        store.add_documents(TEXTS, METADATAS, embeddings=VECTORS)
+        monkeypatch.setattr(LocalVectorStore, "embedder", FakeEmbedder())
+
+        results = store.similarity_search("faq", k=10, score_threshold=-1.0, filters=filters)
+        assert {r["metadata"]["file_name"] for r in results} == expected
+
+    @pytest.mark.parametrize("filters,expected", CASES)
+    def test_qdrant_manager(self, monkeypatch, filters, expected):
+        monkeypatch.setattr(QdrantManager, "embedder", FakeEmbedder())
+        store = QdrantManager(collection_name="filters", client=QdrantClient(":memory:"))
+        store.add_documents(TEXTS, METADATAS, embeddings=VECTORS)
+
+        results = store.similarity_search("faq", k=10, score_threshold=-1.0, filters=filters)
+        assert {r["metadata"]["file_name"] for r in results} == expected
+
+    def test_payload_indexes_and_backfill(self, monkeypatch):
+        monkeypatch.setattr(QdrantManager, "embedder", FakeEmbedder())
+        client = QdrantClient(":memory:")
+        client.create_collection("old", vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE))
+        # Ponto gravado antes do filtro por prefixo existir
+        client.upsert("old", points=[models.PointStruct(id=1, vector=VECTORS[0].tolist(), payload={"text": "x", **METADATAS[0]})])
+
+        store = QdrantManager(collection_name="old", client=client)
+        assert client.retrieve("old", ids=[1])[0].payload["source_prefixes"] == source_prefixes(METADATAS[0]["source"])
+        results = store.similarity_search("x", k=5, score_threshold=-1.0, filters={"source": {"prefix": "data/docs/faq"}})
+        assert len(results) == 1
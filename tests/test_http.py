@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.config import settings
+from tools.http import DeadlineExceeded, TTLCache, afetch, fetch
+
+class StubHandler(BaseHTTPRequestHandler):
+    calls = {}
+
+    def do_GET(self):
+        StubHandler.calls[self.path] = StubHandler.calls.get(self.path, 0) + 1
+        if self.path == "/flaky" and StubHandler.calls[self.path] == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/trickle":
+            # Cada pedaço chega antes do timeout de leitura, mas o total passa do prazo
+            self.send_response(200)
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+            for _ in range(100):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.05)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    StubHandler.calls = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+class TestFetch:
+    def test_retries_server_errors(self, server, monkeypatch):
+        monkeypatch.setattr(settings, "http_backoff", 0.01)
+        response = fetch(f"{server}/flaky", deadline=5)
+
+        assert response.status_code == 200
+        assert response.content == b"ok"
+        assert StubHandler.calls["/flaky"] == 2
+
+    def test_deadline_bounds_slow_body(self, server):
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            fetch(f"{server}/trickle", deadline=0.5)
+
+        assert time.monotonic() - start < 2.0
+
+class TestAsyncFetch:
+    def test_retries_server_errors(self, server, monkeypatch):
+        monkeypatch.setattr(settings, "http_backoff", 0.01)
+        response = asyncio.run(afetch(f"{server}/flaky", deadline=5))
+
+        assert response.status_code == 200
+        assert response.content == b"ok"
+        assert StubHandler.calls["/flaky"] == 2
+
+    def test_deadline_bounds_slow_body(self, server):
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(afetch(f"{server}/trickle", deadline=0.5))
+
+        assert time.monotonic() - start < 2.0
+
+class TestTTLCache:
+    def test_stale_while_revalidate(self):
+        cache = TTLCache(ttl=0.05, stale_ttl=10)
+        values = iter(["v1", "v2"])
+        refreshed = threading.Event()
+
+        def fetch_value():
+            value = next(values)
+            if value == "v2":
+                refreshed.set()
+            return value
+
+        assert cache.get_or_fetch("k", fetch_value) == "v1"
+        time.sleep(0.1)
+        # Valor velho servido na hora; a atualização roda em segundo plano
+        assert cache.get_or_fetch("k", fetch_value) == "v1"
+        assert refreshed.wait(2)
+        time.sleep(0.05)
+        assert cache.get("k")[0] == "v2"
+
+    def test_expired_entries_are_refetched(self):
+        cache = TTLCache(ttl=0.0, stale_ttl=0.0)
+        cache.set("k", "v1")
+        time.sleep(0.01)
+
+        assert cache.get("k") is None
+        assert cache.get_or_fetch("k", lambda: "v2") == "v2"
+
+    def test_async_misses_are_coalesced(self):
+        cache = TTLCache(ttl=60)
+        calls = []
+
+        async def slow_fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "valor"
+
+        async def run():
+            return await asyncio.gather(*[cache.aget_or_fetch("k", slow_fetch) for _ in range(10)])
+
+        assert asyncio.run(run()) == ["valor"] * 10
+        assert len(calls) == 1
+        assert cache.get("k") == ("valor", True)
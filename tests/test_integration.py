@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import Mock, patch
 from graph.workflow import RAGWorkflow
 from app.core.evaluation import RAGEvaluator
+import numpy as np
 
 class TestIntegrationWorkflow:
     def setup_method(self):
@@ -35,6 +36,22 @@ class TestIntegrationWorkflow:
         assert isinstance(metrics.jailbreak_detected, bool)
         assert 0 <= metrics.overall_score <= 1
     
+    @patch('app.core.evaluation.embedding_manager')
+    def test_evaluation_with_precomputed_context_embeddings(self, mock_embeddings):
+        mock_embeddings.embed_texts_array.return_value = np.array([[1.0, 0.0], [1.0, 0.0]], dtype=np.float32)
+        
+        metrics = self.evaluator.evaluate_response(
+            query="What is AI?",
+            response="AI is artificial intelligence",
+            context_docs=["Artificial intelligence is a technology"],
+            context_embeddings=np.array([[1.0, 0.0]], dtype=np.float32)
+        )
+        
+        # Só pergunta e resposta passam pelo encoder
+        mock_embeddings.embed_texts_array.assert_called_once_with(["What is AI?", "AI is artificial intelligence"])
+        assert metrics.context_relevance == pytest.approx(1.0)
+        assert metrics.groundedness == pytest.approx(1.0)
+    
     def test_pii_detection(self):
         # Teste com dados sensíveis
         response_with_pii = "My email is test@example.com and SSN is 123-45-6789"
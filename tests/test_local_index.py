@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from app.config import settings
+from vector_db import local_index
+from vector_db.local_index import LocalVectorStore
+
+def _docs(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    texts = [f"chunk {i}" for i in range(n)]
+    metadatas = [{"source": f"doc{i % 3}.md", "chunk_id": i} for i in range(n)]
+    return texts, metadatas, vectors
+
+class TestLocalVectorStore:
+    def test_exact_search_matches_brute_force(self, tmp_path):
+        texts, metadatas, vectors = _docs(50)
+        store = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        assert store.add_documents(texts, metadatas, embeddings=vectors) == 50
+
+        results = store.search_vector(vectors[7], k=5, score_threshold=-1.0)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ normalized[7]))[:5]
+
+        assert [r["metadata"]["chunk_id"] for r in results] == expected.tolist()
+        assert results[0]["text"] == "chunk 7"
+        assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+        assert set(results[0]) == {"id", "text", "score", "metadata"}
+
+    def test_idempotent_and_persistent(self, tmp_path):
+        texts, metadatas, vectors = _docs(10)
+        store = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        store.add_documents(texts, metadatas, embeddings=vectors)
+        assert store.add_documents(texts, metadatas, embeddings=vectors) == 0
+
+        reopened = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        assert len(reopened) == 10
+        assert reopened.search_vector(vectors[3], k=1)[0]["text"] == "chunk 3"
+
+    def test_remove_stale(self, tmp_path):
+        texts, metadatas, vectors = _docs(9)
+        store = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        store.add_documents(texts, metadatas, embeddings=vectors)
+
+        keep = store.existing_ids([local_index.point_id(texts[0], metadatas[0])])
+        store.remove_stale({"doc0.md": list(keep)})
+
+        sources = [r["metadata"]["source"] for r in store.search_vector(vectors[0], k=9, score_threshold=-1.0)]
+        assert len(store) == 7
+        assert sources.count("doc0.md") == 1
+
+    @pytest.mark.skipif(local_index.hnswlib is None, reason="hnswlib não instalado")
+    def test_hnsw_above_threshold(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "local_index_hnsw_threshold", 100)
+        texts, metadatas, vectors = _docs(300, dim=32)
+        store = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        store.add_documents(texts, metadatas, embeddings=vectors)
+        assert store._hnsw is not None
+
+        results = store.search_vector(vectors[42], k=3)
+        assert results[0]["text"] == "chunk 42"
+
+        reopened = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        assert reopened._hnsw is not None
+        assert reopened.search_vector(vectors[42], k=1)[0]["text"] == "chunk 42"
+
+    def test_batch_search_matches_single_queries(self, tmp_path, monkeypatch):
+        texts, metadatas, vectors = _docs(40)
+        store = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        store.add_documents(texts, metadatas, embeddings=vectors)
+
+        class FakeEmbedder:
+            def embed_texts_array(self, queries):
+                return vectors[[int(q.split()[1]) for q in queries]]
+
+            def embed_query_array(self, query):
+                return self.embed_texts_array([query])[0]
+
+        monkeypatch.setattr(LocalVectorStore, "embedder", FakeEmbedder())
+        queries = ["chunk 5", "chunk 30", "chunk 5", "chunk 0"]
+
+        batch = store.similarity_search_batch(queries, k=4, score_threshold=0.0)
+        single = [store.similarity_search(q, k=4, score_threshold=0.0) for q in queries]
+        for batch_results, single_results in zip(batch, single):
+            assert [r["text"] for r in batch_results] == [r["text"] for r in single_results]
+            assert [r["score"] for r in batch_results] == pytest.approx([r["score"] for r in single_results], abs=1e-5)
+        assert [results[0]["text"] for results in batch] == queries
+        assert store.similarity_search_batch([]) == []
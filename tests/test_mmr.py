@@ -0,0 +1,84 @@
+import numpy as np
+from vector_db.local_index import LocalVectorStore
+from vector_db.mmr import mmr_select
+from vector_db.points import point_id
+from vector_db.sparse_index import get_sparse_index
+from app.core.reranker import Reranker
+from tools import vector_search
+from tools.vector_search import VectorSearchTool
+
+QUERY = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+# Dois quase-duplicados muito relevantes e um terceiro relevante porém diferente
+CANDIDATES = np.array([
+    [0.95, 0.30, 0.0],
+    [0.95, 0.31, 0.0],
+    [0.80, 0.0, 0.60],
+], dtype=np.float32)
+
+class FakeEmbedder:
+    dimension = 3
+
+    def embed_query_array(self, query):
+        return QUERY
+
+    def embed_texts_array(self, texts):
+        return np.stack([TEXT_VECTORS[text] for text in texts])
+
+# "c" não passa do threshold denso: só chega pelo BM25, sem vetor
+TEXT_VECTORS = {
+    "garantia a": CANDIDATES[0],
+    "garantia a'": CANDIDATES[1],
+    "garantia b": CANDIDATES[2],
+    "garantia c": np.array([0.0, 1.0, 0.0], dtype=np.float32),
+}
+
+def _local_store(tmp_path, monkeypatch, name):
+    texts = list(TEXT_VECTORS)
+    metadatas = [{"source": "kb.md", "chunk_id": i} for i in range(len(texts))]
+    store = LocalVectorStore(collection_name=name, directory=str(tmp_path))
+    store.add_documents(texts, metadatas, embeddings=np.stack(list(TEXT_VECTORS.values())))
+    get_sparse_index(name).add([point_id(t, m) for t, m in zip(texts, metadatas)], texts, metadatas)
+    monkeypatch.setattr(LocalVectorStore, "embedder", FakeEmbedder())
+    monkeypatch.setattr(vector_search, "qdrant_manager", store)
+    return store
+
+class FakeCrossEncoder:
+    """Os quase-duplicados "a" e "a'" são os mais relevantes para o cross-encoder"""
+    LOGITS = {"garantia a": 4.0, "garantia a'": 4.0, "garantia b": 2.0, "garantia c": -4.0}
+
+    def predict(self, pairs, **kwargs):
+        return np.array([self.LOGITS[text] for _, text in pairs], dtype=np.float32)
+
+class TestMMR:
+    def test_lambda_one_is_relevance_order(self):
+        relevance = CANDIDATES @ QUERY / np.linalg.norm(CANDIDATES, axis=1)
+        assert mmr_select(QUERY, CANDIDATES, 3, lambda_mult=1.0) == list(np.argsort(-relevance))
+
+    def test_skips_near_duplicates(self):
+        assert sorted(mmr_select(QUERY, CANDIDATES, 2, lambda_mult=0.5)) == [0, 2]
+
+    def test_edge_cases(self):
+        assert mmr_select(QUERY, CANDIDATES[:0], 3) == []
+        assert sorted(mmr_select(QUERY, CANDIDATES, 10)) == [0, 1, 2]
+
+    def test_mmr_applies_to_hybrid_results(self, tmp_path, monkeypatch):
+        _local_store(tmp_path, monkeypatch, "mmr_hybrid")
+
+        documents = VectorSearchTool().search("garantia", k=2, threshold=0.3, hybrid=True,
+                                              mmr=True, mmr_lambda=0.5, rerank=False, with_vectors=True)
+
+        assert [document.text for document in documents] == ["garantia a", "garantia b"]
+        assert all(document.vector is not None for document in documents)
+
+    def test_rerank_then_mmr_drops_near_duplicates(self, tmp_path, monkeypatch):
+        _local_store(tmp_path, monkeypatch, "mmr_rerank")
+        fake_reranker = Reranker(model_name="fake", cache_items=100)
+        fake_reranker._model = FakeCrossEncoder()
+        monkeypatch.setattr(vector_search, "reranker", fake_reranker)
+
+        documents = VectorSearchTool().search("garantia", k=2, threshold=0.3, hybrid=False,
+                                              mmr=True, mmr_lambda=0.5, rerank=True)
+
+        # Só com o reranker, "a" e "a'" seriam os dois primeiros
+        assert [document.text for document in documents] == ["garantia a", "garantia b"]
+        assert documents[0].score == 4.0
@@ -0,0 +1,20 @@
+from app.core.parallel_encoding import estimate_tokens, length_buckets
+
+class TestLengthBuckets:
+    def test_estimate_tokens(self):
+        assert estimate_tokens("O que é RAG?") == 5
+
+    def test_buckets_group_similar_lengths(self):
+        texts = ["a " * n for n in [5, 200, 10, 190, 7, 180]]
+
+        buckets = length_buckets(texts, batch_size=3)
+
+        assert [sorted(b.tolist()) for b in buckets] == [[1, 3, 5], [0, 2, 4]]
+
+    def test_buckets_cover_all_indices(self):
+        texts = [f"texto {'x ' * i}" for i in range(10)]
+
+        buckets = length_buckets(texts, batch_size=4)
+
+        assert sorted(i for b in buckets for i in b.tolist()) == list(range(10))
+        assert [len(b) for b in buckets] == [4, 4, 2]
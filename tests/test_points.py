@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from app.config import settings
+from vector_db import qdrant_client as qdrant_module
+from vector_db.points import point_id
+from vector_db.qdrant_client import QdrantManager
+
+class FakeEmbedder:
+    dimension = 16
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_texts_array(self, texts):
+        self.embedded += len(texts)
+        return np.stack([
+            np.random.default_rng(int(hashlib.md5(t.encode()).hexdigest()[:8], 16)).normal(size=16)
+            for t in texts
+        ]).astype(np.float32)
+
+class RecordingClient:
+    """Repassa tudo ao cliente em memória; upsert falha ``failures`` vezes e registra concorrência"""
+
+    def __init__(self, client, failures=0, delay=0.0):
+        self._client = client
+        self.failures = failures
+        self.delay = delay
+        self.upserts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        # O cliente em memória não é thread-safe: só a escrita real é serializada
+        self._write_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def upsert(self, **kwargs):
+        with self._lock:
+            self.upserts += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.failures > 0
+            self.failures -= 1 if fail else 0
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if fail:
+                raise ConnectionError("Qdrant indisponível")
+            with self._write_lock:
+                return self._client.upsert(**kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+@pytest.fixture
+def embedder(monkeypatch):
+    embedder = FakeEmbedder()
+    monkeypatch.setattr(QdrantManager, "embedder", embedder)
+    return embedder
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(qdrant_module.time, "sleep", delays.append)
+    return delays
+
+def _manager(client):
+    return QdrantManager(collection_name="docs", client=client)
+
+def _chunks(source, texts):
+    return list(texts), [{"source": source, "chunk_id": i} for i in range(len(texts))]
+
+def _ids(manager):
+    records, _ = manager.client.scroll(collection_name="docs", limit=1000, with_payload=False)
+    return {str(record.id) for record in records}
+
+class TestPointId:
+    def test_stable_and_content_addressed(self):
+        metadata = {"source": "a.md", "chunk_id": 0}
+
+        assert point_id("texto", metadata) == point_id("texto", dict(metadata))
+        assert point_id("texto", metadata) != point_id("texto alterado", metadata)
+        assert point_id("texto", metadata) != point_id("texto", {"source": "b.md", "chunk_id": 0})
+        assert point_id("texto", metadata) != point_id("texto", {"source": "a.md", "chunk_id": 1})
+
+class TestIdempotentIngestion:
+    def test_reingest_upserts_nothing(self, embedder):
+        client = RecordingClient(QdrantClient(":memory:"))
+        manager = _manager(client)
+        texts, metadatas = _chunks("a.md", ["um", "dois", "três"])
+
+        assert manager.add_documents(texts, metadatas) == 3
+        assert manager.add_documents(texts, metadatas) == 0
+        assert client.upserts == 1
+        assert embedder.embedded == 3
+
+    def test_transient_failures_are_retried_with_backoff(self, embedder, sleeps, monkeypatch):
+        monkeypatch.setattr(settings, "qdrant_upsert_retries", 3)
+        monkeypatch.setattr(settings, "qdrant_upsert_backoff", 0.5)
+        client = RecordingClient(QdrantClient(":memory:"), failures=2)
+        manager = _manager(client)
+        texts, metadatas = _chunks("a.md", ["um", "dois"])
+
+        assert manager.add_documents(texts, metadatas) == 2
+        assert client.upserts == 3
+        assert _ids(manager) == {point_id(t, m) for t, m in zip(texts, metadatas)}
+        # Backoff exponencial com jitter: [0.5, 1.0) e depois [1.0, 2.0)
+        assert len(sleeps) == 2
+        assert 0.5 <= sleeps[0] < 1.0 <= sleeps[1] < 2.0
+
+    def test_permanent_failure_is_raised(self, embedder, sleeps, monkeypatch):
+        monkeypatch.setattr(settings, "qdrant_upsert_retries", 2)
+        client = RecordingClient(QdrantClient(":memory:"), failures=100)
+        manager = _manager(client)
+
+        with pytest.raises(ConnectionError):
+            manager.add_documents(*_chunks("a.md", ["um", "dois"]))
+        assert client.upserts == 3
+        assert len(sleeps) == 2
+
+    def test_in_flight_batches_are_bounded(self, embedder, monkeypatch):
+        monkeypatch.setattr(settings, "qdrant_upsert_batch_size", 2)
+        monkeypatch.setattr(settings, "qdrant_upsert_parallelism", 2)
+        client = RecordingClient(QdrantClient(":memory:"), delay=0.05)
+        manager = _manager(client)
+        texts, metadatas = _chunks("a.md", [f"chunk {i}" for i in range(11)])
+
+        assert manager.add_documents(texts, metadatas) == 11
+        assert client.upserts == 6
+        assert client.max_in_flight == 2
+        assert len(_ids(manager)) == 11
+
+    def test_remove_stale_after_reingest(self, embedder):
+        manager = _manager(QdrantClient(":memory:"))
+        manager.add_documents(*_chunks("a.md", ["um", "dois", "três"]))
+        other_texts, other_metadatas = _chunks("b.md", ["outro"])
+        manager.add_documents(other_texts, other_metadatas)
+
+        # Arquivo alterado: o chunk 1 mudou e o chunk 2 deixou de existir
+        texts, metadatas = _chunks("a.md", ["um", "dois (revisado)"])
+        assert manager.add_documents(texts, metadatas) == 1
+        manager.remove_stale({"a.md": [point_id(t, m) for t, m in zip(texts, metadatas)]})
+
+        expected = {point_id(t, m) for t, m in zip(texts + other_texts, metadatas + other_metadatas)}
+        assert _ids(manager) == expected
@@ -0,0 +1,90 @@
+import hashlib
+import numpy as np
+import pytest
+from pathlib import Path
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from app.config import settings
+from vector_db import reindex
+from vector_db.qdrant_client import QdrantManager
+
+class FakeEmbedder:
+    dimension = 16
+
+    def embed_texts_array(self, texts):
+        return np.stack([
+            np.random.default_rng(int(hashlib.md5(t.encode()).hexdigest()[:8], 16)).normal(size=16)
+            for t in texts
+        ]).astype(np.float32)
+
+    def embed_query_array(self, query):
+        return self.embed_texts_array([query])[0]
+
+class FakeRegistry:
+    def get(self, name=None):
+        return FakeEmbedder()
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(QdrantManager, "embedder", FakeEmbedder())
+    monkeypatch.setattr(reindex, "embedding_registry", FakeRegistry())
+    return QdrantClient(":memory:")
+
+def _corpus(version):
+    texts = [f"chunk {i} da versão {version}" for i in range(30)]
+    return texts, [{"source": f"doc{i % 4}.md", "chunk_id": i} for i in range(30)]
+
+class TestReindex:
+    def test_rebuild_swaps_alias_and_collects_old_versions(self, client):
+        for version in (1, 2, 3):
+            texts, metadatas = _corpus(version)
+            name = reindex.rebuild(client, texts, metadatas, alias="kb", queries=["chunk 3"])
+            assert name == f"kb_v{version}"
+            assert reindex.current_collection(client, "kb") == name
+
+        # Mantém a atual e uma anterior para rollback
+        assert [name for _, name in reindex.list_versions(client, "kb")] == ["kb_v2", "kb_v3"]
+        store = QdrantManager(collection_name="kb", client=client)
+        results = store.similarity_search("chunk 5 da versão 3", k=1, score_threshold=0.0)
+        assert results[0]["text"] == "chunk 5 da versão 3"
+        assert (Path(settings.sparse_index_dir) / "kb.json").exists()
+
+    def test_failed_verification_keeps_live_version(self, client, monkeypatch):
+        reindex.rebuild(client, *_corpus(1), alias="kb")
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("verificação falhou")
+
+        monkeypatch.setattr(reindex, "verify_version", fail)
+        with pytest.raises(RuntimeError):
+            reindex.rebuild(client, *_corpus(2), alias="kb")
+
+        assert reindex.current_collection(client, "kb") == "kb_v1"
+        assert [name for _, name in reindex.list_versions(client, "kb")] == ["kb_v1"]
+
+    def test_count_mismatch_is_detected(self, client):
+        texts, metadatas = _corpus(1)
+        store = QdrantManager(collection_name="kb", client=client)
+        store.add_documents(texts[:10], metadatas[:10], embeddings=FakeEmbedder().embed_texts_array(texts[:10]))
+        with pytest.raises(RuntimeError):
+            reindex.verify_version(store, texts, metadatas)
+
+    def test_migrates_legacy_physical_collection(self, client):
+        client.create_collection("kb", vectors_config=models.VectorParams(size=16, distance=models.Distance.COSINE))
+        legacy_texts = [f"trecho antigo {i}" for i in range(300)]
+        client.upsert("kb", points=models.Batch(
+            ids=list(range(300)),
+            vectors=FakeEmbedder().embed_texts_array(legacy_texts).tolist(),
+            payloads=[{"text": text} for text in legacy_texts]
+        ))
+        assert reindex.current_collection(client, "kb") == "kb"
+
+        reindex.rebuild(client, *_corpus(1), alias="kb")
+        assert reindex.current_collection(client, "kb") == "kb_v1"
+        # O conteúdo antigo continua disponível como versão de rollback
+        assert [name for _, name in reindex.list_versions(client, "kb")] == ["kb_v0", "kb_v1"]
+        assert client.count("kb_v0", exact=True).count == 300
+
+    def test_new_collections_are_created_behind_alias(self, client):
+        QdrantManager(collection_name="fresh", client=client)
+        assert reindex.current_collection(client, "fresh") == "fresh_v1"
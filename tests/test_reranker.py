@@ -0,0 +1,59 @@
+import numpy as np
+from unittest.mock import patch
+from app.core.reranker import Reranker
+from tools.vector_search import VectorSearchTool
+
+class FakeCrossEncoder:
+    """Score = número de palavras da query presentes no texto"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, **kwargs):
+        self.calls.append(len(pairs))
+        return np.array([
+            sum(word in text.split() for word in query.split()) for query, text in pairs
+        ], dtype=np.float32)
+
+def _candidates():
+    texts = ["gato preto", "cachorro", "gato preto pequeno", "peixe", "gato"]
+    return [{"id": f"p{i}", "text": t, "score": 0.5, "metadata": {}} for i, t in enumerate(texts)]
+
+class TestReranker:
+    def setup_method(self):
+        self.reranker = Reranker(model_name="fake", cache_items=100)
+        self.model = FakeCrossEncoder()
+        self.reranker._model = self.model
+
+    def test_rerank_orders_and_cuts(self):
+        results = self.reranker.rerank("gato preto", _candidates(), k=2)
+
+        assert [r["id"] for r in results] == ["p0", "p2"]
+        assert results[0]["score"] == 2.0
+        assert results[0]["retrieval_score"] == 0.5
+        assert self.model.calls == [5]  # um único lote
+
+    def test_pair_scores_are_cached(self):
+        self.reranker.rerank("gato preto", _candidates(), k=2)
+        self.reranker.rerank("  gato   preto ", _candidates()[:3] + [{"id": "p9", "text": "gato", "score": 0.1}], k=2)
+
+        assert self.model.calls == [5, 1]
+        assert self.reranker.stats()["hits"] == 3
+
+    def test_cache_is_bounded(self):
+        reranker = Reranker(model_name="fake", cache_items=3)
+        reranker._model = FakeCrossEncoder()
+        reranker.rerank("gato", _candidates(), k=1)
+        assert reranker.stats()["cached_pairs"] == 3
+
+    @patch('tools.vector_search.reranker')
+    @patch('tools.vector_search.qdrant_manager')
+    def test_tool_fetches_more_and_reranks(self, mock_qdrant, mock_reranker):
+        mock_qdrant.similarity_search.return_value = _candidates()
+        mock_reranker.rerank.return_value = _candidates()[:2]
+
+        result = VectorSearchTool()._run("gato preto", k=2, rerank=True)
+
+        assert mock_qdrant.similarity_search.call_args.kwargs["k"] >= 20
+        assert mock_reranker.rerank.call_args.args[2] == 2
+        assert "gato preto" in result
@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from vector_db.async_qdrant import AsyncQdrantManager
+from vector_db.local_index import LocalVectorStore
+from vector_db.qdrant_client import QdrantManager
+from vector_db.retrieval_cache import RetrievalCache, normalize_query
+
+class CountingEmbedder:
+    dimension = 3
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query_array(self, query):
+        self.calls += 1
+        return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+    async def aembed_query_array(self, query):
+        return self.embed_query_array(query)
+
+    async def adimension(self):
+        return self.dimension
+
+class ThreadRecordingRedis:
+    """Redis mínimo em memória que anota em quais threads foi chamado"""
+
+    def __init__(self):
+        self.data = {}
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.threads.add(threading.get_ident())
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+class BrokenIncrRedis(ThreadRecordingRedis):
+    """Mesmo servidor, mas o INCR falha (ex.: conexão do processo que escreve caiu)"""
+
+    def __init__(self, shared):
+        self.data = shared.data
+        self.threads = set()
+
+    def incr(self, key):
+        raise ConnectionError("Redis indisponível")
+
+RESULTS = [{"id": "p1", "text": "RAG é ...", "score": 0.9, "metadata": {"source": "a.md"}}]
+
+class TestRetrievalCache:
+    def test_normalized_query_shares_key(self, tmp_path):
+        cache = RetrievalCache(directory=str(tmp_path), enabled=True)
+        assert normalize_query("O que é  RAG") == normalize_query("o que é RAG?")
+        assert cache.key("docs", "O que é RAG", k=5) == cache.key("docs", "o que é RAG?", k=5)
+        assert cache.key("docs", "o que é RAG?", k=5) != cache.key("docs", "o que é RAG?", k=3)
+
+    def test_bump_invalidates(self, tmp_path):
+        cache = RetrievalCache(directory=str(tmp_path), enabled=True)
+        key = cache.key("docs", "pergunta", k=5)
+        cache.put(key, RESULTS)
+        assert cache.get(cache.key("docs", "pergunta", k=5)) == RESULTS
+
+        # Outro processo (mesmo diretório) registra uma ingestão
+        RetrievalCache(directory=str(tmp_path), enabled=True).bump("docs")
+        assert cache.get(cache.key("docs", "pergunta", k=5)) is None
+
+    def test_search_racing_a_write_is_never_served(self, tmp_path):
+        cache = RetrievalCache(directory=str(tmp_path), enabled=True)
+        key = cache.key("docs", "pergunta")
+        cache.bump("docs")
+        cache.put(key, RESULTS)
+        assert cache.get(cache.key("docs", "pergunta")) is None
+
+    def test_ttl_and_lru(self, tmp_path):
+        cache = RetrievalCache(directory=str(tmp_path), max_items=2, ttl=0.0, enabled=True)
+        cache.put("a", RESULTS)
+        assert cache.get("a") is None
+
+        cache = RetrievalCache(directory=str(tmp_path), max_items=2, ttl=60.0, enabled=True)
+        for key in ("a", "b", "c"):
+            cache.put(key, RESULTS)
+        assert cache.get("a") is None
+        assert cache.get("c") == RESULTS
+
+    def test_hits_are_copies(self, tmp_path):
+        cache = RetrievalCache(directory=str(tmp_path), enabled=True)
+        cache.put("a", RESULTS)
+        cache.get("a")[0]["metadata"]["source"] = "alterado"
+        assert cache.get("a")[0]["metadata"]["source"] == "a.md"
+
+    def test_redis_tier_shared_between_processes(self, tmp_path):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        first = RetrievalCache(redis_client=fakeredis.FakeRedis(server=server), enabled=True)
+        second = RetrievalCache(redis_client=fakeredis.FakeRedis(server=server), enabled=True)
+        results = [{**RESULTS[0], "vector": np.ones(3, dtype=np.float32)}]
+
+        first.put(first.key("docs", "pergunta"), results)
+        hit = second.get(second.key("docs", "pergunta"))
+        assert hit[0]["text"] == RESULTS[0]["text"]
+        assert isinstance(hit[0]["vector"], np.ndarray)
+
+        first.bump("docs")
+        assert second.get(second.key("docs", "pergunta")) is None
+
+    def test_failed_redis_bump_reaches_other_readers(self, tmp_path):
+        redis_client = ThreadRecordingRedis()
+        reader = RetrievalCache(directory=str(tmp_path), redis_client=redis_client, enabled=True)
+        writer = RetrievalCache(directory=str(tmp_path), redis_client=BrokenIncrRedis(redis_client), enabled=True)
+        reader.put(reader.key("docs", "pergunta"), RESULTS)
+
+        with pytest.raises(RuntimeError):
+            writer.bump("docs")
+
+        # O leitor (outro processo) não serve o resultado anterior à escrita
+        assert reader.get(reader.key("docs", "pergunta")) is None
+        assert writer.key("docs", "pergunta") is None
+
+    def test_async_redis_tier_runs_off_the_event_loop(self):
+        redis_client = ThreadRecordingRedis()
+        first = RetrievalCache(redis_client=redis_client, enabled=True)
+        second = RetrievalCache(redis_client=redis_client, enabled=True)
+        key = first.key("docs", "pergunta")
+        redis_client.threads.clear()
+
+        async def scenario():
+            await first.aput(key, RESULTS)
+            return threading.get_ident(), await second.aget(key), await second.aget(key)
+
+        loop_thread, shared_hit, memory_hit = asyncio.run(scenario())
+
+        assert shared_hit[0]["text"] == memory_hit[0]["text"] == RESULTS[0]["text"]
+        assert redis_client.threads and loop_thread not in redis_client.threads
+        assert second.stats()["hits"] == 2
+
+class TestCachedSearch:
+    def test_local_store_cache_and_reingestion(self, tmp_path, monkeypatch):
+        embedder = CountingEmbedder()
+        monkeypatch.setattr(LocalVectorStore, "embedder", embedder)
+        store = LocalVectorStore(collection_name="docs", directory=str(tmp_path))
+        store.add_documents(["a"], [{"source": "a.md"}], embeddings=np.array([[1.0, 0.1, 0.0]]))
+
+        assert len(store.similarity_search("O que é a?")) == 1
+        assert len(store.similarity_search("o que é a")) == 1
+        assert embedder.calls == 1
+
+        store.add_documents(["b"], [{"source": "b.md"}], embeddings=np.array([[1.0, 0.0, 0.1]]))
+        assert len(store.similarity_search("o que é a")) == 2
+        assert embedder.calls == 2
+
+    def test_qdrant_manager_cache_and_reingestion(self, monkeypatch):
+        embedder = CountingEmbedder()
+        monkeypatch.setattr(QdrantManager, "embedder", embedder)
+        store = QdrantManager(collection_name="cached", client=QdrantClient(":memory:"))
+        store.add_documents(["a"], [{"source": "a.md"}], embeddings=np.array([[1.0, 0.1, 0.0]]))
+
+        store.similarity_search("pergunta")
+        store.similarity_search("Pergunta?")
+        assert embedder.calls == 1
+
+        store.add_documents(["b"], [{"source": "b.md"}], embeddings=np.array([[1.0, 0.0, 0.1]]))
+        assert len(store.similarity_search("pergunta")) == 2
+        assert embedder.calls == 2
+
+    def test_async_qdrant_manager_cache_and_vectors(self, monkeypatch):
+        embedder = CountingEmbedder()
+        monkeypatch.setattr(AsyncQdrantManager, "embedder", embedder)
+
+        async def scenario():
+            client = AsyncQdrantClient(":memory:")
+            monkeypatch.setattr(AsyncQdrantManager, "client", property(lambda self: client))
+            store = AsyncQdrantManager(collection_name="async_cached")
+            await store.add_documents(["a"], [{"source": "a.md"}], embeddings=np.array([[1.0, 0.1, 0.0]]))
+
+            first = await store.similarity_search("pergunta", with_vectors=True)
+            cached = await store.similarity_search("Pergunta?", with_vectors=True)
+            plain = await store.similarity_search("pergunta")
+            await store.add_documents(["b"], [{"source": "b.md"}], embeddings=np.array([[1.0, 0.0, 0.1]]))
+            return first, cached, plain, await store.similarity_search("pergunta")
+
+        first, cached, plain, after_write = asyncio.run(scenario())
+
+        np.testing.assert_allclose(first[0]["vector"], cached[0]["vector"], rtol=1e-6)
+        assert "vector" not in plain[0]
+        assert len(after_write) == 2
+        # "Pergunta?" reaproveita a busca; with_vectors e a nova versão da collection, não
+        assert embedder.calls == 3
@@ -0,0 +1,117 @@
+import re
+import zlib
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.config import settings
+from graph import simple_router as simple_router_module
+from graph.semantic_router import SemanticRouter
+from graph.simple_router import simple_router
+from tools.vector_search import VectorSearchTool
+from tools.schemas import RetrievedDocument
+
+EXAMPLES = {
+    "weather": ["tempo chuva hoje", "temperatura graus calor", "previsão do tempo", "vai chover frio"],
+    "search": ["notícias recentes", "pesquisar na internet", "últimas notícias eleição", "buscar na web"],
+    "rag": ["o que é rag", "como funcionam embeddings", "solução erro indexação documentos", "configurar qdrant chunks"],
+}
+
+class FakeEmbedder:
+    """Bag of words com hashing: determinístico e sem modelo"""
+    cache_namespace = "fake"
+
+    def __init__(self):
+        self.batches = 0
+        self.queries = 0
+
+    def _vector(self, text):
+        vector = np.zeros(512, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % 512] += 1.0
+        return vector
+
+    def embed_texts_array(self, texts):
+        self.batches += 1
+        return np.stack([self._vector(text) for text in texts])
+
+    def embed_query_array(self, query):
+        self.queries += 1
+        return self._vector(query)
+
+class FakeRegistry:
+    def __init__(self, embedder):
+        self.embedder = embedder
+
+    def get(self, model_name=None):
+        return self.embedder
+
+@pytest.fixture
+def embedder():
+    return FakeEmbedder()
+
+@pytest.fixture
+def router(embedder, monkeypatch):
+    monkeypatch.setattr(settings, "semantic_router_enabled", True)
+    router = SemanticRouter(EXAMPLES, margin=0.1, min_score=0.1, registry=FakeRegistry(embedder))
+    monkeypatch.setattr(simple_router_module, "semantic_router", router)
+    return router
+
+class TestSemanticRouter:
+    def test_centroids_built_once_in_one_batch(self, router, embedder):
+        router.warmup()
+        decisions = [router.classify(q) for q in ("vai chover hoje?", "últimas notícias da eleição", "o que é rag?")]
+
+        assert [decision.intent for decision in decisions] == ["weather", "search", "rag"]
+        assert router.centroids().shape == (3, 512)
+        assert embedder.batches == 1
+        assert embedder.queries == 3
+
+    def test_low_margin_defers_to_keyword_rules(self, router):
+        decision = router.classify("tempo de notícias")
+
+        assert decision.intent is None
+        assert decision.margin < 0.1
+        assert decision.embedding is not None
+
+    def test_model_failure_falls_back(self, monkeypatch):
+        monkeypatch.setattr(settings, "semantic_router_enabled", True)
+
+        class BrokenRegistry:
+            calls = 0
+
+            def get(self, model_name=None):
+                BrokenRegistry.calls += 1
+                raise RuntimeError("modelo indisponível")
+
+        router = SemanticRouter(EXAMPLES, registry=BrokenRegistry())
+
+        assert router.try_classify("vai chover?") is None
+        assert router.try_classify("vai chover?") is None
+        # Depois da falha, o modelo não é tentado de novo a cada consulta
+        assert BrokenRegistry.calls == 1
+
+class TestSimpleRouterIntent:
+    def test_intent_beats_substring_rules(self, router):
+        # "sol" em "solução" mandaria para o agent de tempo pelas palavras-chave
+        agent, name, embedding = simple_router._route("Qual a solução para o erro de indexação?")
+
+        assert name == "rag"
+        assert agent is simple_router.rag_agent
+        assert embedding is not None
+
+    def test_keyword_rules_below_margin(self, router):
+        _, name, _ = simple_router._route("tempo de notícias")
+
+        assert name == "weather"
+
+    def test_routing_embedding_reused_for_retrieval(self, router, embedder):
+        documents = [RetrievedDocument(id="1", text="Trecho", score=0.8)]
+        with patch.object(VectorSearchTool, "search", return_value=documents) as search, \
+             patch("agents.rag_agent.llm_manager") as mock_llm:
+            mock_llm.generate_response.return_value = ("Resposta", True)
+            result = simple_router.process_query("como funcionam embeddings no rag?", {"use_answer_cache": False})
+
+        assert result["agent_used"] == "rag"
+        query_vector = search.call_args.kwargs["query_vector"]
+        np.testing.assert_array_equal(query_vector, embedder._vector("como funcionam embeddings no rag?"))
+        assert embedder.queries == 1
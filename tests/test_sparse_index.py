@@ -0,0 +1,81 @@
+import numpy as np
+from vector_db.local_index import LocalVectorStore
+from vector_db.points import point_id
+from vector_db.sparse_index import SparseIndex, reciprocal_rank_fusion, hybrid_search, get_sparse_index, tokenize
+
+TEXTS = [
+    "O produto XPTO-4417 tem garantia de dois anos",
+    "Embeddings representam textos como vetores densos",
+    "Garantia estendida disponível para todos os produtos",
+    "RAG combina recuperação de documentos com geração",
+]
+
+class TestSparseIndex:
+    def test_tokenize_strips_accents_and_case(self):
+        assert tokenize("Recuperação de INFORMAÇÃO") == ["recuperacao", "de", "informacao"]
+
+    def test_bm25_ranks_exact_terms(self, tmp_path):
+        index = SparseIndex(str(tmp_path / "docs.json"))
+        index.add([f"id{i}" for i in range(len(TEXTS))], TEXTS)
+
+        results = index.search("xpto-4417", k=3)
+        assert results[0][0] == "id0"
+        assert {pid for pid, _ in index.search("garantia", k=5)} == {"id0", "id2"}
+
+    def test_persistence_and_remove_stale(self, tmp_path):
+        path = tmp_path / "docs.json"
+        index = SparseIndex(str(path))
+        index.add(["a", "b"], ["codigo ABC", "codigo DEF"], [{"source": "f.md"}, {"source": "f.md"}])
+        index.remove_stale({"f.md": ["a"]})
+        index.save()
+
+        reopened = SparseIndex(str(path))
+        assert len(reopened) == 1
+        assert [pid for pid, _ in reopened.search("codigo", k=5)] == ["a"]
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+        assert [pid for pid, _ in fused] == ["a", "c", "b"]
+
+class TestHybridSearch:
+    def test_exact_term_found_with_small_k(self, tmp_path, monkeypatch):
+        metadatas = [{"source": "kb.md", "chunk_id": i} for i in range(len(TEXTS))]
+        store = LocalVectorStore(collection_name="hybrid", directory=str(tmp_path))
+        # Vetores em que o documento do código é o menos parecido com a query
+        vectors = np.eye(len(TEXTS), dtype=np.float32)
+        store.add_documents(TEXTS, metadatas, embeddings=vectors)
+
+        class FakeEmbedder:
+            def embed_query_array(self, query):
+                return np.array([0.0, 1.0, 0.5, 0.5], dtype=np.float32)
+
+        monkeypatch.setattr(LocalVectorStore, "embedder", FakeEmbedder())
+        sparse = get_sparse_index("hybrid")
+        sparse.add([point_id(t, m) for t, m in zip(TEXTS, metadatas)], TEXTS, metadatas)
+
+        dense = store.similarity_search("XPTO-4417", k=2, score_threshold=0.3)
+        assert "XPTO-4417" not in " ".join(r["text"] for r in dense)
+
+        results = hybrid_search(store, "XPTO-4417", k=2, score_threshold=0.3)
+        assert len(results) == 2
+        assert any("XPTO-4417" in r["text"] for r in results)
+        assert set(results[0]) == {"id", "text", "score", "metadata"}
+
+    def test_filter_applies_before_sparse_cut(self, tmp_path, monkeypatch):
+        # 30 chunks de a.md dominam o BM25; os de b.md ficam abaixo dos candidatos
+        texts = [f"garantia garantia item {i}" for i in range(30)] + [f"garantia do produto {i} com texto longo extra" for i in range(2)]
+        metadatas = [{"source": "a.md", "chunk_id": i} for i in range(30)] + [{"source": "b.md", "chunk_id": i} for i in range(2)]
+        store = LocalVectorStore(collection_name="hybrid_filter", directory=str(tmp_path))
+        store.add_documents(texts, metadatas, embeddings=np.tile(np.array([[1.0, 0.0]], dtype=np.float32), (32, 1)))
+
+        class FakeEmbedder:
+            def embed_query_array(self, query):
+                return np.array([0.0, 1.0], dtype=np.float32)
+
+        monkeypatch.setattr(LocalVectorStore, "embedder", FakeEmbedder())
+        sparse = get_sparse_index("hybrid_filter")
+        sparse.add([point_id(t, m) for t, m in zip(texts, metadatas)], texts, metadatas)
+        assert all(pid != point_id(texts[30], metadatas[30]) for pid, _ in sparse.search("garantia", k=5))
+
+        results = hybrid_search(store, "garantia", k=2, score_threshold=0.5, candidates=5, filters={"source": "b.md"})
+        assert sorted(r["text"] for r in results) == sorted(texts[30:])
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from unittest.mock import patch
+from agents.base import AgentResponse
+from graph.speculative import HedgeBudget, race
+from graph.workflow import rag_workflow
+from tools.http import get_async_client
+
+def agent(content, confidence, delay, log=None):
+    async def run():
+        if log is not None:
+            log.append(content)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(f"{content} cancelado")
+            raise
+        return AgentResponse(content=content, confidence=confidence)
+    return run
+
+class TestRace:
+    def test_fast_confident_hedge_wins_and_primary_is_cancelled(self):
+        log = []
+        result = asyncio.run(race("rag", agent("rag", 0.8, 1.0, log), "search", agent("search", 0.7, 0.05, log),
+                                  confidence=0.5, delay=0.0))
+
+        assert result.winner == "search"
+        assert result.hedged
+        assert result.cancelled == ["rag"]
+        assert "rag cancelado" in log
+        assert result.seconds < 0.5
+
+    def test_primary_within_delay_skips_hedge(self):
+        log = []
+        result = asyncio.run(race("rag", agent("rag", 0.8, 0.01, log), "search", agent("search", 0.7, 0.01, log),
+                                  confidence=0.5, delay=0.5))
+
+        assert result.winner == "rag"
+        assert not result.hedged
+        assert log == ["rag"]
+
+    def test_weak_primary_loses_to_confident_hedge(self):
+        result = asyncio.run(race("rag", agent("rag", 0.3, 0.01), "search", agent("search", 0.7, 0.1),
+                                  confidence=0.5, delay=0.0))
+
+        assert result.winner == "search"
+        assert result.response.content == "search"
+
+    def test_budget_limits_hedges(self):
+        budget = HedgeBudget(ratio=0.0, burst=1.0)
+
+        def run():
+            return asyncio.run(race("rag", agent("rag", 0.3, 0.01), "search", agent("search", 0.7, 0.01),
+                                    confidence=0.5, delay=0.0, budget=budget))
+
+        assert run().hedged
+        second = run()
+        assert not second.hedged
+        assert second.winner == "rag"
+
+class TestSpeculativeWorkflow:
+    def test_ambiguous_query_races_agents(self):
+        nodes = rag_workflow.nodes
+        with patch.object(nodes.rag_agent, "aprocess", new=lambda q, c: agent("rag", 0.8, 1.0)()), \
+             patch.object(nodes.search_agent, "aprocess", new=lambda q, c: agent("web", 0.7, 0.05)()), \
+             patch.object(nodes.search_agent, "process") as serial_search:
+            start = time.monotonic()
+            result = rag_workflow.process_query("Quem ganhou a final ontem?", {"speculative": True})
+
+        assert result["agent_used"] == "search"
+        assert result["response"] == "web"
+        assert result["tool_calls"][-1]["tool"] == "speculative"
+        assert result["tool_calls"][-1]["cancelled"] == ["rag"]
+        assert time.monotonic() - start < 0.9
+        serial_search.assert_not_called()
+
+    def test_races_share_one_event_loop(self):
+        nodes = rag_workflow.nodes
+        seen = []
+
+        async def web(query, context):
+            seen.append((asyncio.get_running_loop(), get_async_client()))
+            return AgentResponse(content="web", confidence=0.7)
+
+        with patch.object(nodes.rag_agent, "aprocess", new=lambda q, c: agent("rag", 0.8, 1.0)()), \
+             patch.object(nodes.search_agent, "aprocess", new=web):
+            for _ in range(2):
+                rag_workflow.process_query("Quem ganhou a final ontem?", {"speculative": True})
+
+        # Mesmo loop nas duas consultas: o cliente HTTP (e seu pool) é reaproveitado
+        (first_loop, first_client), (second_loop, second_client) = seen
+        assert first_loop is second_loop
+        assert first_client is second_client
@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.config import settings
+from tools import sql_schema
+from tools.sql_query import SQLQueryTool
+from tools.sql_schema import SchemaCache, get_engine, schema_fingerprint
+from tools.sql_translator import QueryPlan, SQLTranslator, execute_plan, plan_cache, question_template, read_only
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'loja.db'}"
+    with get_engine(url).begin() as connection:
+        connection.execute(text("CREATE TABLE produtos (id INTEGER PRIMARY KEY, nome TEXT, preco REAL, estoque INTEGER)"))
+        connection.execute(text(
+            "INSERT INTO produtos (nome, preco, estoque) VALUES "
+            "('Notebook', 2500.0, 15), ('Mouse', 89.9, 50), ('Teclado', 299.99, 25)"
+        ))
+    plan_cache.clear()
+    return url
+
+class TestSchemaCache:
+    def test_engine_shared_per_url(self, database_url):
+        assert get_engine(database_url) is get_engine(database_url)
+
+    def test_reflects_only_when_schema_changes(self, database_url):
+        engine = get_engine(database_url)
+        cache = SchemaCache(engine, check_interval=0)
+
+        with patch.object(sql_schema, "SQLDatabase", wraps=sql_schema.SQLDatabase) as database:
+            assert cache.get().table_names == ["produtos"]
+            cache.get()
+            assert database.call_count == 1
+
+            with engine.begin() as connection:
+                connection.execute(text("CREATE TABLE vendas (id INTEGER PRIMARY KEY, produto_id INTEGER)"))
+            info = cache.get()
+
+            assert database.call_count == 2
+            assert info.table_names == ["produtos", "vendas"]
+            assert "CREATE TABLE vendas" in info.table_info
+
+    def test_check_interval_skips_fingerprint(self, database_url):
+        cache = SchemaCache(get_engine(database_url), check_interval=60)
+        cache.get()
+
+        with patch.object(sql_schema, "schema_fingerprint", wraps=schema_fingerprint) as fingerprint:
+            cache.get()
+            assert fingerprint.call_count == 0
+
+            cache.invalidate()
+            cache.get()
+            assert fingerprint.call_count == 1
+
+class TestTranslation:
+    COLUMNS = {"produtos": [("id", "number"), ("nome", "text"), ("preco", "number"), ("estoque", "number")]}
+
+    def translate(self, question):
+        template, values = question_template(question)
+        plan = SQLTranslator(self.COLUMNS).translate(template)
+        return plan.sql, plan.params(values)
+
+    def test_literals_become_parameters(self):
+        template, values = question_template("Quais produtos custam menos de 89,90?")
+
+        assert template == "quais produtos custam menos de __n0__"
+        assert values == [89.9]
+
+    def test_comparison_and_count(self):
+        sql, params = self.translate("Quantos produtos têm estoque acima de 20?")
+
+        assert sql == 'SELECT COUNT(*) AS total FROM "produtos" WHERE "estoque" > :p0'
+        assert params == {"p0": 20}
+
+    def test_quoted_text_and_superlative(self):
+        assert self.translate("Qual o produto mais caro?")[0] == 'SELECT * FROM "produtos" ORDER BY "preco" DESC LIMIT 1'
+        sql, params = self.translate("Quanto custa o produto 'mouse'?")
+        assert sql == 'SELECT * FROM "produtos" WHERE LOWER("nome") LIKE LOWER(:p0)'
+        assert params == {"p0": "%mouse%"}
+
+    def test_unknown_table(self):
+        template, _ = question_template("Como está o tempo hoje?")
+        assert SQLTranslator(self.COLUMNS).translate(template) is None
+
+class TestExecution:
+    def test_same_question_shape_reuses_plan(self, database_url):
+        tool = SQLQueryTool(database_url=database_url)
+
+        with patch.object(SQLTranslator, "translate", autospec=True, side_effect=SQLTranslator.translate) as translate:
+            first = tool._run("Quantos produtos custam menos de 100?")
+            second = tool._run("quantos produtos custam menos de 1000")
+
+        assert translate.call_count == 1
+        assert "| 1 |" in first
+        assert "| 2 |" in second
+        assert plan_cache.hits == 1
+
+    def test_row_cap_streams_only_needed_rows(self, database_url, monkeypatch):
+        engine = get_engine(database_url)
+        with engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO produtos (nome, preco, estoque) "
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000) "
+                "SELECT 'Item ' || i, i, i FROM n"
+            ))
+        monkeypatch.setattr(settings, "sql_fetch_batch", 10)
+
+        columns, rows, truncated = execute_plan(engine, QueryPlan("SELECT * FROM produtos"), [], row_cap=25)
+
+        assert columns == ["id", "nome", "preco", "estoque"]
+        assert len(rows) == 25
+        assert truncated
+
+    def test_statement_timeout(self, database_url):
+        endless = QueryPlan(
+            "SELECT COUNT(*) FROM (WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT i FROM n)"
+        )
+        with pytest.raises(OperationalError, match="interrupted"):
+            execute_plan(get_engine(database_url), endless, [], timeout=0.2)
+
+    def test_read_only(self, database_url):
+        engine = get_engine(database_url)
+        with pytest.raises(ValueError):
+            execute_plan(engine, QueryPlan("DELETE FROM produtos"), [])
+
+        with engine.connect() as connection:
+            with pytest.raises(OperationalError, match="readonly"):
+                with read_only(connection, timeout=1.0) as connection:
+                    connection.execute(text("DELETE FROM produtos"))
+
+        # A conexão volta ao pool aceitando escrita
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE produtos SET estoque = 0 WHERE nome = 'Mouse'"))
+
+class TestSQLQueryTool:
+    def test_run_uses_cached_schema(self, database_url):
+        tool = SQLQueryTool(database_url=database_url)
+        result = tool._run("Quais produtos existem?")
+
+        assert "produtos" in result
+        assert "Notebook" in result
+
+    def test_mock_mode_without_database(self):
+        tool = SQLQueryTool(database_url="sqlite:////nonexistent/dir/loja.db")
+
+        assert tool.schema_cache is None
+        assert "Dados simulados" in tool._run("Quais produtos existem?")
@@ -1,8 +1,11 @@
 import pytest
 from unittest.mock import Mock, patch
 from tools.vector_search import VectorSearchTool
-from tools.web_search import WebSearchTool
+from tools.web_search import WebSearchTool, search_cache
+from tools.http import DeadlineExceeded
 from tools.weather_api import WeatherTool
+from tools.schemas import RetrievedDocument, stack_vectors
+import numpy as np
 
 class TestVectorSearchTool:
     def setup_method(self):
@@ -19,6 +22,30 @@ class TestVectorSearchTool:
         assert "Test document" in result
         assert "0.800" in result
 
+    @patch('tools.vector_search.qdrant_manager')
+    def test_vector_search_with_filters(self, mock_qdrant):
+        mock_qdrant.similarity_search.return_value = []
+        
+        self.tool._run("test query", filters={"file_type": ".md"})
+        
+        assert mock_qdrant.similarity_search.call_args.kwargs["filters"] == {"file_type": ".md"}
+
+    @patch('tools.vector_search.qdrant_manager')
+    def test_search_returns_documents(self, mock_qdrant):
+        mock_qdrant.similarity_search.return_value = [
+            {"id": "p1", "text": "Test document", "score": 0.8,
+             "metadata": {"source": "data/documents/a.md"}, "vector": np.ones(4, dtype=np.float32)}
+        ]
+        
+        documents = self.tool.search("test query", with_vectors=True)
+        
+        assert mock_qdrant.similarity_search.call_args.kwargs["with_vectors"] is True
+        assert isinstance(documents[0], RetrievedDocument)
+        assert documents[0].id == "p1"
+        assert documents[0].source == "data/documents/a.md"
+        assert stack_vectors(documents).shape == (1, 4)
+        assert "vector" not in documents[0].model_dump()
+
     @patch('tools.vector_search.qdrant_manager')
     def test_vector_search_no_results(self, mock_qdrant):
         mock_qdrant.similarity_search.return_value = []
@@ -30,8 +57,9 @@ class TestVectorSearchTool:
 class TestWebSearchTool:
     def setup_method(self):
         self.tool = WebSearchTool()
+        search_cache.clear()
     
-    @patch('requests.get')
+    @patch('tools.web_search.fetch')
     def test_web_search_success(self, mock_get):
         mock_response = Mock()
         mock_response.content = "<html><div class='result'><h2>Test Title</h2><a class='result__snippet'>Test snippet</a></div></html>"
@@ -41,6 +69,24 @@ class TestWebSearchTool:
         
         assert "Test Title" in result or "Nenhum resultado encontrado" in result
 
+    @patch('tools.web_search.fetch')
+    def test_web_search_cached(self, mock_get):
+        mock_response = Mock()
+        mock_response.content = "<html><div class='result'><h2>Test Title</h2><a class='result__snippet'>Test snippet</a></div></html>"
+        mock_get.return_value = mock_response
+        
+        self.tool._run("Test query")
+        result = self.tool._run("test  query")
+        
+        assert "Test Title" in result
+        assert mock_get.call_count == 1
+
+    @patch('tools.web_search.fetch', side_effect=DeadlineExceeded("prazo"))
+    def test_web_search_timeout(self, mock_get):
+        result = self.tool._run("test query")
+        
+        assert "Tempo esgotado" in result
+
 class TestWeatherTool:
     def setup_method(self):
         self.tool = WeatherTool()
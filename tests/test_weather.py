@@ -0,0 +1,128 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from app.config import settings
+from agents.weather_agent import WeatherAgent
+from graph.simple_router import simple_router
+from tools.weather_api import WeatherTool, weather_cache
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    calls = {}
+    delay = 0.2
+
+    def do_GET(self):
+        city = parse_qs(urlparse(self.path).query)["q"][0]
+        StubWeatherHandler.calls[city] = StubWeatherHandler.calls.get(city, 0) + 1
+        time.sleep(StubWeatherHandler.delay)
+        if city == "Atlantida":
+            status, body = 404, {"cod": "404", "message": "city not found"}
+        else:
+            status, body = 200, {
+                "name": city,
+                "weather": [{"description": "céu limpo"}],
+                "main": {"temp": 25.0, "feels_like": 26.0, "temp_min": 20.0, "temp_max": 28.0,
+                         "humidity": 60, "pressure": 1012},
+                "wind": {"speed": 3.0},
+                "coord": {"lat": -23.5, "lon": -46.6}
+            }
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def weather_server(monkeypatch):
+    StubWeatherHandler.calls = {}
+    weather_cache.clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubWeatherHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setattr(settings, "openweather_url", f"http://127.0.0.1:{httpd.server_address[1]}/weather")
+    yield StubWeatherHandler.calls
+    httpd.shutdown()
+    httpd.server_close()
+    weather_cache.clear()
+
+class TestWeatherTool:
+    def test_concurrent_lookups_are_coalesced(self, weather_server):
+        tool = WeatherTool()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: tool._run("São Paulo"), range(8)))
+
+        assert all("Tempo em São Paulo" in result for result in results)
+        assert weather_server == {"São Paulo": 1}
+
+    def test_cache_keyed_by_normalized_city(self, weather_server):
+        tool = WeatherTool()
+        tool._run("São Paulo")
+        tool._run("  são   paulo ")
+        tool._run("São Paulo", country_code="BR")
+
+        assert weather_server == {"São Paulo": 1, "São Paulo,BR": 1}
+
+    def test_not_found_message(self, weather_server):
+        result = WeatherTool()._run("Atlantida")
+
+        assert "city not found" in result
+
+class TestWeatherAgentMultiCity:
+    def test_cities_fetched_concurrently(self, weather_server):
+        agent = WeatherAgent()
+        start = time.monotonic()
+        response = agent.process("Como está o tempo em Curitiba, Recife e Natal?")
+        elapsed = time.monotonic() - start
+
+        assert [call["city"] for call in response.tool_calls] == ["Curitiba", "Recife", "Natal"]
+        for city in ("Curitiba", "Recife", "Natal"):
+            assert f"Tempo em {city}" in response.content
+        # Em paralelo: bem menos que 3 x o atraso do servidor
+        assert elapsed < 2 * StubWeatherHandler.delay
+
+class TestAsyncPipeline:
+    def test_async_lookups_are_coalesced(self, weather_server):
+        tool = WeatherTool()
+
+        async def run():
+            return await asyncio.gather(*[tool._arun("São Paulo") for _ in range(8)])
+
+        results = asyncio.run(run())
+
+        assert all("Tempo em São Paulo" in result for result in results)
+        assert weather_server == {"São Paulo": 1}
+
+    def test_router_multiplexes_concurrent_turns(self, weather_server):
+        cities = [f"Cidade{i}" for i in range(30)]
+
+        async def run():
+            return await asyncio.gather(*[
+                simple_router.aprocess_query(f"Como está o tempo em {city}?") for city in cities
+            ])
+
+        start = time.monotonic()
+        results = asyncio.run(run())
+        elapsed = time.monotonic() - start
+
+        assert [result["agent_used"] for result in results] == ["weather"] * len(cities)
+        for city, result in zip(cities, results):
+            assert f"Tempo em {city}" in result["response"]
+        # Todas as conversas em um só event loop, sem esperar uma pela outra
+        assert elapsed < 10 * StubWeatherHandler.delay
+
+    def test_tool_timeout(self, weather_server, monkeypatch):
+        monkeypatch.setattr(StubWeatherHandler, "delay", 1.0)
+        monkeypatch.setattr(settings, "tool_timeout_weather_query", 0.2)
+
+        start = time.monotonic()
+        response = asyncio.run(WeatherAgent().aprocess("Como está o tempo em Curitiba?"))
+
+        assert "Tempo esgotado" in response.content
+        assert time.monotonic() - start < 0.8
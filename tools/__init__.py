@@ -6,10 +6,12 @@ from .vector_search import VectorSearchTool
 from .web_search import WebSearchTool
 from .sql_query import SQLQueryTool
 from .weather_api import WeatherTool
+from .schemas import RetrievedDocument
 
 __all__ = [
     "VectorSearchTool",
     "WebSearchTool", 
     "SQLQueryTool",
-    "WeatherTool"
+    "WeatherTool",
+    "RetrievedDocument"
 ]
\ No newline at end of file
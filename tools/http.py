@@ -0,0 +1,335 @@
+"""Camada HTTP compartilhada pelas ferramentas.
+
+- uma ``requests.Session`` com pool de conexões keep-alive;
+- timeouts de conexão/leitura sempre definidos;
+- retries com backoff, limitados por um prazo total (``deadline``): uma
+  chamada nunca passa do prazo, mesmo com o servidor mandando o corpo aos
+  poucos;
+- ``TTLCache`` com stale-while-revalidate e coalescência de chamadas
+  simultâneas para resultados de APIs externas.
+
+``afetch`` é a versão assíncrona de ``fetch`` (httpx, um cliente por event
+loop), com as mesmas regras de retry e prazo.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from app.config import settings
+import requests
+import threading
+import asyncio
+import httpx
+import random
+import time
+import weakref
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class DeadlineExceeded(requests.Timeout):
+    """A requisição (com retries) não terminou dentro do prazo total"""
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=settings.http_pool_size, pool_maxsize=settings.http_pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+# Sessão global: conexões reaproveitadas entre chamadas (o pool do urllib3 é thread-safe)
+session = _create_session()
+
+def fetch(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    deadline: Optional[float] = None,
+    retries: Optional[int] = None
+) -> requests.Response:
+    """GET com timeouts, retries e prazo total; o corpo já vem lido em ``response.content``.
+
+    Erros de conexão, timeouts e status 429/5xx são repetidos com backoff
+    enquanto houver tentativas e prazo; outros status são devolvidos a quem
+    chamou.
+    """
+    deadline = deadline or settings.http_deadline
+    retries = settings.http_retries if retries is None else retries
+    expires = time.monotonic() + deadline
+
+    for attempt in range(retries + 1):
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            response = session.get(
+                url,
+                params=params,
+                headers=headers,
+                stream=True,
+                timeout=(min(settings.http_connect_timeout, remaining), min(settings.http_read_timeout, remaining))
+            )
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                _read_body(response, expires)
+                return response
+            response.close()
+            print(f"   ⚠️ HTTP {response.status_code} em {url}; nova tentativa")
+        except DeadlineExceeded:
+            raise
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            print(f"   ⚠️ Falha HTTP em {url} ({type(e).__name__}); nova tentativa")
+        time.sleep(min(settings.http_backoff * (2 ** attempt) * (1 + random.random()), max(0.0, expires - time.monotonic())))
+
+    raise DeadlineExceeded(f"Prazo de {deadline:.1f}s esgotado para {url}")
+
+def _read_body(response: requests.Response, expires: float):
+    """Lê o corpo em blocos, abortando se o prazo total acabar.
+
+    ``read1`` (urllib3 2.x) devolve o que já chegou, sem esperar o bloco
+    inteiro: um servidor mandando poucos bytes por vez não segura a leitura.
+    """
+    raw = response.raw
+    read = getattr(raw, "read1", None) or raw.read
+    chunks = []
+    try:
+        while True:
+            chunk = read(16384, decode_content=True)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if time.monotonic() > expires:
+                raise DeadlineExceeded(f"Prazo esgotado lendo a resposta de {response.url}")
+    except ReadTimeoutError as e:
+        raise requests.Timeout(e)
+    except ProtocolError as e:
+        raise requests.ConnectionError(e)
+    finally:
+        response.close()
+    response._content = b"".join(chunks)
+
+# Um cliente assíncrono (e pool de conexões) por event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_async_client() -> httpx.AsyncClient:
+    """Cliente httpx do event loop atual"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=settings.http_async_pool_size,
+                                max_keepalive_connections=settings.http_pool_size),
+            follow_redirects=True
+        )
+    return client
+
+async def close_async_client():
+    """Fecha o cliente do event loop atual (ex.: no shutdown da aplicação)"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+async def afetch(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    deadline: Optional[float] = None,
+    retries: Optional[int] = None
+) -> httpx.Response:
+    """Versão assíncrona de ``fetch``.
+
+    Cada tentativa (incluindo a leitura do corpo) é limitada ao prazo que
+    resta. Erros finais viram as exceções do ``requests`` (``Timeout``,
+    ``ConnectionError``), para as ferramentas tratarem os dois caminhos igual.
+    """
+    deadline = deadline or settings.http_deadline
+    retries = settings.http_retries if retries is None else retries
+    loop = asyncio.get_running_loop()
+    expires = loop.time() + deadline
+    client = get_async_client()
+
+    for attempt in range(retries + 1):
+        remaining = expires - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            timeout = httpx.Timeout(min(settings.http_read_timeout, remaining),
+                                    connect=min(settings.http_connect_timeout, remaining))
+            response = await asyncio.wait_for(
+                client.get(url, params=params, headers=headers, timeout=timeout), remaining
+            )
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                return response
+            print(f"   ⚠️ HTTP {response.status_code} em {url}; nova tentativa")
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Prazo de {deadline:.1f}s esgotado para {url}")
+        except httpx.TimeoutException as e:
+            if attempt == retries:
+                raise requests.Timeout(e) from e
+            print(f"   ⚠️ Falha HTTP em {url} ({type(e).__name__}); nova tentativa")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise requests.ConnectionError(e) from e
+            print(f"   ⚠️ Falha HTTP em {url} ({type(e).__name__}); nova tentativa")
+        await asyncio.sleep(min(settings.http_backoff * (2 ** attempt) * (1 + random.random()), max(0.0, expires - loop.time())))
+
+    raise DeadlineExceeded(f"Prazo de {deadline:.1f}s esgotado para {url}")
+
+class TTLCache:
+    """Cache em memória com TTL e stale-while-revalidate.
+
+    Entradas com até ``ttl`` segundos são servidas direto. Depois disso, e
+    por mais ``stale_ttl`` segundos, o valor antigo continua sendo servido
+    enquanto uma única atualização roda em segundo plano. Misses simultâneos
+    da mesma chave compartilham uma única chamada a ``fetch_fn``.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_items: int = 256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_items = max_items
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing = set()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}  # buscas assíncronas em voo
+        self._background: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ttlcache-refresh")
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """(valor, ainda fresco?) ou ``None`` se ausente/expirado de vez"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age > self.ttl + self.stale_ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], age <= self.ttl
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key: Hashable, fetch_fn: Callable[[], Any]) -> Any:
+        """Valor em cache ou buscado agora; valores velhos disparam atualização em segundo plano"""
+        cached = self.get(key)
+        if cached is None:
+            return self._fetch_once(key, fetch_fn)
+
+        value, fresh = cached
+        if not fresh:
+            self._refresh(key, fetch_fn)
+        return value
+
+    def _fetch_once(self, key: Hashable, fetch_fn: Callable[[], Any]) -> Any:
+        """Busca a chave; quem chegar enquanto a busca está em voo espera o mesmo resultado"""
+        with self._lock:
+            # Outra thread pode ter acabado de gravar a chave
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                return entry[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch_fn()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, key: Hashable, fetch_fn: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.set(key, fetch_fn())
+            except Exception as e:
+                # Mantém o valor antigo; a próxima leitura tenta de novo
+                print(f"   ⚠️ Falha ao atualizar cache: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    async def aget_or_fetch(self, key: Hashable, fetch_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Versão assíncrona de ``get_or_fetch`` (``fetch_fn`` devolve uma corrotina)"""
+        cached = self.get(key)
+        if cached is None:
+            return await self._afetch_once(key, fetch_fn)
+
+        value, fresh = cached
+        if not fresh:
+            self._arefresh(key, fetch_fn)
+        return value
+
+    async def _afetch_once(self, key: Hashable, fetch_fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                return entry[1]
+            task = self._tasks.get(key)
+            if task is None or task.get_loop() is not loop:
+                task = self._tasks[key] = loop.create_task(self._afill(key, fetch_fn))
+                # Marca a exceção como lida mesmo se todos que esperavam desistirem
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        # shield: quem esperava pode ser cancelado (timeout) sem derrubar a busca dos outros
+        return await asyncio.shield(task)
+
+    async def _afill(self, key: Hashable, fetch_fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch_fn()
+            self.set(key, value)
+            return value
+        finally:
+            with self._lock:
+                if self._tasks.get(key) is asyncio.current_task():
+                    del self._tasks[key]
+
+    def _arefresh(self, key: Hashable, fetch_fn: Callable[[], Awaitable[Any]]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def run():
+            try:
+                self.set(key, await fetch_fn())
+            except Exception as e:
+                print(f"   ⚠️ Falha ao atualizar cache: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,45 @@
+"""Tipos estruturados retornados pelas ferramentas"""
+
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+import numpy as np
+
+class RetrievedDocument(BaseModel):
+    """Um trecho recuperado da base de conhecimento"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    id: Optional[str] = None
+    text: str
+    score: float
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    retrieval_score: Optional[float] = None  # score da busca, quando ``score`` vem do reranker
+    vector: Optional[np.ndarray] = Field(default=None, exclude=True, repr=False)
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> "RetrievedDocument":
+        """Converte um resultado de similarity_search/hybrid_search/mmr_results"""
+        return cls(
+            id=result.get("id"),
+            text=result["text"],
+            score=result["score"],
+            metadata=result.get("metadata", {}),
+            retrieval_score=result.get("retrieval_score"),
+            vector=result.get("vector")
+        )
+
+    @property
+    def source(self) -> Optional[str]:
+        return self.metadata.get("source")
+
+def format_documents(documents: List[RetrievedDocument]) -> str:
+    """Texto numerado com os trechos, usado como contexto do LLM"""
+    return "\n".join(
+        f"{i}. (Score: {document.score:.3f}) {document.text}"
+        for i, document in enumerate(documents, 1)
+    )
+
+def stack_vectors(documents: List[RetrievedDocument]) -> Optional[np.ndarray]:
+    """Matriz (n, dim) dos vetores, se todos os documentos os tiverem"""
+    if not documents or any(document.vector is None for document in documents):
+        return None
+    return np.stack([document.vector for document in documents]).astype(np.float32, copy=False)
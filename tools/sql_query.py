@@ -1,12 +1,10 @@
 from langchain.tools import BaseTool
-from typing import Type, Optional
+from typing import Type, Optional, Any
 from pydantic import BaseModel, Field
 from app.config import settings
-
-try:
-    from langchain_community.utilities import SQLDatabase
-except ImportError:
-    from langchain.sql_database import SQLDatabase
+from tools.sql_schema import SchemaCache, get_engine
+from tools.sql_translator import SQLTranslator, execute_plan, plan_cache, question_template
+import asyncio
 
 class SQLQueryInput(BaseModel):
     question: str = Field(description="Pergunta em linguagem natural para consultar o banco")
@@ -15,28 +13,37 @@ class SQLQueryTool(BaseTool):
     name = "sql_query"
     description = "Executa consultas SQL baseadas em perguntas em linguagem natural. Retorna informações sobre produtos, vendas e dados estruturados."
     args_schema: Type[BaseModel] = SQLQueryInput
+    schema_cache: Optional[Any] = None  # SchemaCache; None = modo informativo
     
-    def __init__(self):
+    def __init__(self, database_url: Optional[str] = None):
         super().__init__()
-        self.db = None
         try:
-            self.db = SQLDatabase.from_uri(settings.postgres_url)
+            # Engine com pool compartilhado; o esquema é refletido uma vez e fica em cache
+            self.schema_cache = SchemaCache(get_engine(database_url))
+            self.schema_cache.get()
         except Exception as e:
+            self.schema_cache = None
             print(f"⚠️  PostgreSQL não disponível: {e}")
             print("   Tool SQL funcionará em modo informativo")
     
     def _run(self, question: str) -> str:
         """Executa consulta SQL ou retorna informações"""
         
-        if not self.db:
+        if not self.schema_cache:
             return self._mock_response(question)
         
         try:
-            # Obtém informações das tabelas
-            tables_info = self.db.get_table_info()
+            # Metadados em cache (refeitos só quando o esquema muda)
+            schema = self.schema_cache.get()
+            answer = self._execute(question, schema)
+            if answer is not None:
+                return answer
+
+            # Pergunta que as regras não traduzem: mostra o esquema
+            tables_info = schema.table_info
             
             # Lista de tabelas disponíveis
-            table_names = self.db.get_usable_table_names()
+            table_names = schema.table_names
             
             response = f"""**Informações do Banco de Dados:**
 
@@ -53,6 +60,39 @@ Sua pergunta: "{question}"
         
         except Exception as e:
             return f"Erro ao consultar banco de dados: {str(e)}"
+
+    async def _arun(self, question: str) -> str:
+        """Versão assíncrona: o driver (psycopg2) é bloqueante, então a consulta roda numa thread"""
+        return await asyncio.to_thread(self._run, question)
+
+    def _execute(self, question: str, schema) -> Optional[str]:
+        """Traduz a pergunta (ou reaproveita o SQL da mesma forma de pergunta) e executa"""
+        template, values = question_template(question)
+        engine = self.schema_cache.engine
+        translator = SQLTranslator(schema.columns, quote=engine.dialect.identifier_preparer.quote)
+        plan = plan_cache.get_or_translate(str(engine.url), schema.fingerprint, template, translator)
+        if plan is None:
+            return None
+
+        columns, rows, truncated = execute_plan(engine, plan, values)
+        lines = [
+            f"**Consulta:** `{plan.sql}`",
+            "",
+            "| " + " | ".join(columns) + " |",
+            "| " + " | ".join("---" for _ in columns) + " |",
+        ]
+        lines += ["| " + " | ".join(self._format(value) for value in row) + " |" for row in rows]
+        if not rows:
+            lines.append("\nNenhum resultado encontrado.")
+        elif truncated:
+            lines.append(f"\n⚠️  Mostrando as primeiras {len(rows)} linhas.")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format(value: Any) -> str:
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return "" if value is None else str(value)
     
     def _mock_response(self, question: str) -> str:
         """Resposta simulada quando banco não está disponível"""
@@ -0,0 +1,135 @@
+"""Engine SQLAlchemy compartilhado e cache do esquema para o SQLQueryTool"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from app.config import settings
+import threading
+import time
+
+try:
+    from langchain_community.utilities import SQLDatabase
+except ImportError:
+    from langchain.sql_database import SQLDatabase
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+# Hash do catálogo do schema atual: muda com qualquer CREATE/ALTER/DROP de tabela ou coluna
+POSTGRES_FINGERPRINT = text("""
+    SELECT md5(coalesce(string_agg(
+        c.relname || '.' || a.attname || ':' || format_type(a.atttypid, a.atttypmod),
+        ',' ORDER BY c.relname, a.attnum
+    ), ''))
+    FROM pg_attribute a
+    JOIN pg_class c ON c.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema()
+      AND c.relkind IN ('r', 'v', 'm', 'p')
+      AND a.attnum > 0 AND NOT a.attisdropped
+""")
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """Engine (e pool de conexões) único por URL, compartilhado pelas ferramentas"""
+    url = url or settings.postgres_url
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = _engines[url] = _create_engine(url)
+        return engine
+
+def _create_engine(url: str) -> Engine:
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite usa o pool padrão do dialeto; só o pre-ping se aplica
+        return create_engine(url, pool_pre_ping=True)
+    return create_engine(
+        url,
+        pool_size=settings.sql_pool_size,
+        max_overflow=settings.sql_max_overflow,
+        pool_timeout=settings.sql_pool_timeout,
+        pool_recycle=settings.sql_pool_recycle,
+        pool_pre_ping=True,
+        connect_args={"connect_timeout": int(settings.sql_connect_timeout)}
+    )
+
+def schema_fingerprint(engine: Engine) -> str:
+    """Identificador barato da versão do esquema (sem refletir tabelas nem ler linhas)"""
+    backend = engine.url.get_backend_name()
+    with engine.connect() as connection:
+        if backend == "postgresql":
+            return connection.execute(POSTGRES_FINGERPRINT).scalar()
+        if backend == "sqlite":
+            return str(connection.exec_driver_sql("PRAGMA schema_version").scalar())
+        return ",".join(sorted(inspect(connection).get_table_names()))
+
+@dataclass
+class SchemaInfo:
+    fingerprint: str
+    table_names: List[str]
+    table_info: str  # DDL + linhas de exemplo, no formato do SQLDatabase
+    columns: Dict[str, List[Tuple[str, str]]]  # tabela -> [(coluna, "number" | "text" | "other")]
+
+def _column_kind(column_type) -> str:
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return "other"
+    if python_type in (int, float, Decimal):
+        return "number"
+    return "text" if python_type is str else "other"
+
+def reflect_columns(engine: Engine, table_names: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+    inspector = inspect(engine)
+    return {
+        table: [(column["name"], _column_kind(column["type"])) for column in inspector.get_columns(table)]
+        for table in table_names
+    }
+
+class SchemaCache:
+    """Metadados do esquema, refeitos só quando o fingerprint muda.
+
+    O fingerprint é consultado no máximo a cada ``check_interval`` segundos;
+    entre uma checagem e outra, ``get`` não toca no banco.
+    """
+
+    def __init__(self, engine: Engine, check_interval: Optional[float] = None):
+        self.engine = engine
+        self.check_interval = settings.sql_schema_check_interval if check_interval is None else check_interval
+        self._info: Optional[SchemaInfo] = None
+        self._database: Optional[SQLDatabase] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def database(self) -> SQLDatabase:
+        """SQLDatabase refletido na versão atual do esquema"""
+        self.get()
+        return self._database
+
+    def get(self) -> SchemaInfo:
+        with self._lock:
+            now = time.monotonic()
+            if self._info is not None and now - self._checked_at < self.check_interval:
+                return self._info
+
+            fingerprint = schema_fingerprint(self.engine)
+            self._checked_at = now
+            if self._info is None or fingerprint != self._info.fingerprint:
+                if self._info is not None:
+                    print("🔄 Esquema do banco mudou; recarregando metadados")
+                self._database = SQLDatabase(self.engine, sample_rows_in_table_info=settings.sql_sample_rows)
+                table_names = list(self._database.get_usable_table_names())
+                self._info = SchemaInfo(
+                    fingerprint=fingerprint,
+                    table_names=table_names,
+                    table_info=self._database.get_table_info(),
+                    columns=reflect_columns(self.engine, table_names)
+                )
+            return self._info
+
+    def invalidate(self):
+        """Força a checagem do esquema na próxima chamada"""
+        with self._lock:
+            self._checked_at = 0.0
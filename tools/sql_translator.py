@@ -0,0 +1,316 @@
+"""Tradução de perguntas simples em SELECTs parametrizados, e execução limitada.
+
+A tradução é por regras sobre o esquema em cache: identifica a tabela e as
+colunas citadas, comparações numéricas ("abaixo de 100"), busca por texto
+entre aspas, contagens/médias/somas e superlativos ("mais caro"). Os
+valores literais da pergunta viram parâmetros (``:p0``, ``:p1``...), então a
+mesma forma de pergunta com outros valores reaproveita o SQL já traduzido
+(``plan_cache``). Identificadores vêm só do esquema refletido.
+
+A execução roda numa transação somente leitura, com timeout de statement,
+teto de linhas e cursor do lado do servidor (``stream_results``).
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.config import settings
+import threading
+import unicodedata
+import time
+import re
+
+# Literais da pergunta: texto entre aspas ou números (vírgula ou ponto decimal)
+LITERAL = re.compile(r"[\"'“”‘’]([^\"'“”‘’]+)[\"'“”‘’]|(?<![\w.,])(\d+(?:[.,]\d+)?)(?![\w])")
+WORD = re.compile(r"__[nt]\d+__|[a-z0-9_]+")
+
+# Comparações: palavras logo antes do número -> operador
+COMPARISONS = [
+    (("menos", "de"), "<"), (("menor", "que"), "<"), (("abaixo", "de"), "<"), (("inferior", "a"), "<"),
+    (("below",), "<"), (("under",), "<"), (("less", "than"), "<"), (("ate",), "<="),
+    (("mais", "de"), ">"), (("maior", "que"), ">"), (("acima", "de"), ">"), (("superior", "a"), ">"),
+    (("above",), ">"), (("over",), ">"), (("more", "than"), ">"), (("a", "partir", "de"), ">="),
+    (("igual", "a"), "="), (("exatamente",), "="), (("equal", "to"), "="),
+]
+COUNT_WORDS = {"quantos", "quantas", "count"}
+AVG_WORDS = {"media", "medio", "average", "avg"}
+SUM_WORDS = {"soma", "total", "sum"}
+# Superlativos: (palavras, direção, dica da coluna)
+SUPERLATIVES = [
+    (("mais", "caro"), "DESC", "price"), (("mais", "caros"), "DESC", "price"),
+    (("mais", "barato"), "ASC", "price"), (("mais", "baratos"), "ASC", "price"),
+    (("most", "expensive"), "DESC", "price"), (("cheapest",), "ASC", "price"),
+    (("maior",), "DESC", None), (("menor",), "ASC", None),
+    (("max",), "DESC", None), (("min",), "ASC", None),
+]
+# Nomes usuais de colunas (sem acento) para palavras da pergunta
+COLUMN_HINTS = {
+    "price": {"preco", "precos", "price", "valor", "custa", "custam", "caro", "caros", "barato", "baratos"},
+    "name": {"nome", "name", "chamado", "chamada", "titulo"},
+    "stock": {"estoque", "stock", "stock_quantity", "unidades"},
+    "category": {"categoria", "category"},
+}
+
+# Nomes de tabela em português -> inglês (ex.: ``products`` do scripts/setup_db.sql)
+TABLE_ALIASES = {"produto": "product", "produtos": "products", "venda": "sale", "vendas": "sales",
+                 "conversa": "conversation", "conversas": "conversations"}
+
+def normalize_words(value: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados"""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", value.casefold()).strip()
+
+def _number(value: str) -> Any:
+    number = float(value.replace(",", "."))
+    return int(number) if number.is_integer() else number
+
+def question_template(question: str) -> Tuple[str, List[Any]]:
+    """Forma da pergunta (literais trocados por ``__nI__``/``__tI__``) e os valores extraídos"""
+    values: List[Any] = []
+
+    def replace(match: re.Match) -> str:
+        values.append(match.group(1) if match.group(1) is not None else _number(match.group(2)))
+        kind = "t" if match.group(1) is not None else "n"
+        return f" __{kind}{len(values) - 1}__ "
+
+    template = LITERAL.sub(replace, question)
+    return normalize_words(template).rstrip("?!. "), values
+
+@dataclass
+class QueryPlan:
+    """SQL traduzido e como ligar os valores da pergunta aos parâmetros"""
+    sql: str
+    bindings: List[Tuple[str, int, str]] = field(default_factory=list)  # (parâmetro, índice do valor, tipo)
+
+    def params(self, values: List[Any]) -> Dict[str, Any]:
+        params = {}
+        for name, index, kind in self.bindings:
+            value = values[index]
+            params[name] = f"%{value}%" if kind == "like" else value
+        return params
+
+def _column_role(column: str) -> Optional[str]:
+    normalized = normalize_words(column)
+    for role, words in COLUMN_HINTS.items():
+        if normalized in words or any(normalized.startswith(word) for word in words if len(word) > 4):
+            return role
+    return None
+
+def _find_table(words: List[str], tables: List[str]) -> Optional[str]:
+    normalized = {normalize_words(table): table for table in tables}
+    for word in words:
+        for name, table in normalized.items():
+            if name in (word, word + "s", word.rstrip("s")) or TABLE_ALIASES.get(word) in (name, name.rstrip("s")):
+                return table
+    return None
+
+def _column_at(words: List[str], position: int, columns: List[Tuple[str, str]]) -> Optional[str]:
+    """Coluna citada pela palavra em ``position`` (nome da coluna ou dica)"""
+    word = words[position]
+    for column, _ in columns:
+        name = normalize_words(column)
+        if word in (name, name.rstrip("s"), name + "s"):
+            return column
+    for column, _ in columns:
+        role = _column_role(column)
+        if role and word in COLUMN_HINTS[role]:
+            return column
+    return None
+
+def _matches(words: List[str], position: int, phrase: Tuple[str, ...]) -> bool:
+    return tuple(words[position:position + len(phrase)]) == phrase
+
+class SQLTranslator:
+    """Regras de tradução sobre um esquema (colunas por tabela, com tipo "number"/"text"/"other")"""
+
+    def __init__(self, columns: Dict[str, List[Tuple[str, str]]], quote=lambda name: f'"{name}"'):
+        self.columns = columns
+        self.quote = quote
+
+    def translate(self, template: str) -> Optional[QueryPlan]:
+        words = WORD.findall(template)
+        table = _find_table(words, list(self.columns))
+        if table is None:
+            return None
+        columns = self.columns[table]
+        numeric = [column for column, kind in columns if kind == "number"]
+        textual = [column for column, kind in columns if kind == "text"]
+
+        mentioned = [(i, _column_at(words, i, columns)) for i in range(len(words))]
+        mentioned = [(i, column) for i, column in mentioned if column]
+
+        conditions, bindings, used = [], [], set()
+        for i, word in enumerate(words):
+            match = re.fullmatch(r"__([nt])(\d+)__", word)
+            if not match:
+                continue
+            kind, index = match.group(1), int(match.group(2))
+            param = f"p{index}"
+            if kind == "t":
+                column = self._pick(mentioned, i, textual, "name")
+                if column:
+                    conditions.append(f"LOWER({self.quote(column)}) LIKE LOWER(:{param})")
+                    bindings.append((param, index, "like"))
+                    used.add(index)
+                continue
+
+            operator = self._comparison(words, i)
+            if operator is None:
+                continue
+            column = self._pick(mentioned, i, numeric, "price")
+            if column:
+                conditions.append(f"{self.quote(column)} {operator} :{param}")
+                bindings.append((param, index, "number"))
+                used.add(index)
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        source = f"FROM {self.quote(table)}{where}"
+        word_set = set(words)
+
+        if word_set & COUNT_WORDS or _matches_any(words, [("how", "many"), ("numero", "de")]):
+            return QueryPlan(f"SELECT COUNT(*) AS total {source}", bindings)
+
+        for aggregate, function, alias in ((AVG_WORDS, "AVG", "media"), (SUM_WORDS, "SUM", "soma")):
+            if word_set & aggregate:
+                column = self._pick(mentioned, len(words), numeric, "price")
+                if column:
+                    return QueryPlan(f"SELECT {function}({self.quote(column)}) AS {alias} {source}", bindings)
+
+        for i in range(len(words)):
+            for phrase, direction, hint in SUPERLATIVES:
+                if not _matches(words, i, phrase) or _matches_any(words[i + len(phrase):], [("que",), ("de",)], at=0):
+                    continue
+                after = i + len(phrase)
+                column = (_column_at(words, after, columns) if after < len(words) else None)
+                column = column if column in numeric else self._pick(mentioned, i, numeric, hint or "price")
+                if not column:
+                    continue
+                # "os 3 mais caros": um número solto antes do superlativo vira o limite
+                limit = "1"
+                for j in range(i - 1, max(-1, i - 4), -1):
+                    free = re.fullmatch(r"__n(\d+)__", words[j])
+                    if free and int(free.group(1)) not in used:
+                        limit = f":p{free.group(1)}"
+                        bindings.append((f"p{free.group(1)}", int(free.group(1)), "number"))
+                        break
+                return QueryPlan(f"SELECT * {source} ORDER BY {self.quote(column)} {direction} LIMIT {limit}", bindings)
+
+        return QueryPlan(f"SELECT * {source}", bindings)
+
+    @staticmethod
+    def _comparison(words: List[str], position: int) -> Optional[str]:
+        """Operador indicado pelas palavras logo antes do número"""
+        for phrase, operator in COMPARISONS:
+            start = position - len(phrase)
+            if start >= 0 and tuple(words[start:position]) == phrase:
+                return operator
+        return None
+
+    @staticmethod
+    def _pick(mentioned: List[Tuple[int, str]], position: int, allowed: List[str], role: str) -> Optional[str]:
+        """Coluna citada mais próxima antes de ``position``; senão a coluna típica do papel"""
+        for i, column in reversed(mentioned):
+            if i < position and column in allowed:
+                return column
+        for column in allowed:
+            if _column_role(column) == role:
+                return column
+        return allowed[0] if allowed else None
+
+def _matches_any(words: List[str], phrases: List[Tuple[str, ...]], at: Optional[int] = None) -> bool:
+    positions = [at] if at is not None else range(len(words))
+    return any(_matches(words, i, phrase) for i in positions for phrase in phrases)
+
+class PlanCache:
+    """LRU de (banco, fingerprint do esquema, forma da pergunta) -> QueryPlan"""
+
+    def __init__(self, max_items: Optional[int] = None):
+        self.max_items = settings.sql_plan_cache_items if max_items is None else max_items
+        self._plans: "OrderedDict[Tuple[str, str, str], Optional[QueryPlan]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_translate(self, database: str, fingerprint: str, template: str,
+                         translator: SQLTranslator) -> Optional[QueryPlan]:
+        key = (database, fingerprint, template)
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return self._plans[key]
+            self.misses += 1
+        plan = translator.translate(template)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_items:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+# Instância global
+plan_cache = PlanCache()
+
+@contextmanager
+def read_only(connection: Connection, timeout: float):
+    """Transação somente leitura com timeout de statement (PostgreSQL ou SQLite)"""
+    backend = connection.engine.url.get_backend_name()
+    if backend == "postgresql":
+        connection = connection.execution_options(postgresql_readonly=True)
+        with connection.begin():
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+            yield connection
+        return
+
+    if backend == "sqlite":
+        raw = connection.connection.driver_connection
+        deadline = time.monotonic() + timeout
+        # Interrompe a consulta quando o prazo acaba (checado a cada 1000 instruções da VM)
+        raw.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+        raw.execute("PRAGMA query_only = ON")
+        try:
+            with connection.begin():
+                yield connection
+        finally:
+            raw.execute("PRAGMA query_only = OFF")
+            raw.set_progress_handler(None, 0)
+        return
+
+    with connection.begin():
+        yield connection
+
+def execute_plan(engine: Engine, plan: QueryPlan, values: List[Any],
+                 row_cap: Optional[int] = None, timeout: Optional[float] = None) -> Tuple[List[str], List[tuple], bool]:
+    """Executa o plano; retorna (colunas, linhas, truncado?) com no máximo ``row_cap`` linhas"""
+    row_cap = row_cap or settings.sql_row_cap
+    timeout = timeout or settings.sql_statement_timeout
+    if not plan.sql.lstrip().upper().startswith("SELECT"):
+        raise ValueError("Somente consultas SELECT são permitidas")
+
+    # O teto também vai para o SQL: o banco para de produzir linhas em row_cap + 1
+    statement = text(f"SELECT * FROM ({plan.sql}) AS resultado LIMIT {int(row_cap) + 1}")
+    with engine.connect() as connection:
+        with read_only(connection, timeout) as connection:
+            result = connection.execution_options(
+                stream_results=True, max_row_buffer=settings.sql_fetch_batch
+            ).execute(statement, plan.params(values))
+            columns = list(result.keys())
+            rows: List[tuple] = []
+            while len(rows) <= row_cap:
+                batch = result.fetchmany(min(settings.sql_fetch_batch, row_cap + 1 - len(rows)))
+                if not batch:
+                    break
+                rows.extend(tuple(row) for row in batch)
+            result.close()
+
+    truncated = len(rows) > row_cap
+    return columns, rows[:row_cap], truncated
@@ -1,45 +1,159 @@
 from langchain.tools import BaseTool
-from typing import Type
+from typing import Type, Optional, Dict, Any, List, Set
 from pydantic import BaseModel, Field
-from vector_db.qdrant_client import qdrant_manager
+from app.config import settings
+from vector_db.qdrant_client import qdrant_manager, get_qdrant_manager
+from vector_db.async_qdrant import get_async_qdrant_manager
+from vector_db.sparse_index import hybrid_search
+from vector_db.mmr import mmr_results
+from app.core.reranker import reranker
+from tools.schemas import RetrievedDocument, format_documents
+import numpy as np
+import asyncio
 
 class VectorSearchInput(BaseModel):
     query: str = Field(description="Consulta para busca vetorial")
     k: int = Field(default=5, description="Número de resultados")
     threshold: float = Field(default=0.3, description="Score mínimo")
+    model_name: Optional[str] = Field(default=None, description="Modelo de embedding (define a collection)")
+    hybrid: Optional[bool] = Field(default=None, description="Combina busca densa com BM25 (termos exatos, códigos, siglas)")
+    mmr: Optional[bool] = Field(default=None, description="Diversifica os resultados (MMR), evitando trechos repetidos; vale também com hybrid")
+    mmr_lambda: Optional[float] = Field(default=None, description="Peso da relevância no MMR (0 a 1; 1 = sem diversificação)")
+    rerank: Optional[bool] = Field(default=None, description="Reordena um conjunto maior de candidatos com cross-encoder e corta para k")
+    filters: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description='Filtro de metadados, ex.: {"file_type": ".md"}, {"file_name": {"any": ["a.md"]}}, {"source": {"prefix": "data/docs"}}'
+    )
 
 class VectorSearchTool(BaseTool):
     name = "vector_search"
     description = "Busca documentos relevantes na base de conhecimento usando similaridade vetorial"
     args_schema: Type[BaseModel] = VectorSearchInput
     
-    def _run(self, query: str, k: int = 5,threshold: float = 0.3) -> str:
-        print(f"\n🔍 VECTOR SEARCH TOOL")
-        print(f"   Query: {query}")
-        print(f"   K: {k}")
+    def _run(self, query: str, k: int = 5,threshold: float = 0.3, model_name: Optional[str] = None,
+             hybrid: Optional[bool] = None, filters: Optional[Dict[str, Any]] = None,
+             mmr: Optional[bool] = None, mmr_lambda: Optional[float] = None,
+             rerank: Optional[bool] = None) -> str:
         try:
-            results = qdrant_manager.similarity_search(query, 
-                                                       k=k, 
-                                                       score_threshold=threshold)
-            print(f"   Resultados encontrados: {len(results)}")
+            documents = self.search(query, k=k, threshold=threshold, model_name=model_name, hybrid=hybrid,
+                                    filters=filters, mmr=mmr, mmr_lambda=mmr_lambda, rerank=rerank)
             
-            if not results:
+            if not documents:
                 return "Nenhum documento relevante encontrado na base de conhecimento."
             
-            # Debug: mostrar scores
-            for i, result in enumerate(results):
-                print(f"   [{i}] Score: {result['score']:.3f} - Text preview: {result['text'][:50]}...")
-            
-            formatted_results = []
-            for i, result in enumerate(results, 1):
-                formatted_results.append(
-                    f"{i}. (Score: {result['score']:.3f}) {result['text']}"
-                )
-            
-            return "\n".join(formatted_results)
+            return format_documents(documents)
         
         except Exception as e:
             print(f"   ❌ Erro: {e}")
             import traceback
             traceback.print_exc()
-            return f"Erro na busca vetorial: {str(e)}"
\ No newline at end of file
+            return f"Erro na busca vetorial: {str(e)}"
+    
+    async def _arun(self, query: str, k: int = 5,threshold: float = 0.3, model_name: Optional[str] = None,
+                    hybrid: Optional[bool] = None, filters: Optional[Dict[str, Any]] = None,
+                    mmr: Optional[bool] = None, mmr_lambda: Optional[float] = None,
+                    rerank: Optional[bool] = None) -> str:
+        try:
+            documents = await self.asearch(query, k=k, threshold=threshold, model_name=model_name, hybrid=hybrid,
+                                           filters=filters, mmr=mmr, mmr_lambda=mmr_lambda, rerank=rerank)
+            
+            if not documents:
+                return "Nenhum documento relevante encontrado na base de conhecimento."
+            
+            return format_documents(documents)
+        
+        except Exception as e:
+            print(f"   ❌ Erro: {e}")
+            return f"Erro na busca vetorial: {str(e)}"
+    
+    async def asearch(self, query: str, k: int = 5, threshold: float = 0.3, model_name: Optional[str] = None,
+                      hybrid: Optional[bool] = None, filters: Optional[Dict[str, Any]] = None,
+                      mmr: Optional[bool] = None, mmr_lambda: Optional[float] = None,
+                      rerank: Optional[bool] = None, with_vectors: bool = False,
+                      query_vector: Optional[np.ndarray] = None) -> List[RetrievedDocument]:
+        """Versão assíncrona de ``search``.
+        
+        A busca densa no Qdrant usa o cliente assíncrono. Busca híbrida e MMR
+        (BM25/vetores em memória) e o backend local rodam numa thread; o
+        reranking (cross-encoder, CPU) também.
+        """
+        hybrid = settings.hybrid_search if hybrid is None else hybrid
+        mmr = settings.mmr_enabled if mmr is None else mmr
+        if settings.vector_backend != "qdrant" or hybrid or mmr:
+            return await asyncio.to_thread(self.search, query, k=k, threshold=threshold, model_name=model_name,
+                                           hybrid=hybrid, filters=filters, mmr=mmr, mmr_lambda=mmr_lambda,
+                                           rerank=rerank, with_vectors=with_vectors, query_vector=query_vector)
+        
+        rerank = settings.reranker_enabled if rerank is None else rerank
+        fetch = max(settings.reranker_fetch_k, k) if rerank else k
+        results = await get_async_qdrant_manager(model_name).similarity_search(
+            query, k=fetch, score_threshold=threshold, filters=filters, with_vectors=with_vectors,
+            query_vector=query_vector
+        )
+        if rerank:
+            results = await asyncio.to_thread(reranker.rerank, query, results, k)
+        return [RetrievedDocument.from_result(result) for result in results]
+    
+    def search(self, query: str, k: int = 5, threshold: float = 0.3, model_name: Optional[str] = None,
+               hybrid: Optional[bool] = None, filters: Optional[Dict[str, Any]] = None,
+               mmr: Optional[bool] = None, mmr_lambda: Optional[float] = None,
+               rerank: Optional[bool] = None, with_vectors: bool = False,
+               query_vector: Optional[np.ndarray] = None) -> List[RetrievedDocument]:
+        """Mesma busca do _run, retornando documentos estruturados.
+        
+        ``with_vectors`` inclui os vetores já armazenados (evita gerar de novo
+        os embeddings dos trechos, ex.: na avaliação). ``query_vector`` é o
+        embedding da consulta, se já calculado (ex.: pelo roteador).
+        """
+        print(f"\n🔍 VECTOR SEARCH TOOL")
+        print(f"   Query: {query}")
+        print(f"   K: {k}")
+        store = self._store(model_name)
+        rerank = settings.reranker_enabled if rerank is None else rerank
+        hybrid = settings.hybrid_search if hybrid is None else hybrid
+        mmr = settings.mmr_enabled if mmr is None else mmr
+        # Com reranking, busca mais candidatos e o cross-encoder escolhe os k finais
+        candidates = max(settings.reranker_fetch_k, k) if rerank else k
+        if mmr:
+            # O MMR escolhe entre um conjunto maior de candidatos, comparando os vetores
+            candidates = max(settings.mmr_fetch_k, candidates)
+            if query_vector is None:
+                query_vector = store.embedder.embed_query_array(query)
+        if hybrid:
+            results = hybrid_search(store, query, k=candidates, score_threshold=threshold, filters=filters,
+                                    with_vectors=with_vectors or mmr, query_vector=query_vector)
+        else:
+            results = store.similarity_search(query, 
+                                              k=candidates, 
+                                              score_threshold=threshold,
+                                              filters=filters,
+                                              with_vectors=with_vectors or mmr,
+                                              query_vector=query_vector)
+        if rerank:
+            # Com MMR, o cross-encoder pontua todo o conjunto e a diversificação corta para k
+            results = reranker.rerank(query, results, len(results) if mmr else k)
+        if mmr:
+            relevance = None
+            if rerank:
+                # Logits do cross-encoder levados a [0, 1], a escala do cosseno no MMR
+                relevance = 1.0 / (1.0 + np.exp(-np.array([result["score"] for result in results], dtype=np.float32)))
+            results = mmr_results(query_vector, results, k, lambda_mult=mmr_lambda, relevance=relevance,
+                                  embedder=store.embedder, with_vectors=with_vectors)
+        print(f"   Resultados encontrados: {len(results)}")
+        
+        documents = [RetrievedDocument.from_result(result) for result in results]
+        # Debug: mostrar scores
+        for i, document in enumerate(documents):
+            print(f"   [{i}] Score: {document.score:.3f} - Text preview: {document.text[:50]}...")
+        return documents
+    
+    def existing_ids(self, ids: List[str], model_name: Optional[str] = None) -> Set[str]:
+        """IDs de pontos que ainda existem na collection do modelo"""
+        return self._store(model_name).existing_ids(ids)
+    
+    def _store(self, model_name: Optional[str]):
+        """Collection correspondente ao modelo de embedding escolhido"""
+        if not model_name or model_name == settings.embedding_model_name:
+            return qdrant_manager
+        print(f"   Modelo: {model_name}")
+        return get_qdrant_manager(model_name)
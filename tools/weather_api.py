@@ -1,8 +1,15 @@
 from langchain.tools import BaseTool
-from typing import Type, Optional
+from typing import Type, Optional, List, Tuple
 from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import asyncio
 from app.config import settings
+from app.core.embedding_cache import normalize_text
+from tools.http import afetch, fetch, TTLCache
+
+# Tempo atual por local: TTL curto; consultas simultâneas à mesma cidade viram uma só chamada
+weather_cache = TTLCache(ttl=settings.weather_cache_ttl, max_items=settings.weather_cache_items)
 
 class WeatherQueryInput(BaseModel):
     city: str = Field(description="Nome da cidade para consulta do tempo")
@@ -18,21 +25,79 @@ class WeatherTool(BaseTool):
         #     return "API key do OpenWeatherMap não configurada. Usando dados simulados: Tempo ensolarado, 25°C em " + city
         
         try:
-            location = f"{city},{country_code}" if country_code else city
-            base_url = f"http://api.openweathermap.org/data/2.5/weather?q={location}&appid={settings.openweather_api_key}"
-            
-            print(f"Consultando: {base_url}")
-            
+            key = (normalize_text(city).casefold(), (country_code or "").strip().upper())
+            return weather_cache.get_or_fetch(key, lambda: self._query(city, country_code))
             
-            response = requests.get(base_url, timeout=20)
-            data = response.json()
+        except requests.Timeout:
+            return f"Timeout ao consultar API do OpenWeatherMap para {city}"
+        except Exception as e:
+            return f"Erro na consulta do tempo: {str(e)}"
+    
+    async def _arun(self, city: str, country_code: Optional[str] = None) -> str:
+        try:
+            key = (normalize_text(city).casefold(), (country_code or "").strip().upper())
+            return await weather_cache.aget_or_fetch(key, lambda: self._aquery(city, country_code))
             
-            if response.status_code == 200:
-                weather = data["weather"][0]
-                main = data["main"]
-                wind = data.get("wind", {})
+        except requests.Timeout:
+            return f"Timeout ao consultar API do OpenWeatherMap para {city}"
+        except Exception as e:
+            return f"Erro na consulta do tempo: {str(e)}"
+    
+    def lookup_many(self, locations: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """Consulta várias cidades em paralelo; o resultado segue a ordem de ``locations``"""
+        if len(locations) <= 1:
+            return [self._run(city, country_code) for city, country_code in locations]
+        workers = min(settings.weather_max_concurrency, len(locations))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda location: self._run(*location), locations))
+    
+    async def alookup_many(self, locations: List[Tuple[str, Optional[str]]]) -> List[str]:
+        """Versão assíncrona de lookup_many (no máximo ``weather_max_concurrency`` chamadas por vez)"""
+        semaphore = asyncio.Semaphore(settings.weather_max_concurrency)
+        
+        async def lookup(city: str, country_code: Optional[str]) -> str:
+            async with semaphore:
+                return await self._arun(city, country_code)
+        
+        return list(await asyncio.gather(*[lookup(*location) for location in locations]))
+    
+    def _query(self, city: str, country_code: Optional[str]) -> str:
+        """Chamada ao OpenWeatherMap (respostas 404/401 também ficam em cache pelo TTL)"""
+        location = f"{city},{country_code}" if country_code else city
+        print(f"Consultando tempo: {location}")
+        
+        response = fetch(
+            settings.openweather_url,
+            params={"q": location, "appid": settings.openweather_api_key},
+            deadline=settings.weather_deadline
+        )
+        if response.status_code == 429 or response.status_code >= 500:
+            # Falha temporária: não vai para o cache
+            response.raise_for_status()
+        return self._format(city, response.status_code, response.json())
+    
+    async def _aquery(self, city: str, country_code: Optional[str]) -> str:
+        """Versão assíncrona de _query"""
+        location = f"{city},{country_code}" if country_code else city
+        print(f"Consultando tempo: {location}")
+        
+        response = await afetch(
+            settings.openweather_url,
+            params={"q": location, "appid": settings.openweather_api_key},
+            deadline=settings.weather_deadline
+        )
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
+        return self._format(city, response.status_code, response.json())
+    
+    @staticmethod
+    def _format(city: str, status_code: int, data: dict) -> str:
+        if status_code == 200:
+            weather = data["weather"][0]
+            main = data["main"]
+            wind = data.get("wind", {})
 
-                return f"""🌤️ **Tempo em {data['name']}**
+            return f"""🌤️ **Tempo em {data['name']}**
 
                     📊 **Condições atuais:**
                     - Clima: {weather['description'].capitalize()}
@@ -46,10 +111,5 @@ class WeatherTool(BaseTool):
 
                     🌍 Coordenadas: {data['coord']['lat']}, {data['coord']['lon']}
                     """
-            else:
-                return f"Erro ao consultar tempo para {city}: {data.get('message', 'Erro desconhecido')}"
-            
-        except requests.Timeout:
-            return f"Timeout ao consultar API do OpenWeatherMap para {city}"
-        except Exception as e:
-            return f"Erro na consulta do tempo: {str(e)}"
\ No newline at end of file
+        else:
+            return f"Erro ao consultar tempo para {city}: {data.get('message', 'Erro desconhecido')}"
@@ -1,48 +1,97 @@
 from langchain.tools import BaseTool
-from typing import Type, Optional
+from typing import Type, Optional, List, Dict
 from pydantic import BaseModel, Field
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from app.config import settings
+from app.core.embedding_cache import normalize_text
+from tools.http import afetch, fetch, TTLCache
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # opcional: parser mais rápido que o html.parser
+    HTML_PARSER = "html.parser"
+
+SEARCH_URL = "https://html.duckduckgo.com/html/"
+
+# Resultados por (query, num_results); respostas velhas são servidas enquanto atualizam
+search_cache = TTLCache(
+    ttl=settings.web_search_cache_ttl,
+    stale_ttl=settings.web_search_stale_ttl,
+    max_items=settings.web_search_cache_items
+)
 
 class WebSearchInput(BaseModel):
     query: str = Field(description="Consulta para busca na web")
     num_results: int = Field(default=3, description="Número de resultados")
 
+def parse_results(html: bytes, num_results: int) -> List[Dict[str, str]]:
+    """Extrai título, trecho e link dos resultados do DuckDuckGo.
+
+    Só os ``div.result`` entram na árvore (SoupStrainer): o resto da página
+    nem chega a ser montado.
+    """
+    only_results = SoupStrainer("div", class_="result")
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=only_results)
+
+    results = []
+    for element in soup.find_all("div", class_="result"):
+        title_elem = element.find('h2')
+        snippet_elem = element.find('a', class_='result__snippet')
+        link_elem = element.find('a', class_='result__url')
+
+        if title_elem and snippet_elem:
+            results.append({
+                "title": title_elem.get_text().strip(),
+                "snippet": snippet_elem.get_text().strip(),
+                "link": link_elem.get('href', "N/A") if link_elem else "N/A"
+            })
+            if len(results) == num_results:
+                break
+    return results
+
 class WebSearchTool(BaseTool):
     name = "web_search"
     description = "Busca informações atualizadas na web usando DuckDuckGo"
     args_schema: Type[BaseModel] = WebSearchInput
-    
+
     def _run(self, query: str, num_results: int = 3) -> str:
         try:
-            # Usando DuckDuckGo API gratuita (sem necessidade de API key)
-            search_url = "https://html.duckduckgo.com/html/"
-            params = {"q": query}
-            
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
-            response = requests.get(search_url, params=params, headers=headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            results = []
-            result_elements = soup.find_all('div', class_='result')[:num_results]
-            
-            for element in result_elements:
-                title_elem = element.find('h2')
-                snippet_elem = element.find('a', class_='result__snippet')
-                link_elem = element.find('a', class_='result__url')
-                
-                if title_elem and snippet_elem:
-                    title = title_elem.get_text().strip()
-                    snippet = snippet_elem.get_text().strip()
-                    link = link_elem['href'] if link_elem else "N/A"
-                    
-                    results.append(f"**{title}**\n{snippet}\nFonte: {link}\n")
-            
-            return "\n".join(results) if results else "Nenhum resultado encontrado."
-        
+            key = (normalize_text(query).casefold(), num_results)
+            results = search_cache.get_or_fetch(key, lambda: self._search(query, num_results))
+            return self._format(results)
+
+        except requests.Timeout:
+            return "Tempo esgotado na busca web. Tente novamente em instantes."
+        except Exception as e:
+            return f"Erro na busca web: {str(e)}"
+
+    async def _arun(self, query: str, num_results: int = 3) -> str:
+        try:
+            key = (normalize_text(query).casefold(), num_results)
+            results = await search_cache.aget_or_fetch(key, lambda: self._asearch(query, num_results))
+            return self._format(results)
+
+        except requests.Timeout:
+            return "Tempo esgotado na busca web. Tente novamente em instantes."
         except Exception as e:
-            return f"Erro na busca web: {str(e)}"
\ No newline at end of file
+            return f"Erro na busca web: {str(e)}"
+
+    @staticmethod
+    def _format(results: List[Dict[str, str]]) -> str:
+        return "\n".join(
+            f"**{r['title']}**\n{r['snippet']}\nFonte: {r['link']}\n" for r in results
+        ) if results else "Nenhum resultado encontrado."
+
+    def _search(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        """Consulta o DuckDuckGo (sem necessidade de API key), com prazo total limitado"""
+        response = fetch(SEARCH_URL, params={"q": query}, deadline=settings.web_search_deadline)
+        response.raise_for_status()
+        return parse_results(response.content, num_results)
+
+    async def _asearch(self, query: str, num_results: int) -> List[Dict[str, str]]:
+        """Versão assíncrona de _search"""
+        response = await afetch(SEARCH_URL, params={"q": query}, deadline=settings.web_search_deadline)
+        response.raise_for_status()
+        return parse_results(response.content, num_results)
@@ -1,10 +1,13 @@
 import streamlit as st
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from graph.workflow import rag_workflow
 from app.core.evaluation import rag_evaluator
+from app.core.embeddings import embedding_manager
+from tools.schemas import RetrievedDocument, stack_vectors
 from ui.components import display_chat_message, display_evaluation_metrics, display_debug_info
 import time
 import uuid
+import numpy as np
 
 class ChatInterface:
     def __init__(self):
@@ -56,7 +59,8 @@ class ChatInterface:
                 display_debug_info({
                     "agent_used": response_data.get("agent_used"),
                     "confidence": response_data.get("confidence"),
-                    "tool_calls": response_data.get("tool_calls", [])
+                    "tool_calls": response_data.get("tool_calls", []),
+                    "sources": response_data.get("sources", [])
                 })
         
         # Adiciona resposta do assistente ao histórico
@@ -68,6 +72,7 @@ class ChatInterface:
                 "agent_used": response_data.get("agent_used"),
                 "confidence": response_data.get("confidence"),
                 "tool_calls": response_data.get("tool_calls", []),
+                "sources": response_data.get("sources", []),
                 "eval_score": response_data.get("evaluation", {}).get("overall_score", 0)
             }
         }
@@ -124,17 +129,24 @@ class ChatInterface:
             # USAR ROUTER SIMPLES ao invés do workflow
             from graph.simple_router import simple_router
             result = simple_router.process_query(query, config)
+            documents = result.pop("documents", [])
             
             # Avalia a resposta
             from app.core.evaluation import rag_evaluator
             evaluation = rag_evaluator.evaluate_response(
                 query=query,
                 response=result["response"],
-                context_docs=[]
+                context_docs=self._extract_context_docs(documents),
+                context_embeddings=self._context_embeddings(documents, config)
             )
             
             return {
                 **result,
+                # Sem os vetores: só o que a interface exibe fica no session_state
+                "sources": [
+                    {"id": doc.id, "score": round(doc.score, 3), "source": doc.source}
+                    for doc in documents
+                ],
                 "evaluation": {
                     "context_relevance": evaluation.context_relevance,
                     "answer_relevance": evaluation.answer_relevance,
@@ -165,16 +177,14 @@ class ChatInterface:
                 }
             }
     
-    def _extract_context_docs(self, result: Dict[str, Any]) -> List[str]:
-        """Extrai documentos de contexto dos tool calls"""
-        context_docs = []
-        
-        for tool_call in result.get("tool_calls", []):
-            if tool_call.get("tool") == "vector_search":
-                # Em uma implementação real, você guardaria os documentos recuperados
-                # Por enquanto, retornamos lista vazia
-                pass
-        
-        return context_docs
+    def _extract_context_docs(self, documents: List[RetrievedDocument]) -> List[str]:
+        """Textos dos trechos usados como contexto pelo agente"""
+        return [doc.text for doc in documents]
+    
+    def _context_embeddings(self, documents: List[RetrievedDocument], config: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Vetores dos trechos, reaproveitados se vierem do modelo usado na avaliação"""
+        if config.get("embedding_model") not in (None, embedding_manager.model_name):
+            return None
+        return stack_vectors(documents)
 
 chat_interface = ChatInterface()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
 from typing import Dict, Any
+from app.config import settings
 import os
 
 def render_sidebar() -> Dict[str, Any]:
@@ -15,12 +16,31 @@ def render_sidebar() -> Dict[str, Any]:
         embedding_model = st.selectbox(
             "Modelo de Embedding",
             ["all-MiniLM-L6-v2", "all-mpnet-base-v2", "paraphrase-multilingual-MiniLM-L12-v2"],
-            index=0
+            index=0,
+            help="Cada modelo busca na sua própria collection (ingira com --model)"
         )
         
         # Configurações de busca
         max_results = st.slider("Máximo de resultados", 1, 10, 5)
         confidence_threshold = st.slider("Limiar de confiança", 0.0, 1.0, 0.7)
+        use_reranker = st.checkbox(
+            "Reranking (cross-encoder)",
+            help="Avalia mais candidatos e envia ao LLM só os melhores"
+        )
+        use_mmr = st.checkbox(
+            "Diversificar resultados (MMR)",
+            help="Evita trechos quase repetidos entre os resultados"
+        )
+        mmr_lambda = st.slider(
+            "Relevância x diversidade", 0.0, 1.0, 0.5,
+            disabled=not use_mmr,
+            help="1.0 = só relevância; valores menores priorizam diversidade"
+        )
+        use_answer_cache = st.checkbox(
+            "Cache de respostas",
+            value=settings.answer_cache_enabled,
+            help="Perguntas muito parecidas com outras já respondidas reaproveitam a resposta"
+        )
         
         # Configurações de debug
         st.subheader("🔧 Debug")
@@ -55,6 +75,10 @@ def render_sidebar() -> Dict[str, Any]:
         "embedding_model": embedding_model,
         "max_results": max_results,
         "confidence_threshold": confidence_threshold,
+        "use_reranker": use_reranker,
+        "use_mmr": use_mmr,
+        "mmr_lambda": mmr_lambda,
+        "use_answer_cache": use_answer_cache,
         "show_debug": show_debug,
         "show_metrics": show_metrics
     }
@@ -62,6 +86,9 @@ def render_sidebar() -> Dict[str, Any]:
 def check_qdrant_connection() -> bool:
     """Verifica conexão com Qdrant"""
     try:
+        from app.config import settings
+        if settings.vector_backend == "local":
+            return True  # índice embutido, sem servidor
         from vector_db.qdrant_client import qdrant_manager
         # Teste simples de conexão
         qdrant_manager.client.get_collections()
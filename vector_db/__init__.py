@@ -2,9 +2,21 @@
 Vector database components
 """
 
-from .qdrant_client import qdrant_manager, QdrantManager
+from .qdrant_client import qdrant_manager, QdrantManager, get_qdrant_manager, collection_for_model
+from .retrieval_cache import retrieval_cache, RetrievalCache
+from .async_qdrant import (async_qdrant_manager, AsyncQdrantManager, get_async_qdrant_manager,
+                           get_async_qdrant, close_async_qdrant)
 
 __all__ = [
     "qdrant_manager",
-    "QdrantManager"
+    "QdrantManager",
+    "get_qdrant_manager",
+    "collection_for_model",
+    "async_qdrant_manager",
+    "AsyncQdrantManager",
+    "get_async_qdrant_manager",
+    "get_async_qdrant",
+    "close_async_qdrant",
+    "retrieval_cache",
+    "RetrievalCache"
 ]
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""Acesso assíncrono ao Qdrant com pool de conexões compartilhado"""
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams
+from typing import List, Dict, Any, Optional, Set
+from app.config import settings
+from app.core.embeddings import embedding_registry, EmbeddingManager
+from vector_db.points import point_id
+from vector_db.qdrant_client import collection_for_model, hit_to_result
+from vector_db.filters import INDEXED_FIELDS, build_filter, with_prefixes
+from vector_db.retrieval_cache import retrieval_cache
+import numpy as np
+import asyncio
+import httpx
+import random
+import weakref
+
+# Um cliente (e pool de conexões) por event loop, compartilhado por todos os managers
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncQdrantClient]" = weakref.WeakKeyDictionary()
+_ready_collections: Set[str] = set()
+
+def get_async_qdrant() -> AsyncQdrantClient:
+    """Cliente assíncrono do event loop atual"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncQdrantClient(
+            url=settings.qdrant_url,
+            api_key=settings.qdrant_api_key,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port,
+            limits=httpx.Limits(
+                max_connections=settings.qdrant_pool_size,
+                max_keepalive_connections=settings.qdrant_pool_size
+            )
+        )
+        _clients[loop] = client
+    return client
+
+async def close_async_qdrant():
+    """Fecha o cliente do event loop atual (ex.: no shutdown da aplicação)"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+class AsyncQdrantManager:
+    """Equivalente assíncrono do QdrantManager.
+
+    Todas as chamadas ao Qdrant são corrotinas nativas; pode ser usado
+    diretamente dentro de um event loop, sem uma thread por requisição.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, collection_name: Optional[str] = None):
+        self.model_name = model_name or settings.embedding_model_name
+        self.collection_name = collection_name or collection_for_model(self.model_name)
+
+    @property
+    def client(self) -> AsyncQdrantClient:
+        return get_async_qdrant()
+
+    @property
+    def embedder(self) -> EmbeddingManager:
+        """Modelo de embedding desta collection (carregado sob demanda)"""
+        return embedding_registry.get(self.model_name)
+
+    async def ensure_collection(self):
+        """Cria collection se não existir (verificado uma vez por processo)"""
+        if self.collection_name in _ready_collections:
+            return
+        if not await self.client.collection_exists(self.collection_name):
+            # Collection física versionada atrás de um alias (ver vector_db.reindex)
+            await self.client.create_collection(
+                collection_name=f"{self.collection_name}_v1",
+                vectors_config=VectorParams(
+                    size=await self.embedder.adimension(),
+                    distance=Distance.COSINE,
+                ),
+            )
+            await self.client.update_collection_aliases(change_aliases_operations=[
+                models.CreateAliasOperation(create_alias=models.CreateAlias(
+                    collection_name=f"{self.collection_name}_v1", alias_name=self.collection_name
+                ))
+            ])
+            await asyncio.to_thread(retrieval_cache.bump, self.collection_name)
+        info = await self.client.get_collection(self.collection_name)
+        for field, schema in INDEXED_FIELDS.items():
+            if field not in (info.payload_schema or {}):
+                await self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=schema
+                )
+        _ready_collections.add(self.collection_name)
+
+    async def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]] = None,
+        embeddings: Optional[np.ndarray] = None
+    ) -> int:
+        """Adiciona documentos à collection (idempotente); retorna quantos pontos foram gravados"""
+        await self.ensure_collection()
+        if metadatas is None:
+            metadatas = [{"text": text} for text in texts]
+
+        ids = [point_id(text, metadata) for text, metadata in zip(texts, metadatas)]
+        existing = await self.existing_ids(ids)
+        new = [i for i, pid in enumerate(ids) if pid not in existing]
+        if not new:
+            return 0
+
+        if embeddings is not None:
+            vectors = np.asarray(embeddings, dtype=np.float32)[new]
+        else:
+            vectors = await self.embedder.aembed_texts_array([texts[i] for i in new])
+
+        new_ids = [ids[i] for i in new]
+        payloads = [with_prefixes({"text": texts[i], **metadatas[i]}) for i in new]
+
+        # Limita os lotes simultâneos, como no QdrantManager
+        semaphore = asyncio.Semaphore(settings.qdrant_upsert_parallelism)
+        batch_size = settings.qdrant_upsert_batch_size
+
+        async def upsert(start: int):
+            end = start + batch_size
+            async with semaphore:
+                await self._upsert_with_retry(new_ids[start:end], vectors[start:end], payloads[start:end])
+
+        await asyncio.gather(*[upsert(start) for start in range(0, len(new_ids), batch_size)])
+        await asyncio.to_thread(retrieval_cache.bump, self.collection_name)
+        return len(new)
+
+    async def _upsert_with_retry(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        attempts = settings.qdrant_upsert_retries + 1
+        for attempt in range(attempts):
+            try:
+                await self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=models.Batch(ids=ids, vectors=vectors.tolist(), payloads=payloads)
+                )
+                return
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+                await asyncio.sleep(settings.qdrant_upsert_backoff * (2 ** attempt) * (1 + random.random()))
+
+    async def existing_ids(self, ids: List[str]) -> Set[str]:
+        """IDs que já existem na collection"""
+        batches = [ids[start:start + 1000] for start in range(0, len(ids), 1000)]
+        results = await asyncio.gather(*[
+            self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=batch,
+                with_payload=False,
+                with_vectors=False
+            )
+            for batch in batches
+        ])
+        return {str(record.id) for records in results for record in records}
+
+    async def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        query_vector: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """Busca por similaridade (``filters``: ver vector_db.filters); usa o mesmo cache do QdrantManager.
+
+        Versão da collection e tier Redis do cache são lidos fora do event loop.
+        """
+        cache_key = await asyncio.to_thread(
+            retrieval_cache.key, self.collection_name, query,
+            k=k, score_threshold=score_threshold, filters=filters, with_vectors=with_vectors
+        )
+        cached = await retrieval_cache.aget(cache_key)
+        if cached is not None:
+            return cached
+
+        query_embedding = query_vector if query_vector is not None else await self.embedder.aembed_query_array(query)
+
+        search_result = await self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_embedding,
+            query_filter=build_filter(filters),
+            limit=k,
+            score_threshold=score_threshold,
+            with_vectors=with_vectors
+        )
+
+        results = [hit_to_result(hit) for hit in search_result]
+        if with_vectors:
+            for result, hit in zip(results, search_result):
+                result["vector"] = np.asarray(hit.vector, dtype=np.float32)
+        await retrieval_cache.aput(cache_key, results)
+        return results
+
+    async def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Busca por similaridade para várias queries numa única requisição"""
+        if not queries:
+            return []
+        query_embeddings = await self.embedder.aembed_texts_array(queries)
+
+        query_filter = build_filter(filters)
+        search_results = await self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                models.SearchRequest(
+                    vector=embedding.tolist(),
+                    filter=query_filter,
+                    limit=k,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )
+                for embedding in query_embeddings
+            ]
+        )
+
+        return [[hit_to_result(hit) for hit in hits] for hits in search_results]
+
+# Instância global (o cliente é resolvido por event loop a cada chamada)
+async_qdrant_manager = AsyncQdrantManager()
+
+_async_managers: Dict[str, AsyncQdrantManager] = {async_qdrant_manager.model_name: async_qdrant_manager}
+
+def get_async_qdrant_manager(model_name: Optional[str] = None) -> AsyncQdrantManager:
+    """Gerenciador assíncrono da collection do modelo informado"""
+    name = model_name or settings.embedding_model_name
+    if name not in _async_managers:
+        _async_managers[name] = AsyncQdrantManager(model_name=name)
+    return _async_managers[name]
@@ -0,0 +1,90 @@
+"""Filtros de metadados para as buscas vetoriais.
+
+Um filtro é um dicionário campo -> condição, combinadas com E:
+
+    {"file_type": ".md"}                          igualdade
+    {"file_name": {"any": ["a.md", "b.pdf"]}}     pertence ao conjunto (ou uma lista)
+    {"source": {"prefix": "data/documents/faq"}}  prefixo de caminho (só ``source``)
+
+O prefixo casa por componentes do caminho: ``data/docs`` casa com
+``data/docs/a.md``, mas não com ``data/docs2/a.md``.
+"""
+
+from typing import Any, Dict, List, Optional
+from qdrant_client.http import models
+
+# Campos do payload gravados pelo DocumentIngester e seus tipos de índice
+INDEXED_FIELDS = {
+    "source": models.PayloadSchemaType.KEYWORD,
+    "source_prefixes": models.PayloadSchemaType.KEYWORD,
+    "file_type": models.PayloadSchemaType.KEYWORD,
+    "file_name": models.PayloadSchemaType.KEYWORD,
+    "chunk_id": models.PayloadSchemaType.INTEGER,
+}
+
+PREFIX_FIELDS = {"source": "source_prefixes"}
+
+def _normalize_path(path: str) -> str:
+    path = str(path).replace("\\", "/")
+    return path.rstrip("/") or "/"
+
+def source_prefixes(source: str) -> List[str]:
+    """Todos os prefixos de diretório de um caminho, incluindo ele mesmo"""
+    parts = _normalize_path(source).split("/")
+    prefixes = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+    return [prefix for prefix in prefixes if prefix]
+
+def with_prefixes(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload acrescido dos campos auxiliares usados no filtro por prefixo"""
+    extra = {
+        target: source_prefixes(payload[field])
+        for field, target in PREFIX_FIELDS.items()
+        if payload.get(field) is not None
+    }
+    return {**payload, **extra} if extra else payload
+
+def _condition(field: str, value: Any) -> Dict[str, Any]:
+    """Normaliza a condição para {"op": valor}"""
+    if isinstance(value, dict):
+        if len(value) != 1 or next(iter(value)) not in ("any", "prefix"):
+            raise ValueError(f"Condição inválida para '{field}': {value}")
+        op, operand = next(iter(value.items()))
+        if op == "prefix" and field not in PREFIX_FIELDS:
+            raise ValueError(f"Filtro por prefixo não suportado em '{field}'")
+        return {op: operand}
+    if isinstance(value, (list, tuple, set)):
+        return {"any": list(value)}
+    return {"eq": value}
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """Converte o filtro em um ``models.Filter`` do Qdrant"""
+    if not filters:
+        return None
+    must = []
+    for field, value in filters.items():
+        (op, operand), = _condition(field, value).items()
+        if op == "eq":
+            must.append(models.FieldCondition(key=field, match=models.MatchValue(value=operand)))
+        elif op == "any":
+            must.append(models.FieldCondition(key=field, match=models.MatchAny(any=list(operand))))
+        else:
+            must.append(models.FieldCondition(
+                key=PREFIX_FIELDS[field],
+                match=models.MatchValue(value=_normalize_path(operand))
+            ))
+    return models.Filter(must=must)
+
+def matches(payload: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Avalia o filtro em memória (índice local, resultados do BM25)"""
+    if not filters:
+        return True
+    for field, value in filters.items():
+        (op, operand), = _condition(field, value).items()
+        actual = payload.get(field)
+        if op == "eq" and actual != operand:
+            return False
+        if op == "any" and actual not in operand:
+            return False
+        if op == "prefix" and (actual is None or _normalize_path(operand) not in source_prefixes(actual)):
+            return False
+    return True
@@ -0,0 +1,315 @@
+"""Índice vetorial embutido no processo (alternativa ao Qdrant)"""
+
+from typing import List, Dict, Any, Optional, Callable, Set
+from pathlib import Path
+from app.config import settings
+from app.core.embeddings import embedding_registry, EmbeddingManager
+from vector_db.points import point_id
+from vector_db.qdrant_client import collection_for_model, make_result
+from vector_db.retrieval_cache import retrieval_cache
+from vector_db.filters import matches
+import numpy as np
+import threading
+import json
+import os
+
+try:
+    import hnswlib
+except ImportError:  # opcional: sem ele a busca é sempre exata
+    hnswlib = None
+
+class LocalVectorStore:
+    """Mesma interface do QdrantManager, sem servidor.
+
+    Os vetores (normalizados) ficam numa matriz float32 contígua, mapeada em
+    memória a partir de ``vectors.npy``; a busca é um produto matricial com
+    top-k vetorizado. Acima de ``local_index_hnsw_threshold`` pontos, e com
+    ``hnswlib`` instalado, a busca usa um grafo HNSW persistido ao lado.
+
+    Pensado para um único processo escritor (testes, execução local, bases
+    pequenas).
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        directory: Optional[str] = None
+    ):
+        self.model_name = model_name or settings.embedding_model_name
+        self.collection_name = collection_name or collection_for_model(self.model_name)
+        self.path = Path(directory or settings.local_index_dir) / self.collection_name
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._hnsw = None
+        self._load()
+
+    @property
+    def embedder(self) -> EmbeddingManager:
+        """Modelo de embedding desta collection (carregado sob demanda)"""
+        return embedding_registry.get(self.model_name)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # Persistência
+
+    def _load(self):
+        points_file = self.path / "points.json"
+        vectors_file = self.path / "vectors.npy"
+        if not points_file.exists() or not vectors_file.exists():
+            return
+
+        with open(points_file, "r", encoding="utf-8") as f:
+            points = json.load(f)
+        vectors = np.load(vectors_file, mmap_mode="r")
+
+        # Gravação interrompida: mantém apenas o trecho consistente
+        count = min(len(points["ids"]), len(vectors))
+        self._vectors = vectors[:count]
+        self._ids = points["ids"][:count]
+        self._payloads = points["payloads"][:count]
+        self._positions = {pid: i for i, pid in enumerate(self._ids)}
+
+        hnsw_file = self.path / "hnsw.bin"
+        if hnswlib is not None and hnsw_file.exists():
+            index = hnswlib.Index(space="ip", dim=self._vectors.shape[1])
+            index.load_index(str(hnsw_file), max_elements=count)
+            if index.get_current_count() == count:
+                index.set_ef(settings.local_index_hnsw_ef)
+                self._hnsw = index
+
+    def _save(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        vectors_tmp = self.path / "vectors.tmp.npy"
+        points_tmp = self.path / "points.json.tmp"
+
+        np.save(vectors_tmp, np.ascontiguousarray(self._vectors, dtype=np.float32))
+        with open(points_tmp, "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids, "payloads": self._payloads}, f, ensure_ascii=False)
+        os.replace(vectors_tmp, self.path / "vectors.npy")
+        os.replace(points_tmp, self.path / "points.json")
+
+        hnsw_file = self.path / "hnsw.bin"
+        if self._hnsw is not None:
+            self._hnsw.save_index(str(hnsw_file))
+        elif hnsw_file.exists():
+            hnsw_file.unlink()
+
+        # Volta a ler do arquivo: a matriz não fica duplicada na memória
+        self._vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+
+    # HNSW
+
+    def _use_hnsw(self) -> bool:
+        threshold = settings.local_index_hnsw_threshold
+        return hnswlib is not None and threshold > 0 and len(self) >= threshold
+
+    def _build_hnsw(self):
+        index = hnswlib.Index(space="ip", dim=self._vectors.shape[1])
+        index.init_index(
+            max_elements=len(self),
+            M=settings.local_index_hnsw_m,
+            ef_construction=settings.local_index_hnsw_ef_construction
+        )
+        index.add_items(np.asarray(self._vectors), np.arange(len(self)))
+        index.set_ef(settings.local_index_hnsw_ef)
+        self._hnsw = index
+
+    # Interface do QdrantManager
+
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]] = None,
+        embeddings: Optional[np.ndarray] = None,
+        embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None
+    ) -> int:
+        """Adiciona documentos ao índice (idempotente); retorna quantos pontos foram gravados"""
+        if metadatas is None:
+            metadatas = [{"text": text} for text in texts]
+
+        ids = [point_id(text, metadata) for text, metadata in zip(texts, metadatas)]
+        seen = self.existing_ids(ids)
+        new = []
+        for i, pid in enumerate(ids):
+            # Também descarta repetições dentro do próprio lote
+            if pid not in seen:
+                seen.add(pid)
+                new.append(i)
+
+        print(f"   📦 {len(new)} novos chunks, {len(texts) - len(new)} já indexados")
+        if not new:
+            return 0
+
+        if embeddings is not None:
+            vectors = np.asarray(embeddings, dtype=np.float32)[new]
+        else:
+            vectors = (embed_fn or self.embedder.embed_texts_array)([texts[i] for i in new])
+        vectors = _normalize(vectors)
+
+        with self._lock:
+            start = len(self)
+            if self._vectors is None:
+                self._vectors = vectors
+            else:
+                self._vectors = np.concatenate([self._vectors, vectors])
+            for offset, i in enumerate(new):
+                self._ids.append(ids[i])
+                self._payloads.append({"text": texts[i], **metadatas[i]})
+                self._positions[ids[i]] = start + offset
+
+            if self._hnsw is not None:
+                self._hnsw.resize_index(len(self))
+                self._hnsw.add_items(vectors, np.arange(start, len(self)))
+            elif self._use_hnsw():
+                self._build_hnsw()
+            self._save()
+        retrieval_cache.bump(str(self.path))
+        return len(new)
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """IDs que já existem no índice"""
+        return {pid for pid in ids if pid in self._positions}
+
+    def get_payloads(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Payloads dos pontos informados (IDs ausentes são ignorados)"""
+        return {pid: self._payloads[self._positions[pid]] for pid in ids if pid in self._positions}
+
+    def remove_stale(self, keep: Dict[str, List[str]]) -> None:
+        """Remove pontos antigos de cada source que não estão em ``keep[source]``"""
+        with self._lock:
+            keep_ids = {source: set(ids) for source, ids in keep.items()}
+            rows = [
+                i for i, (pid, payload) in enumerate(zip(self._ids, self._payloads))
+                if payload.get("source") not in keep_ids or pid in keep_ids[payload["source"]]
+            ]
+            if len(rows) == len(self):
+                return
+
+            self._vectors = np.asarray(self._vectors)[rows]
+            self._ids = [self._ids[i] for i in rows]
+            self._payloads = [self._payloads[i] for i in rows]
+            self._positions = {pid: i for i, pid in enumerate(self._ids)}
+            # As posições mudaram: o grafo é reconstruído
+            self._hnsw = None
+            if self._use_hnsw():
+                self._build_hnsw()
+            self._save()
+        retrieval_cache.bump(str(self.path))
+
+    def search_vectors(
+        self,
+        vectors: np.ndarray,
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """Busca os k vizinhos de cada linha de ``vectors`` (similaridade de cosseno)"""
+        queries = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+        with self._lock:
+            matrix, ids, payloads, hnsw = self._vectors, self._ids, self._payloads, self._hnsw
+        if matrix is None or not len(payloads) or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        # Com filtro, a busca é exata sobre o subconjunto que passa por ele
+        candidates = None
+        if filters:
+            candidates = np.flatnonzero([matches(payload, filters) for payload in payloads[:len(matrix)]])
+            if not len(candidates):
+                return [[] for _ in range(len(queries))]
+
+        if hnsw is not None and candidates is None:
+            rows, distances = hnsw.knn_query(queries, k=min(k, len(matrix)))
+            scores = 1.0 - distances
+        else:
+            subset = matrix if candidates is None else np.asarray(matrix)[candidates]
+            k = min(k, len(subset))
+            # Uma única multiplicação de matrizes para todas as queries
+            similarities = queries @ subset.T
+            rows = np.argpartition(-similarities, k - 1, axis=1)[:, :k] if k < len(subset) \
+                else np.tile(np.arange(len(subset)), (len(queries), 1))
+            top = np.take_along_axis(similarities, rows, axis=1)
+            order = np.argsort(-top, axis=1, kind="stable")
+            rows = np.take_along_axis(rows, order, axis=1)
+            scores = np.take_along_axis(top, order, axis=1)
+            if candidates is not None:
+                rows = candidates[rows]
+
+        results = [
+            [
+                make_result(ids[row], payloads[row], float(score))
+                for row, score in zip(query_rows, query_scores)
+                if score >= score_threshold
+            ]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+        if with_vectors:
+            for query_results, query_rows in zip(results, rows):
+                for result, row in zip(query_results, query_rows):
+                    result["vector"] = np.array(matrix[row], dtype=np.float32)
+        return results
+
+    def search_vector(
+        self,
+        vector: np.ndarray,
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Busca pelos k vizinhos mais próximos de um vetor (similaridade de cosseno)"""
+        return self.search_vectors(np.asarray(vector).reshape(1, -1), k, score_threshold, filters, with_vectors)[0]
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        query_vector: Optional[np.ndarray] = None
+    ) -> List[Dict[str, Any]]:
+        """Busca por similaridade (``filters``: ver vector_db.filters).
+
+        ``query_vector`` reaproveita um embedding já calculado da consulta
+        (ex.: pelo roteador), do mesmo modelo da collection.
+        """
+        print(f"   🔎 Buscando (índice local): k={k}, threshold={score_threshold}" + (f", filtros={filters}" if filters else ""))
+        if not len(self):
+            return []
+        # O caminho identifica o índice (a versão é incrementada a cada escrita)
+        cache_key = retrieval_cache.key(
+            str(self.path), query,
+            k=k, score_threshold=score_threshold, filters=filters, with_vectors=with_vectors
+        )
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if query_vector is None:
+            query_vector = self.embedder.embed_query_array(query)
+        results = self.search_vector(query_vector, k, score_threshold, filters, with_vectors)
+        retrieval_cache.put(cache_key, results)
+        return results
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Busca por similaridade para várias queries (um lote no encoder, uma multiplicação de matrizes)"""
+        print(f"   🔎 Buscando {len(queries)} queries (índice local): k={k}, threshold={score_threshold}")
+        if not queries or not len(self):
+            return [[] for _ in queries]
+        return self.search_vectors(self.embedder.embed_texts_array(queries), k, score_threshold, filters)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
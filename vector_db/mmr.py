@@ -0,0 +1,82 @@
+"""Diversificação dos resultados por maximal marginal relevance (MMR)"""
+
+from typing import List, Dict, Any, Optional
+from app.config import settings
+import numpy as np
+
+def mmr_select(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    relevance: Optional[np.ndarray] = None
+) -> List[int]:
+    """Índices de ``k`` candidatos escolhidos por MMR, na ordem de seleção.
+
+    A cada passo escolhe o candidato que maximiza
+    ``lambda * sim(query, c) - (1 - lambda) * max(sim(c, já escolhidos))``.
+    As similaridades entre candidatos são calculadas uma única vez numa
+    matriz (n, n); cada passo é só uma atualização vetorizada do máximo.
+    ``relevance`` (em [0, 1]) substitui ``sim(query, c)``, ex.: scores do reranker.
+    """
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    if relevance is None:
+        relevance = candidates @ query
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    for _ in range(1, k):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+def mmr_results(
+    query_vector: np.ndarray,
+    candidates: List[Dict[str, Any]],
+    k: int,
+    lambda_mult: Optional[float] = None,
+    relevance: Optional[np.ndarray] = None,
+    embedder=None,
+    with_vectors: bool = False
+) -> List[Dict[str, Any]]:
+    """Reduz resultados de busca a ``k`` resultados diversos por MMR.
+
+    Resultados sem "vector" (ex.: vindos só do BM25 na busca híbrida) têm o
+    texto embedado com ``embedder``. Os resultados recebidos não são
+    alterados (podem estar no cache de buscas).
+    """
+    lambda_mult = settings.mmr_lambda if lambda_mult is None else lambda_mult
+    print(f"   🎯 MMR: {len(candidates)} candidatos -> {min(k, len(candidates))} (lambda={lambda_mult})")
+    if not candidates:
+        return []
+
+    missing = [i for i, candidate in enumerate(candidates) if candidate.get("vector") is None]
+    if missing:
+        texts = embedder.embed_texts_array([candidates[i]["text"] for i in missing])
+        candidates = list(candidates)
+        for i, vector in zip(missing, texts):
+            candidates[i] = {**candidates[i], "vector": np.asarray(vector, dtype=np.float32)}
+
+    vectors = np.stack([candidate["vector"] for candidate in candidates])
+    selected = [candidates[i] for i in mmr_select(query_vector, vectors, k, lambda_mult, relevance)]
+    if with_vectors:
+        return selected
+    return [{key: value for key, value in result.items() if key != "vector"} for result in selected]
@@ -0,0 +1,27 @@
+"""Identificadores determinísticos de pontos"""
+
+import hashlib
+import uuid
+from typing import Any, Dict, Optional
+
+# Namespace fixo: o mesmo chunk gera sempre o mesmo ID entre execuções
+POINT_NAMESPACE = uuid.UUID("6f1c2a9e-5b7d-4e8a-9c3f-2d4b6a8e0f13")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """ID do ponto derivado de (source, chunk_id, hash do conteúdo).
+
+    Reingerir o mesmo chunk produz o mesmo ID (upsert idempotente); se o
+    conteúdo mudar, o ID muda junto.
+    """
+    metadata = metadata or {}
+    key = "\x00".join([
+        str(metadata.get("source", "")),
+        str(metadata.get("chunk_id", "")),
+        content_hash(text),
+    ])
+    return str(uuid.uuid5(POINT_NAMESPACE, key))
@@ -1,80 +1,342 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Set
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from app.config import settings
-from app.core.embeddings import embedding_manager
-import uuid
-from ui.sidebar import render_sidebar
+from app.core.embeddings import embedding_registry, EmbeddingManager
+from vector_db.points import point_id
+from vector_db.filters import INDEXED_FIELDS, build_filter, source_prefixes, with_prefixes
+from vector_db.retrieval_cache import retrieval_cache
+import numpy as np
+import threading
+import random
+import time
+import re
+
+def collection_for_model(model_name: Optional[str] = None) -> str:
+    """Nome da collection de um modelo de embedding (cada modelo tem a sua)"""
+    name = model_name or settings.embedding_model_name
+    if name == settings.embedding_model_name:
+        return settings.qdrant_collection_name
+    slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+    return f"{settings.qdrant_collection_name}__{slug}"
+
+def make_result(pid: str, payload: Dict[str, Any], score: float) -> Dict[str, Any]:
+    """Dicionário de resultado das buscas (id, text, score, metadata)"""
+    return {
+        "id": pid,
+        "text": payload["text"],
+        "score": score,
+        "metadata": {k: v for k, v in payload.items() if k != "text"}
+    }
+
+def hit_to_result(hit) -> Dict[str, Any]:
+    """Converte um ponto retornado pelo Qdrant no dicionário de resultado"""
+    return make_result(str(hit.id), hit.payload, hit.score)
 
 class QdrantManager:
-    def __init__(self):
-        self.client = QdrantClient(
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        client: Optional[QdrantClient] = None
+    ):
+        self.client = client or QdrantClient(
             url=settings.qdrant_url,
             api_key=settings.qdrant_api_key
         )
-        self.collection_name = "documents"
+        self.model_name = model_name or settings.embedding_model_name
+        self.collection_name = collection_name or collection_for_model(self.model_name)
         self._ensure_collection()
-    
+
+    @property
+    def embedder(self) -> EmbeddingManager:
+        """Modelo de embedding desta collection (carregado sob demanda)"""
+        return embedding_registry.get(self.model_name)
+
     def _ensure_collection(self):
-        """Cria collection se não existir"""
+        """Cria collection se não existir, com os índices de payload usados nos filtros"""
         try:
-            self.client.get_collection(self.collection_name)
+            info = self.client.get_collection(self.collection_name)
         except:
+            # Collection física versionada atrás de um alias (ver vector_db.reindex)
             self.client.create_collection(
-                collection_name=self.collection_name,
+                collection_name=f"{self.collection_name}_v1",
                 vectors_config=VectorParams(
-                    size=embedding_manager.dimension,
+                    size=self.embedder.dimension,
                     distance=Distance.COSINE,
                 ),
             )
-    
-    def add_documents(self, texts: List[str], metadatas: List[Dict[str, Any]] = None):
-        """Adiciona documentos à collection"""
+            self.client.update_collection_aliases(change_aliases_operations=[
+                models.CreateAliasOperation(create_alias=models.CreateAlias(
+                    collection_name=f"{self.collection_name}_v1", alias_name=self.collection_name
+                ))
+            ])
+            retrieval_cache.bump(self.collection_name)
+            info = self.client.get_collection(self.collection_name)
+
+        for field, schema in INDEXED_FIELDS.items():
+            if field not in (info.payload_schema or {}):
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=schema
+                )
+        self._backfill_source_prefixes()
+
+    def _backfill_source_prefixes(self):
+        """Preenche ``source_prefixes`` em pontos gravados antes do filtro por prefixo"""
+        missing = models.Filter(must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="source_prefixes"))])
+        offset = None
+        sources = set()
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=missing,
+                limit=1000,
+                offset=offset,
+                with_payload=["source"],
+                with_vectors=False
+            )
+            sources.update(r.payload["source"] for r in records if r.payload.get("source") is not None)
+            if offset is None:
+                break
+
+        for source in sources:
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={"source_prefixes": source_prefixes(source)},
+                points=models.Filter(must=[models.FieldCondition(key="source", match=models.MatchValue(value=source))])
+            )
+        if sources:
+            print(f"   🗂️ source_prefixes preenchido para {len(sources)} arquivos")
+
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]] = None,
+        embeddings: Optional[np.ndarray] = None,
+        embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None
+    ) -> int:
+        """Adiciona documentos à collection (idempotente); retorna quantos pontos foram gravados.
+
+        Os IDs são derivados de (source, chunk_id, hash do conteúdo), então
+        chunks já presentes são ignorados antes mesmo de gerar embeddings.
+        ``embeddings`` (alinhado a ``texts``) ou ``embed_fn`` substituem o
+        encoder padrão.
+        """
         if metadatas is None:
             metadatas = [{"text": text} for text in texts]
-        
-        embeddings = embedding_manager.embed_texts(texts)
-        
-        points = [
-            PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
-                payload={"text": text, **metadata}
+
+        ids = [point_id(text, metadata) for text, metadata in zip(texts, metadatas)]
+        existing = self.existing_ids(ids)
+        new = [i for i, pid in enumerate(ids) if pid not in existing]
+
+        print(f"   📦 {len(new)} novos chunks, {len(texts) - len(new)} já indexados")
+        if not new:
+            return 0
+
+        new_texts = [texts[i] for i in new]
+        if embeddings is not None:
+            vectors = np.asarray(embeddings, dtype=np.float32)[new]
+        else:
+            vectors = (embed_fn or self.embedder.embed_texts_array)(new_texts)
+
+        new_ids = [ids[i] for i in new]
+        payloads = [with_prefixes({"text": texts[i], **metadatas[i]}) for i in new]
+        self._upsert_batches(new_ids, vectors, payloads)
+        retrieval_cache.bump(self.collection_name)
+        return len(new)
+
+    def _upsert_batches(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        """Envia lotes em paralelo, com no máximo N lotes em voo"""
+        batch_size = settings.qdrant_upsert_batch_size
+        ranges = [(start, start + batch_size) for start in range(0, len(ids), batch_size)]
+
+        with ThreadPoolExecutor(max_workers=settings.qdrant_upsert_parallelism) as executor:
+            in_flight = set()
+            for start, end in ranges:
+                if len(in_flight) >= settings.qdrant_upsert_parallelism:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                # Cada lote só é convertido para o formato da API dentro do worker
+                in_flight.add(executor.submit(
+                    self._upsert_with_retry, ids[start:end], vectors[start:end], payloads[start:end]
+                ))
+            for future in in_flight:
+                future.result()
+
+    def _upsert_with_retry(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        """Upsert de um lote com retry e backoff exponencial (seguro: IDs determinísticos)"""
+        attempts = settings.qdrant_upsert_retries + 1
+        for attempt in range(attempts):
+            try:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=models.Batch(ids=ids, vectors=vectors.tolist(), payloads=payloads)
+                )
+                return
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = settings.qdrant_upsert_backoff * (2 ** attempt) * (1 + random.random())
+                print(f"   ⚠️ Falha no upsert ({e}); nova tentativa em {delay:.1f}s")
+                time.sleep(delay)
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """IDs que já existem na collection"""
+        found = set()
+        batch_size = 1000
+        for start in range(0, len(ids), batch_size):
+            records = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=ids[start:start + batch_size],
+                with_payload=False,
+                with_vectors=False
             )
-            for text, embedding, metadata in zip(texts, embeddings, metadatas)
-        ]
-        
-        self.client.upsert(
+            found.update(str(record.id) for record in records)
+        return found
+
+    def get_payloads(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Payloads dos pontos informados (IDs ausentes são ignorados)"""
+        records = self.client.retrieve(
             collection_name=self.collection_name,
-            points=points
+            ids=ids,
+            with_payload=True,
+            with_vectors=False
         )
-    
+        return {str(record.id): record.payload for record in records}
+
+    def remove_stale(self, keep: Dict[str, List[str]]) -> None:
+        """Remove pontos antigos de cada source que não estão em ``keep[source]``.
+
+        Usado na reingestão: chunks de arquivos alterados ganham novos IDs e
+        os pontos da versão anterior são descartados.
+        """
+        for source, ids in keep.items():
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(
+                    filter=models.Filter(
+                        must=[models.FieldCondition(key="source", match=models.MatchValue(value=source))],
+                        must_not=[models.HasIdCondition(has_id=ids)]
+                    )
+                )
+            )
+        if keep:
+            retrieval_cache.bump(self.collection_name)
+
     def similarity_search(
-        self, 
-        query: str, 
+        self,
+        query: str,
         k: int = 5,
-        score_threshold: float = 0.3
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        query_vector: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
-        """Busca por similaridade"""
-        query_embedding = embedding_manager.embed_query(query)
-        
-        print(f"   🔎 Buscando: k={k}, threshold={score_threshold}")
-        
+        """Busca por similaridade (``filters``: ver vector_db.filters).
+
+        ``query_vector`` reaproveita um embedding já calculado da consulta
+        (ex.: pelo roteador), do mesmo modelo da collection.
+        """
+        cache_key = retrieval_cache.key(
+            self.collection_name, query,
+            k=k, score_threshold=score_threshold, filters=filters, with_vectors=with_vectors
+        )
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            print(f"   ⚡ Busca em cache: {len(cached)} resultados")
+            return cached
+
+        query_embedding = query_vector if query_vector is not None else self.embedder.embed_query_array(query)
+
+        print(f"   🔎 Buscando: k={k}, threshold={score_threshold}" + (f", filtros={filters}" if filters else ""))
+
+        results = self.search_vector(query_embedding, k, score_threshold, filters, with_vectors)
+        retrieval_cache.put(cache_key, results)
+        return results
+
+    def search_vector(
+        self,
+        vector: np.ndarray,
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Busca pelos k vizinhos de um vetor; ``with_vectors`` inclui "vector" em cada resultado"""
         search_result = self.client.search(
             collection_name=self.collection_name,
-            query_vector=query_embedding,
+            query_vector=vector,
+            query_filter=build_filter(filters),
             limit=k,
-            score_threshold=score_threshold
+            score_threshold=score_threshold,
+            with_vectors=with_vectors
         )
-        
-        return [
-            {
-                "text": hit.payload["text"],
-                "score": hit.score,
-                "metadata": {k: v for k, v in hit.payload.items() if k != "text"}
-            }
-            for hit in search_result
-        ]
-
-qdrant_manager = QdrantManager()
\ No newline at end of file
+
+        results = [hit_to_result(hit) for hit in search_result]
+        if with_vectors:
+            for result, hit in zip(results, search_result):
+                result["vector"] = np.asarray(hit.vector, dtype=np.float32)
+        return results
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        score_threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Busca por similaridade para várias queries de uma vez.
+
+        Todas as queries passam pelo encoder num único lote e vão ao Qdrant
+        numa única requisição; os resultados seguem a ordem de ``queries``.
+        """
+        if not queries:
+            return []
+        query_embeddings = self.embedder.embed_texts_array(queries)
+
+        print(f"   🔎 Buscando {len(queries)} queries: k={k}, threshold={score_threshold}")
+
+        query_filter = build_filter(filters)
+        search_results = self.client.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                models.SearchRequest(
+                    vector=embedding.tolist(),
+                    filter=query_filter,
+                    limit=k,
+                    score_threshold=score_threshold,
+                    with_payload=True
+                )
+                for embedding in query_embeddings
+            ]
+        )
+
+        return [[hit_to_result(hit) for hit in hits] for hits in search_results]
+
+def create_vector_store(model_name: Optional[str] = None, client: Optional[QdrantClient] = None):
+    """Cria o gerenciador do backend configurado em ``settings.vector_backend``"""
+    if settings.vector_backend == "local":
+        from vector_db.local_index import LocalVectorStore
+        return LocalVectorStore(model_name=model_name)
+    if settings.vector_backend != "qdrant":
+        raise ValueError(f"Backend vetorial inválido: {settings.vector_backend}")
+    return QdrantManager(model_name=model_name, client=client)
+
+qdrant_manager = create_vector_store()
+
+# Um gerenciador por modelo de embedding, todos compartilhando o mesmo cliente
+_managers: Dict[str, QdrantManager] = {qdrant_manager.model_name: qdrant_manager}
+_managers_lock = threading.Lock()
+
+def get_qdrant_manager(model_name: Optional[str] = None):
+    """Retorna o gerenciador da collection do modelo informado"""
+    name = model_name or settings.embedding_model_name
+    with _managers_lock:
+        if name not in _managers:
+            _managers[name] = create_vector_store(name, client=getattr(qdrant_manager, "client", None))
+        return _managers[name]
@@ -0,0 +1,207 @@
+"""Reindexação blue/green: collections versionadas atrás de um alias.
+
+O nome usado nas buscas (ex.: ``documents``) é um alias do Qdrant que aponta
+para uma collection física ``documents_vN``. Uma reindexação completa grava
+em ``documents_vN+1`` sem tocar na versão servida, confere o resultado, troca
+o alias numa única operação atômica e descarta as versões antigas.
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from pathlib import Path
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams
+from app.config import settings
+from app.core.embeddings import embedding_registry
+from vector_db.qdrant_client import QdrantManager, collection_for_model
+from vector_db.sparse_index import get_sparse_index
+from vector_db.retrieval_cache import retrieval_cache
+from vector_db.points import point_id
+import numpy as np
+import random
+import time
+import os
+import re
+
+def version_name(alias: str, version: int) -> str:
+    return f"{alias}_v{version}"
+
+def list_versions(client: QdrantClient, alias: str) -> List[Tuple[int, str]]:
+    """Versões físicas existentes de um alias, da mais antiga para a mais nova"""
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions)
+
+def current_collection(client: QdrantClient, alias: str) -> Optional[str]:
+    """Collection servida pelo alias (ou o próprio nome, se for uma collection física antiga)"""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    if alias in {collection.name for collection in client.get_collections().collections}:
+        return alias
+    return None
+
+def create_version(client: QdrantClient, alias: str, dimension: int) -> str:
+    """Cria a próxima versão vazia, com a indexação HNSW adiada até o fim da carga"""
+    versions = list_versions(client, alias)
+    name = version_name(alias, versions[-1][0] + 1 if versions else 1)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+        # Carga em massa sem construir o grafo a cada lote: menos CPU disputada com as buscas
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+    )
+    return name
+
+def finalize_version(client: QdrantClient, collection_name: str, timeout: Optional[float] = None):
+    """Reativa a indexação e espera a collection ficar pronta (status green)"""
+    client.update_collection(
+        collection_name=collection_name,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=settings.reindex_indexing_threshold)
+    )
+    deadline = time.monotonic() + (timeout or settings.reindex_ready_timeout)
+    while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Collection '{collection_name}' não ficou pronta a tempo")
+        time.sleep(1.0)
+
+def verify_version(
+    store: QdrantManager,
+    texts: List[str],
+    metadatas: List[Dict[str, Any]],
+    queries: Optional[List[str]] = None,
+    sample_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """Confere a nova versão antes da troca do alias.
+
+    - o número de pontos bate com o de chunks únicos ingeridos;
+    - uma amostra de chunks encontra a si mesma no top-5;
+    - cada query de verificação retorna ao menos um resultado.
+    """
+    expected = len({point_id(text, metadata) for text, metadata in zip(texts, metadatas)})
+    count = store.client.count(store.collection_name, exact=True).count
+    if count != expected:
+        raise RuntimeError(f"'{store.collection_name}' tem {count} pontos, esperado {expected}")
+
+    size = min(sample_size or settings.reindex_sample_size, len(texts))
+    sample = random.Random(0).sample(range(len(texts)), size)
+    results = store.similarity_search_batch([texts[i] for i in sample], k=5, score_threshold=0.0)
+    misses = [
+        i for i, hits in zip(sample, results)
+        if point_id(texts[i], metadatas[i]) not in {hit["id"] for hit in hits}
+    ]
+    if misses:
+        raise RuntimeError(f"{len(misses)} de {size} chunks amostrados não se encontraram na busca")
+
+    queries = queries or []
+    empty = [q for q, hits in zip(queries, store.similarity_search_batch(queries, k=5, score_threshold=0.0)) if not hits]
+    if empty:
+        raise RuntimeError(f"Queries de verificação sem resultado: {empty}")
+
+    return {"points": count, "sampled": size, "queries": len(queries)}
+
+def preserve_legacy(client: QdrantClient, alias: str) -> str:
+    """Copia a collection física antiga ``alias`` para ``alias_v0``, que fica como versão de rollback"""
+    name = version_name(alias, 0)
+    vectors = client.get_collection(alias).config.params.vectors
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=vectors.size, distance=vectors.distance)
+    )
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=alias, limit=settings.qdrant_upsert_batch_size, offset=offset,
+            with_payload=True, with_vectors=True
+        )
+        if points:
+            client.upsert(collection_name=name, points=[
+                models.PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points
+            ])
+        if offset is None:
+            return name
+
+def swap_alias(client: QdrantClient, alias: str, collection_name: str) -> Optional[str]:
+    """Aponta o alias para ``collection_name`` numa única operação; retorna a versão anterior.
+
+    Na migração de uma collection física antiga com o nome do alias, o
+    Qdrant não permite criar o alias antes de remover a collection: ela é
+    copiada para ``alias_v0`` (rollback) e removida imediatamente antes da
+    criação do alias. Nesse intervalo (uma chamada ao Qdrant) as buscas em
+    ``alias`` falham; as trocas seguintes são atômicas.
+    """
+    previous = current_collection(client, alias)
+    operations = []
+    dropped_at = None
+    if previous == alias:
+        previous = preserve_legacy(client, alias)
+        print(f"   ⚠️ Migrando collection física '{alias}' para alias (cópia em '{previous}'); "
+              f"buscas em '{alias}' falham até o alias ser criado")
+        client.delete_collection(alias)
+        dropped_at = time.perf_counter()
+    elif previous is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    if dropped_at is not None:
+        print(f"   ⏱️ '{alias}' ficou indisponível por {(time.perf_counter() - dropped_at) * 1000:.0f} ms")
+    retrieval_cache.bump(alias)
+    return previous
+
+def garbage_collect(client: QdrantClient, alias: str, keep: Optional[int] = None) -> List[str]:
+    """Remove versões antigas, mantendo a atual e as ``keep`` anteriores (rollback)"""
+    keep = settings.reindex_keep_versions if keep is None else keep
+    current = current_collection(client, alias)
+    older = [name for _, name in list_versions(client, alias) if name != current]
+    stale = older[:len(older) - keep] if keep else older
+    for name in stale:
+        client.delete_collection(name)
+    return stale
+
+def rebuild(
+    client: QdrantClient,
+    texts: List[str],
+    metadatas: List[Dict[str, Any]],
+    model_name: Optional[str] = None,
+    alias: Optional[str] = None,
+    embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+    queries: Optional[List[str]] = None
+) -> str:
+    """Reconstrói o índice de ``alias`` numa nova versão e troca o alias; retorna a nova collection.
+
+    Se a verificação falhar, a nova versão é descartada e o alias continua
+    apontando para a versão anterior.
+    """
+    alias = alias or collection_for_model(model_name)
+    name = create_version(client, alias, embedding_registry.get(model_name).dimension)
+    print(f"🔁 Reindexando '{alias}' em '{name}'...")
+
+    try:
+        store = QdrantManager(model_name=model_name, collection_name=name, client=client)
+        store.add_documents(texts, metadatas, embed_fn=embed_fn)
+        finalize_version(client, name)
+        report = verify_version(store, texts, metadatas, queries)
+        print(f"   ✅ Verificação: {report}")
+
+        sparse = get_sparse_index(name)
+        sparse.add([point_id(t, m) for t, m in zip(texts, metadatas)], texts, metadatas)
+        sparse.save()
+    except Exception:
+        client.delete_collection(name)
+        raise
+
+    previous = swap_alias(client, alias, name)
+    # O índice BM25 servido acompanha a troca do alias
+    os.replace(sparse.path, Path(settings.sparse_index_dir) / f"{alias}.json")
+    print(f"   🔀 Alias '{alias}': {previous or '-'} -> {name}")
+
+    removed = garbage_collect(client, alias)
+    if removed:
+        print(f"   🗑️ Versões removidas: {', '.join(removed)}")
+    return name
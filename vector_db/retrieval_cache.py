@@ -0,0 +1,257 @@
+"""Cache de resultados da busca vetorial.
+
+A chave combina a query normalizada, os parâmetros da busca (k, threshold,
+filtros...) e a versão da collection. A versão é um contador incrementado a
+cada escrita (``add_documents``, ``remove_stale``, troca de alias), então uma
+ingestão nunca deixa resultados antigos serem servidos: as entradas da versão
+anterior simplesmente deixam de ser encontradas e expiram pelo TTL/LRU.
+
+Tiers:
+  - LRU em memória com TTL (sempre);
+  - Redis (opcional, ``redis_url``), compartilhado entre processos.
+
+As versões ficam em arquivos em ``retrieval_cache_dir``, para que o
+``scripts/ingest.py`` rodando em outro processo também invalide o cache da
+aplicação; com Redis, a chave inclui também um contador compartilhado.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.core.embedding_cache import normalize_text
+import numpy as np
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+try:
+    import redis
+except ImportError:  # opcional: sem ele o cache é só em memória
+    redis = None
+
+def normalize_query(query: str) -> str:
+    """Forma canônica da pergunta: "O que é RAG" e "o que é RAG?" viram a mesma chave"""
+    return normalize_text(query).casefold().rstrip("?!.;: ")
+
+def _namespace_slug(namespace: str) -> str:
+    return hashlib.blake2b(namespace.encode("utf-8"), digest_size=8).hexdigest()
+
+class RetrievalCache:
+    """Cache de resultados de ``similarity_search`` por (query, parâmetros, versão)"""
+
+    def __init__(
+        self,
+        max_items: Optional[int] = None,
+        ttl: Optional[float] = None,
+        directory: Optional[str] = None,
+        redis_url: Optional[str] = None,
+        redis_client=None,
+        enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.retrieval_cache_enabled if enabled is None else enabled
+        self.max_items = settings.retrieval_cache_items if max_items is None else max_items
+        self.ttl = settings.retrieval_cache_ttl if ttl is None else ttl
+        self.directory = Path(directory or settings.retrieval_cache_dir)
+        self._redis = redis_client if redis_client is not None else self._connect(redis_url or settings.redis_url)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _connect(url: Optional[str]):
+        if not url:
+            return None
+        if redis is None:
+            print("⚠️ REDIS_URL definido, mas o pacote 'redis' não está instalado; cache só em memória")
+            return None
+        return redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    # Versões das collections
+
+    def _version_path(self, namespace: str) -> Path:
+        return self.directory / f"{_namespace_slug(namespace)}.version"
+
+    def version(self, namespace: str) -> Tuple[int, ...]:
+        """Versão atual da collection: (arquivo,) ou (arquivo, Redis); zeros se nunca foi escrita"""
+        versions = (self._file_version(namespace),)
+        if self._redis is not None:
+            value = self._redis.get(f"rag:retrieval:version:{namespace}")
+            versions += (int(value) if value is not None else 0,)
+        return versions
+
+    def _file_version(self, namespace: str) -> int:
+        try:
+            return int(self._version_path(namespace).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self, namespace: str):
+        """Invalida os resultados em cache da collection.
+
+        A versão em arquivo é sempre incrementada, então processos da mesma
+        máquina deixam de servir as entradas antigas mesmo que o Redis falhe.
+        Se o ``INCR`` no Redis falhar, o erro sobe para quem escreveu: leitores
+        em outras máquinas ainda veriam a versão antiga.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._version_path(namespace)
+        with open(path.with_suffix(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            version = self._file_version(namespace) + 1
+            tmp = path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(str(version), encoding="utf-8")
+            os.replace(tmp, path)
+
+        if self._redis is not None:
+            try:
+                self._redis.incr(f"rag:retrieval:version:{namespace}")
+            except Exception as e:
+                # Este processo para de usar o cache; a falha segue para a ingestão
+                self.enabled = False
+                raise RuntimeError(f"Falha ao invalidar o cache de buscas no Redis: {e}") from e
+
+    # Entradas
+
+    def key(self, namespace: str, query: str, **params) -> Optional[str]:
+        """Chave da busca na versão atual (``None`` com o cache desativado).
+
+        Deve ser obtida antes da busca: se uma escrita terminar no meio dela,
+        o resultado fica gravado sob a versão antiga e nunca é servido.
+        """
+        if not self.enabled:
+            return None
+        try:
+            version = self.version(namespace)
+        except Exception as e:
+            print(f"⚠️ Cache de buscas indisponível: {e}")
+            return None
+        raw = json.dumps([namespace, version, normalize_query(query), params], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        if key is None:
+            return None
+        results = self._memory_get(key)
+        if results is not None:
+            return results
+        return self._shared_get(key)
+
+    async def aget(self, key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Versão assíncrona de get: o tier em memória responde direto; o Redis roda numa thread"""
+        if key is None:
+            return None
+        results = self._memory_get(key)
+        if results is not None:
+            return results
+        if self._redis is None:
+            self.misses += 1
+            return None
+        return await asyncio.to_thread(self._shared_get, key)
+
+    def _memory_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+        return None
+
+    def _shared_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        results = self._redis_get(key)
+        if results is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, results)
+        return _copy(results)
+
+    def put(self, key: Optional[str], results: List[Dict[str, Any]]):
+        if key is None:
+            return
+        results = _copy(results)
+        self._remember(key, results)
+        self._redis_put(key, results)
+
+    async def aput(self, key: Optional[str], results: List[Dict[str, Any]]):
+        """Versão assíncrona de put (a gravação no Redis roda numa thread)"""
+        if key is None:
+            return
+        results = _copy(results)
+        self._remember(key, results)
+        if self._redis is not None:
+            await asyncio.to_thread(self._redis_put, key, results)
+
+    def _redis_put(self, key: str, results: List[Dict[str, Any]]):
+        if self._redis is None:
+            return
+        try:
+            self._redis.set(f"rag:retrieval:{key}", _dumps(results), ex=max(1, int(self.ttl)))
+        except Exception as e:
+            print(f"⚠️ Falha ao gravar no cache Redis: {e}")
+
+    def _remember(self, key: str, results: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        if self._redis is None:
+            return None
+        try:
+            data = self._redis.get(f"rag:retrieval:{key}")
+        except Exception as e:
+            print(f"⚠️ Falha ao ler o cache Redis: {e}")
+            return None
+        return _loads(data) if data is not None else None
+
+    def clear(self):
+        """Esvazia o tier em memória (as versões são mantidas)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "cached_searches": len(self._entries),
+            "redis": self._redis is not None
+        }
+
+def _copy(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Cópia rasa por resultado: quem chama pode alterar os dicts sem afetar o cache"""
+    return [{**result, "metadata": dict(result.get("metadata", {}))} for result in results]
+
+def _dumps(results: List[Dict[str, Any]]) -> bytes:
+    return json.dumps([
+        {**result, "vector": result["vector"].tolist()} if "vector" in result else result
+        for result in results
+    ]).encode("utf-8")
+
+def _loads(data: bytes) -> List[Dict[str, Any]]:
+    results = json.loads(data)
+    for result in results:
+        if "vector" in result:
+            result["vector"] = np.asarray(result["vector"], dtype=np.float32)
+    return results
+
+# Instância global
+retrieval_cache = RetrievalCache()
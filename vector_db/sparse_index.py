@@ -0,0 +1,229 @@
+"""Índice esparso (BM25) e busca híbrida com reciprocal rank fusion"""
+
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
+from pathlib import Path
+from app.config import settings
+from vector_db.qdrant_client import make_result
+from vector_db.filters import matches
+import numpy as np
+import threading
+import unicodedata
+import json
+import math
+import os
+import re
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+ACCEPT_BATCH = 256  # IDs por consulta de payloads ao filtrar o BM25
+
+def tokenize(text: str) -> List[str]:
+    """Termos do texto: minúsculas, sem acentos, separados por não-alfanuméricos"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_PATTERN.findall(text)
+
+class SparseIndex:
+    """Índice invertido BM25 de uma collection, persistido em JSON.
+
+    A fonte da verdade são as frequências de termos por documento; as listas
+    invertidas (arrays numpy por termo) são montadas sob demanda. Se outro
+    processo (ex.: ``scripts/ingest.py``) regravar o arquivo, o índice é
+    recarregado na próxima busca.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[int] = None
+        self._compiled = None
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _refresh(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            self._docs = json.load(f)["docs"]
+        self._mtime = mtime
+        self._compiled = None
+
+    def save(self):
+        """Grava o índice (escrita atômica)"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"docs": self._docs}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._mtime = self.path.stat().st_mtime_ns
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        """Indexa (ou reindexa) documentos pelo ID do ponto"""
+        metadatas = metadatas or [{} for _ in texts]
+        with self._lock:
+            self._refresh()
+            for pid, text, metadata in zip(ids, texts, metadatas):
+                tf: Dict[str, int] = {}
+                for term in tokenize(text):
+                    tf[term] = tf.get(term, 0) + 1
+                self._docs[pid] = {"source": metadata.get("source"), "tf": tf}
+            self._compiled = None
+
+    def remove_stale(self, keep: Dict[str, List[str]]):
+        """Remove documentos de cada source que não estão em ``keep[source]``"""
+        with self._lock:
+            self._refresh()
+            keep_ids = {source: set(ids) for source, ids in keep.items()}
+            stale = [
+                pid for pid, doc in self._docs.items()
+                if doc["source"] in keep_ids and pid not in keep_ids[doc["source"]]
+            ]
+            for pid in stale:
+                del self._docs[pid]
+            if stale:
+                self._compiled = None
+
+    def _compile(self):
+        ids = list(self._docs)
+        lengths = np.zeros(len(ids), dtype=np.float32)
+        rows: Dict[str, List[int]] = {}
+        freqs: Dict[str, List[int]] = {}
+        for row, pid in enumerate(ids):
+            tf = self._docs[pid]["tf"]
+            lengths[row] = sum(tf.values())
+            for term, count in tf.items():
+                rows.setdefault(term, []).append(row)
+                freqs.setdefault(term, []).append(count)
+        postings = {
+            term: (np.asarray(rows[term], dtype=np.int64), np.asarray(freqs[term], dtype=np.float32))
+            for term in rows
+        }
+        average = float(lengths.mean()) if len(ids) else 0.0
+        self._compiled = (ids, lengths, average, postings)
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        accept: Optional[Callable[[List[str]], Set[str]]] = None
+    ) -> List[Tuple[str, float]]:
+        """Os k documentos de maior score BM25 como (id, score).
+
+        ``accept`` recebe lotes de IDs (em ordem de score) e devolve os que
+        passam no filtro; o corte em k acontece depois do filtro, então um
+        filtro seletivo não esvazia o resultado.
+        """
+        with self._lock:
+            self._refresh()
+            if self._compiled is None:
+                self._compile()
+            ids, lengths, average, postings = self._compiled
+        if not ids or k <= 0:
+            return []
+
+        scores = np.zeros(len(ids), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(average, 1e-9))
+        for term in set(tokenize(query)):
+            if term not in postings:
+                continue
+            rows, tf = postings[term]
+            idf = math.log(1 + (len(ids) - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm[rows])
+
+        matched = np.flatnonzero(scores)
+        if accept is not None:
+            results: List[Tuple[str, float]] = []
+            order = matched[np.argsort(-scores[matched], kind="stable")]
+            batch = max(k, ACCEPT_BATCH)
+            for start in range(0, len(order), batch):
+                rows = order[start:start + batch]
+                accepted = accept([ids[row] for row in rows])
+                results.extend((ids[row], float(scores[row])) for row in rows if ids[row] in accepted)
+                if len(results) >= k:
+                    break
+            return results[:k]
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(ids[row], float(scores[row])) for row in matched]
+
+_indexes: Dict[str, SparseIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_sparse_index(collection_name: str) -> SparseIndex:
+    """Índice esparso de uma collection (um por processo)"""
+    with _indexes_lock:
+        if collection_name not in _indexes:
+            path = Path(settings.sparse_index_dir) / f"{collection_name}.json"
+            _indexes[collection_name] = SparseIndex(str(path))
+        return _indexes[collection_name]
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Combina rankings pela soma de 1 / (k + posição); retorna (id, score) em ordem decrescente"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, pid in enumerate(ranking, 1):
+            scores[pid] = scores.get(pid, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+def hybrid_search(
+    store,
+    query: str,
+    k: int = 5,
+    score_threshold: float = 0.3,
+    candidates: Optional[int] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    with_vectors: bool = False,
+    query_vector: Optional[np.ndarray] = None
+) -> List[Dict[str, Any]]:
+    """Busca híbrida: densa (``store``) + BM25, fundidas por RRF.
+
+    O ``score_threshold`` vale só para a parte densa; documentos que casam
+    termos exatos (códigos, siglas, nomes) entram pelo BM25 mesmo com
+    similaridade baixa. O ``score`` devolvido é o score do RRF. Com
+    ``with_vectors``, só os resultados vindos da parte densa trazem "vector".
+    """
+    candidates = max(candidates or settings.hybrid_candidates, k)
+    dense = store.similarity_search(query, k=candidates, score_threshold=score_threshold, filters=filters,
+                                    with_vectors=with_vectors, query_vector=query_vector)
+    payloads: Dict[str, Dict[str, Any]] = {}
+
+    def accept(ids: List[str]) -> Set[str]:
+        # IDs que não existem mais na collection também ficam de fora
+        fetched = store.get_payloads(ids)
+        payloads.update(fetched)
+        return {pid for pid, payload in fetched.items() if matches(payload, filters)}
+
+    # Com filtro, ele é aplicado antes do corte em ``candidates`` do BM25
+    sparse = get_sparse_index(store.collection_name).search(query, k=candidates, accept=accept if filters else None)
+    print(f"   🧩 Híbrida: {len(dense)} densos, {len(sparse)} BM25")
+
+    fused = reciprocal_rank_fusion(
+        [[result["id"] for result in dense], [pid for pid, _ in sparse]],
+        k=settings.hybrid_rrf_k
+    )
+
+    by_id = {result["id"]: result for result in dense}
+    missing = [pid for pid, _ in fused if pid not in by_id and pid not in payloads]
+    if missing:
+        payloads.update(store.get_payloads(missing))
+
+    results = []
+    for pid, score in fused:
+        if pid in by_id:
+            results.append({**by_id[pid], "score": score})
+        elif pid in payloads and matches(payloads[pid], filters):
+            results.append(make_result(pid, payloads[pid], score))
+        # IDs só do BM25 fora do filtro ou que não existem mais na collection são ignorados
+        if len(results) == k:
+            break
+    return results